@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Pomiary wydajności monitorów i CLI na syntetycznej historii cen.
+Nie dotyka prawdziwych plików – wszystko dzieje się w katalogu tymczasowym.
+
+Użycie:
+  python benchmark.py load --rows 300000
+  python benchmark.py extract [--tavex strona_tavex.html] [--foto strona_foto.html]
+  python benchmark.py startup [--top 8]
+  python benchmark.py charts --rows 100000 --changed 30
+  python benchmark.py list --rows 1000000
+
+Strony do 'extract' można zapisać np.:  curl -o strona_tavex.html "<URL produktu>"
+"""
+
+import argparse
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from history_store import CsvHistoryStore
+
+SPREAD_FILE = "price_history_spread.csv"
+
+
+def make_history(path: str, rows: int, products: int = 60, seed: int = 1):
+    """Zapisuje syntetyczną historię w formacie price_history_spread.csv (co 15 min)."""
+    rnd = random.Random(seed)
+    names = [f"Produkt testowy {i}, {i % 7 + 1} oz" for i in range(products)]
+    prices = [rnd.uniform(100, 15000) for _ in names]
+    start = datetime(2020, 1, 1)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        w = csv.writer(f, lineterminator='\n')
+        w.writerow(['date', 'product', 'sell_price', 'buy_price', 'spread_pln'])
+        for i in range(rows):
+            p = i % products
+            if rnd.random() < 0.1:
+                prices[p] = round(prices[p] * rnd.uniform(0.98, 1.02), 2)
+            sell = round(prices[p], 2)
+            buy = round(sell * 0.95, 2)
+            date = start + timedelta(minutes=15 * (i // products))
+            w.writerow([date.strftime("%Y-%m-%d %H:%M"), names[p], sell, buy, round(sell - buy, 2)])
+    return names
+
+
+def timed(label: str, fn, repeat: int = 3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    print(f"  {label:<45} {best * 1000:9.1f} ms")
+    return result
+
+
+def bench_load(args):
+    import pandas as pd
+    from history_snapshot import HistorySnapshot
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, SPREAD_FILE)
+        make_history(path, args.rows)
+        store = CsvHistoryStore.for_file(path)
+        snap = HistorySnapshot(store)
+        print(f"Wczytywanie historii: {args.rows} wierszy, kopia {snap.ext}")
+
+        timed("CSV: pd.read_csv(parse_dates=['date'])",
+              lambda: pd.read_csv(path, encoding='utf-8', parse_dates=['date']))
+        timed("kopia: pierwsze zbudowanie", snap.rebuild, repeat=1)
+        timed("kopia: odczyt (bez nowych wierszy)", snap.load)
+
+        def append_and_load():
+            store.append([{'date': '2030-01-01 00:00', 'product': 'Nowy produkt',
+                           'sell_price': 1.0, 'buy_price': 0.9, 'spread_pln': 0.1}] * 60)
+            return snap.load()
+        timed("kopia: odczyt po dopisaniu 60 wierszy", append_and_load)
+
+
+SAMPLE_TAVEX = (
+    '<span class="product-poster__price-value" '
+    'data-pricelist=\'{"sell":[{"price":"1650.00"}],"buy":[{"price":"1580.00"}]}\'>1 650 zł</span>'
+)
+SAMPLE_FOTO = (
+    '<em class="main-price">3 899,00 zł</em>'
+    '<div class="availability__availability"><span class="first">Dostępność:</span>'
+    '<span class="second">dostępny</span></div>'
+)
+
+
+def synthetic_page(target: str, noise: int = 1500) -> bytes:
+    """Strona o rozmiarze zbliżonym do prawdziwej: dużo menu/kafelków i szukany element."""
+    rows = "".join(
+        f'<li class="menu__item item-{i}"><a href="/kategoria/{i}">Kategoria {i}</a>'
+        f'<span class="price">{i},00 zł</span></li>'
+        for i in range(noise)
+    )
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Produkt</title></head>'
+            f'<body><ul class="menu">{rows}</ul><div class="product">{target}</div>'
+            f'<footer>{rows}</footer></body></html>').encode('utf-8')
+
+
+def bench_extract(args):
+    from extractors import Bs4Extractor, HAS_LXML, LxmlExtractor
+    from shops import FotoformaShop, TavexShop
+
+    pages = {
+        'tavex': (open(args.tavex, 'rb').read() if args.tavex else synthetic_page(SAMPLE_TAVEX),
+                  TavexShop.fields),
+        'foto': (open(args.foto, 'rb').read() if args.foto else synthetic_page(SAMPLE_FOTO),
+                 FotoformaShop.fields),
+    }
+    extractors = [Bs4Extractor()] + ([LxmlExtractor()] if HAS_LXML else [])
+    for shop, (content, fields) in pages.items():
+        print(f"Strona {shop}: {len(content) / 1024:.0f} KB")
+        results = []
+        for ex in extractors:
+            results.append(timed(f"{ex.name}", lambda: ex.extract(content, fields), repeat=args.repeat))
+        if any(r != results[0] for r in results):
+            print(f"  ⚠️ Różne wyniki: {results}")
+        else:
+            print(f"  wynik: {results[0]}")
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'bs4', 'lxml', 'requests', 'smtplib')
+
+
+def import_times(argv, cwd):
+    """
+    Uruchamia 'python -X importtime <argv>' w osobnym procesie (zimny start).
+    Zwraca (czas procesu [s], łączny czas importów [us], {pakiet: czas własny [us]}).
+    """
+    env = dict(os.environ, PYTHONPATH=HERE)
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=cwd, env=env,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    total, packages = 0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):    # bez wcięcia = import najwyższego poziomu
+            total += int(cumulative)
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return wall, total, packages
+
+
+def bench_startup(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        make_history(os.path.join(tmp, SPREAD_FILE), 2000)
+        cli = os.path.join(HERE, 'cli_price_tool.py')
+        targets = [
+            ("monitor_engine (import)", ['-c', 'import monitor_engine'], HERE),
+            ("monitor_cen.py (import)", ['-c', 'import monitor_cen'], HERE),
+            ("monitor_cen_foto.py (import)", ['-c', 'import monitor_cen_foto'], HERE),
+            ("cli_price_tool.py list", [cli, 'list'], tmp),
+            ("cli_price_tool.py show", [cli, 'show', 'Produkt testowy 1, 2 oz'], tmp),
+            ("cli_price_tool.py plot", [cli, 'plot', 'Produkt testowy 1, 2 oz', '--last', '20',
+                                        '--out', os.path.join(tmp, 'chart.png')], tmp),
+        ]
+        print(f"Zimny start (python -X importtime), najlepszy z {args.repeat}:")
+        for label, argv, cwd in targets:
+            runs = [import_times(argv, cwd) for _ in range(args.repeat)]
+            wall, total, packages = min(runs, key=lambda r: r[0])
+            heavy = [m for m in HEAVY_MODULES if m in packages]
+            print(f"  {label:<32} proces {wall * 1000:7.1f} ms, importy {total / 1000:7.1f} ms"
+                  f"  [{', '.join(heavy) or 'bez ciężkich modułów'}]")
+            for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+                print(f"      {name:<28} {us / 1000:7.1f} ms")
+
+
+def bench_charts(args):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from charts import render_charts
+    from shops import TavexShop
+
+    adapter = TavexShop(extractor=None)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, SPREAD_FILE)
+        names = make_history(path, args.rows)[:args.changed]
+        store = CsvHistoryStore.for_file(path)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            print(f"Wykresy: {len(names)} zmienionych produktów, historia {args.rows} wierszy")
+
+            def per_product():  # dotychczasowe create_chart() w pętli
+                for name in names:
+                    df = pd.read_csv(path, encoding='utf-8')
+                    data = df[df['product'] == name].tail(adapter.chart_points)
+                    fig, ax = plt.subplots(figsize=adapter.chart_size)
+                    adapter.draw_chart(ax, data, name)
+                    fig.tight_layout()
+                    fig.savefig(adapter.chart_filename(name))
+                    plt.close(fig)
+            timed("osobno: read_csv + nowa figura pyplot", per_product, repeat=1)
+            timed("razem: jedno czytanie, wspólna figura Agg",
+                  lambda: render_charts(store, adapter, names), repeat=1)
+            timed("razem: jeden obrazek z panelami",
+                  lambda: render_charts(store, adapter, names, combined=True), repeat=1)
+        finally:
+            os.chdir(cwd)
+
+
+def bench_list(args):
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, SPREAD_FILE)
+        make_history(path, args.rows)
+        store = CsvHistoryStore.for_file(path)
+        print(f"Ostatnie ceny (list): {args.rows} wierszy")
+
+        def old_list():  # dotychczasowe cmd_list: cała historia + sort + groupby
+            df = pd.read_csv(path, encoding='utf-8')
+            return df.sort_values('date').groupby('product').tail(1).sort_values('product')
+        timed("pandas: read_csv + sort + groupby.tail(1)", old_list, repeat=1)
+        timed("indeks: odbudowa z pełnej historii", store.rebuild_state, repeat=1)
+        timed("indeks: last_state() (bez nowych wierszy)", store.last_state)
+
+        def append_and_state():
+            store.append([{'date': '2030-01-01 00:00', 'product': 'Nowy produkt',
+                           'sell_price': 1.0, 'buy_price': 0.9, 'spread_pln': 0.1}] * 60)
+            return store.last_state()
+        timed("indeks: last_state() po dopisaniu 60 wierszy", append_and_state)
+
+        cli = os.path.join(HERE, 'cli_price_tool.py')
+        for fmt in ('table', 'json', 'csv'):
+            timed(f"proces: cli_price_tool.py list --format {fmt}",
+                  lambda: subprocess.run([sys.executable, cli, 'list', '--format', fmt], cwd=tmp,
+                                         stdout=subprocess.DEVNULL, check=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pomiary wydajności monitora cen")
+    sub = parser.add_subparsers(dest='cmd')
+
+    p_load = sub.add_parser('load', help='CSV vs kolumnowa kopia historii')
+    p_load.add_argument('--rows', type=int, default=300000)
+    p_load.set_defaults(func=bench_load)
+
+    p_extract = sub.add_parser('extract', help='BeautifulSoup vs lxml na stronach produktów')
+    p_extract.add_argument('--tavex', help='zapisana strona produktu Tavex (html)')
+    p_extract.add_argument('--foto', help='zapisana strona produktu fotoforma (html)')
+    p_extract.add_argument('--repeat', type=int, default=5)
+    p_extract.set_defaults(func=bench_extract)
+
+    p_startup = sub.add_parser('startup', help='czas zimnego startu (importów) punktów wejścia')
+    p_startup.add_argument('--repeat', type=int, default=3)
+    p_startup.add_argument('--top', type=int, default=5, help='ile najcięższych importów pokazać')
+    p_startup.set_defaults(func=bench_startup)
+
+    p_charts = sub.add_parser('charts', help='wykresy do emaila: osobno vs wspólne czytanie i figura')
+    p_charts.add_argument('--rows', type=int, default=100000)
+    p_charts.add_argument('--changed', type=int, default=30, help='liczba zmienionych produktów')
+    p_charts.set_defaults(func=bench_charts)
+
+    p_list = sub.add_parser('list', help='ostatnie ceny: pandas vs indeks ostatnich wpisów')
+    p_list.add_argument('--rows', type=int, default=1000000)
+    p_list.set_defaults(func=bench_list)
+
+    args = parser.parse_args()
+    if not args.cmd:
+        parser.print_help()
+        return
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Dyskowy cache wykresów PNG adresowany treścią.
+
+Klucz = hash (styl wykresu, produkt, wiersze na wykresie). Jeśli ostatnie
+15–20 punktów produktu się nie zmieniło, wykres jest brany z cache zamiast
+rysowany od nowa – domyślnie tylko w 'cli_price_tool.py plot'. Email dostaje
+wykres produktu, którego historia właśnie się zmieniła, więc klucz prawie
+nigdy nie trafia, a każdy zapis to plik na karcie SD – dla emaili cache
+trzeba włączyć osobno ("cache_email": true).
+Po przekroczeniu limitu rozmiaru usuwane są najdawniej używane pliki (LRU
+wg czasu modyfikacji, odświeżanego przy każdym trafieniu).
+
+Opcjonalna konfiguracja w config.json:
+  "charts": {"cache_dir": "chart_cache", "cache_mb": 20,     # cache_mb 0 – bez cache
+             "cache_email": false}                          # true – także wykresy w emailach
+"""
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+# Zwiększ po zmianie wyglądu wykresów (draw_chart, cmd_plot) – stare pliki przestaną pasować
+CHART_STYLE_VERSION = 1
+
+
+def chart_key(style: str, *parts) -> str:
+    """Hash stylu i kolejnych części: tekstów (np. nazwa produktu) i DataFrame'ów (rysowane wiersze)."""
+    h = hashlib.sha256(f"{CHART_STYLE_VERSION}|{style}".encode('utf-8'))
+    for part in parts:
+        if hasattr(part, 'to_csv'):
+            h.update(part.to_csv(index=False).encode('utf-8'))
+        else:
+            h.update(json.dumps(part, ensure_ascii=False, default=str).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class ChartCache:
+    """Pliki <klucz>.png w jednym katalogu z limitem łącznego rozmiaru."""
+
+    def __init__(self, directory: str = "chart_cache", max_bytes: int = 20 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: dict, email: bool = False) -> Optional["ChartCache"]:
+        """Cache z sekcji 'charts' lub None, gdy wyłączony (cache_mb: 0; dla emaili bez cache_email)."""
+        charts_cfg = config.get("charts", {}) or {}
+        mb = charts_cfg.get("cache_mb", 20)
+        if not mb or (email and not charts_cfg.get("cache_email", False)):
+            return None
+        return cls(charts_cfg.get("cache_dir", "chart_cache"), int(float(mb) * 1024 * 1024))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # ostatnie użycie – dla LRU
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Usuwa najdawniej używane wykresy, aż łączny rozmiar zmieści się w limicie."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith('.png')]
+        except OSError:
+            return
+        files = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
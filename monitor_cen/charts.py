@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Wykresy do emaili ze zmianami cen.
+
+Zamiast osobnego czytania historii i nowej figury pyplot dla każdego
+zmienionego produktu:
+  - historia wszystkich produktów z raportu czytana jest raz (load_last_many),
+  - rysujemy bez GUI (Agg) na jednej figurze, czyszczonej między produktami,
+  - opcjonalnie wszystkie wykresy trafiają do jednego obrazka z panelami,
+  - gotowe PNG biorą się z cache (chart_cache.py), jeśli rysowane wiersze się
+    nie zmieniły – wtedy matplotlib nie jest nawet importowany,
+  - wynikiem są bajty PNG w pamięci (BytesIO), dołączane wprost do emaila –
+    bez tymczasowych plików chart_*.png na karcie SD.
+
+Opcjonalna konfiguracja w config.json:
+  "charts": {"combined": false}    # true – jeden obrazek zamiast N załączników
+"""
+
+import io
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+from chart_cache import ChartCache, chart_key
+
+COMBINED_NAME = "zbiorczy"
+
+
+def new_figure(size):
+    """Figura Agg – bez GUI i bez globalnego stanu pyplot."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=size)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def figure_png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def cached_png(cache: Optional[ChartCache], key: str, render: Callable[[], bytes]) -> bytes:
+    """PNG z cache albo narysowany przez render() i zapisany do cache."""
+    png = cache.get(key) if cache is not None else None
+    if png is None:
+        png = render()
+        if cache is not None:
+            cache.put(key, png)
+    return png
+
+
+class ChartRenderer:
+    """Rysuje wykresy produktów jednego sklepu wg adapter.draw_chart."""
+
+    def __init__(self, adapter, cache: Optional[ChartCache] = None):
+        self.adapter = adapter
+        self.cache = cache
+        self.style = f"{adapter.name}:{adapter.chart_size}"
+        self._fig = None
+        self._ax = None
+
+    def load(self, history, products: List[str]) -> Dict[str, object]:
+        """Ostatnie wpisy (adapter.chart_points) produktów z co najmniej dwoma punktami."""
+        if not products or not history.exists():
+            return {}
+        data = history.load_last_many(products, self.adapter.chart_points)
+        return {p: d for p, d in data.items() if len(d) >= 2}
+
+    def _draw_single(self, product: str, product_data) -> bytes:
+        if self._fig is None:
+            self._fig = new_figure(self.adapter.chart_size)
+            self._ax = self._fig.add_subplot()
+        self._ax.clear()
+        self.adapter.draw_chart(self._ax, product_data, product)
+        self._fig.tight_layout()
+        return figure_png(self._fig)
+
+    def _draw_combined(self, data: Dict[str, object]) -> bytes:
+        cols = 1 if len(data) < 4 else 2
+        rows = math.ceil(len(data) / cols)
+        width, height = self.adapter.chart_size
+        fig = new_figure((width * cols, height * rows))
+        axes = fig.subplots(rows, cols, squeeze=False).ravel()
+        for ax, (product, product_data) in zip(axes, data.items()):
+            self.adapter.draw_chart(ax, product_data, product)
+        for ax in axes[len(data):]:
+            ax.set_visible(False)
+        fig.tight_layout()
+        return figure_png(fig)
+
+    def render(self, data: Dict[str, object]) -> List[Tuple[str, bytes]]:
+        """Osobny PNG dla każdego produktu; jedna figura i osie używane ponownie."""
+        charts = []
+        for product, product_data in data.items():
+            key = chart_key(self.style, product, product_data)
+            png = cached_png(self.cache, key, lambda: self._draw_single(product, product_data))
+            charts.append((self.adapter.chart_filename(product), png))
+        return charts
+
+    def render_combined(self, data: Dict[str, object]) -> List[Tuple[str, bytes]]:
+        """Wszystkie produkty jako panele jednego obrazka (dwie kolumny od 4 produktów)."""
+        if not data:
+            return []
+        key = chart_key(self.style + ":combined", *[x for item in data.items() for x in item])
+        png = cached_png(self.cache, key, lambda: self._draw_combined(data))
+        return [(self.adapter.chart_filename(COMBINED_NAME), png)]
+
+
+def render_charts(history, adapter, products: List[str], combined: bool = False,
+                  cache: Optional[ChartCache] = None) -> List[Tuple[str, bytes]]:
+    """
+    Wykresy dla listy produktów jako (nazwa pliku załącznika, bajty PNG);
+    produkty z mniej niż dwoma wpisami są pomijane.
+    """
+    renderer = ChartRenderer(adapter, cache)
+    data = renderer.load(history, list(dict.fromkeys(products)))
+    return renderer.render_combined(data) if combined else renderer.render(data)
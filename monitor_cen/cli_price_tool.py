@@ -3,87 +3,398 @@
 """
 Prosty CLI do przeglądu historii cen i tworzenia wykresów.
 Użycie:
-  python cli_price_tool.py list
-  python cli_price_tool.py show "Złoty Dukat Austriacki 3,44 g"
+  python cli_price_tool.py list [--format json|csv|table]
+  python cli_price_tool.py show "Złoty Dukat Austriacki 3,44 g" [--since 2024-01-01] [--until 7d] [--limit 50]
+  python cli_price_tool.py follow "Złoty Dukat Austriacki 3,44 g" [--limit 10]       # jak tail -f
   python cli_price_tool.py plot "Złoty Dukat Austriacki 3,44 g" --last 30 --out chart.png
+  python cli_price_tool.py plot "Złoty Dukat Austriacki 3,44 g" --out - > chart.png   # PNG na stdout
+  python cli_price_tool.py plot "Złoty Dukat Austriacki 3,44 g" --range 1y           # świece dzienne
+  python cli_price_tool.py summary --days 30
+  python cli_price_tool.py analyze [--window 96] [--threshold 4] [--changes 10] [--format json|csv|table]
+  python cli_price_tool.py premium [--rebuild] [--format json|csv|table]            # premia ponad kruszec
+  python cli_price_tool.py reindex [price_history_foto.csv ...]
+  python cli_price_tool.py migrate [price_history_foto.csv ...] --db price_history.db
 """
 import argparse
+import csv
+import json
+import re
 import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
+from history_store import CsvHistoryStore, open_history
 
 DATA_FILE = Path("price_history_spread.csv")
+LIST_COLUMNS = ['product', 'date', 'sell_price', 'buy_price', 'spread_pln']
+CONFIG_FILE = Path("config.json")
 
-def load_df():
-    if not DATA_FILE.exists():
+def load_config():
+    """Wczytuje config.json (jeśli jest) – potrzebna tylko sekcja 'storage'."""
+    if not CONFIG_FILE.exists():
+        return {}
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        print("Błąd w config.json:", e)
+        return {}
+
+def get_store():
+    return open_history(str(DATA_FILE), load_config())
+
+def open_store():
+    store = get_store()
+    if not store.exists():
         print("Brak pliku:", DATA_FILE)
         sys.exit(1)
-    df = pd.read_csv(DATA_FILE, encoding='utf-8', parse_dates=['date'])
-    return df
+    return store
+
+def load_df(product=None, use_cache=True, start=None):
+    """
+    Wczytuje historię. Dla magazynu CSV domyślnie z kolumnowej kopii
+    (history_snapshot), odświeżanej tylko o nowe wiersze; use_cache=False
+    (--no-cache) wymusza czytanie samego CSV.
+    """
+    store = open_store()
+    if use_cache and isinstance(store, CsvHistoryStore):
+        from history_snapshot import HistorySnapshot
+        df = HistorySnapshot(store).load()
+        if product is not None:
+            df = df[df['product'] == product]
+        if start is not None:
+            df = df[df['date'] >= start]
+        return df
+    return store.load_range(start=start, product=product)
 
 def cmd_list(args):
-    df = load_df()
-    latest = df.sort_values('date').groupby('product').tail(1)
-    latest = latest.sort_values('product')
-    for _, r in latest.iterrows():
-        print(f"- {r['product']}: sell={r['sell_price']} PLN, buy={r['buy_price']} PLN, spread={r['spread_pln']} PLN")
+    """
+    Ostatnie ceny z indeksu ostatnich wpisów (last_state) – bez parsowania historii,
+    więc można to odpytywać co kilka sekund. --no-cache odbudowuje indeks z pełnej historii.
+    """
+    store = open_store()
+    state = store.rebuild_state() if args.no_cache else store.last_state()
+    rows = [state[p] for p in sorted(state)]
+    if args.format == 'json':
+        json.dump([{c: r.get(c) for c in LIST_COLUMNS} for r in rows], sys.stdout, ensure_ascii=False)
+        print()
+    elif args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=LIST_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for r in rows:
+            print(f"- {r['product']}: sell={r['sell_price']} PLN, buy={r['buy_price']} PLN, spread={r['spread_pln']} PLN")
+
+def parse_when(text, end=False):
+    """Data '2024-01-31', '2024-01-31 12:00' albo względnie: '7d', '12h' (tyle temu)."""
+    m = re.fullmatch(r'(\d+(?:\.\d+)?)([dh])', text.strip())
+    if m:
+        unit = 'days' if m.group(2) == 'd' else 'hours'
+        return datetime.now() - timedelta(**{unit: float(m.group(1))})
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            when = datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            continue
+        if end and fmt == "%Y-%m-%d":
+            when = when.replace(hour=23, minute=59)  # --until z samą datą – do końca dnia
+        return when
+    raise argparse.ArgumentTypeError(f"nieprawidłowa data: {text!r} (np. 2024-01-31, '2024-01-31 12:00', 7d, 12h)")
+
+def parse_until(text):
+    return parse_when(text, end=True)
+
+def format_row(r):
+    return f"{r['date']}  sell={r['sell_price']}\tbuy={r['buy_price']}\tspread={r['spread_pln']}"
 
 def cmd_show(args):
-    df = load_df()
+    """Wiersze wypisywane na bieżąco z generatora – bez pandas i bez wczytywania całej historii."""
     prod = args.product
-    p_df = df[df['product'] == prod].sort_values('date')
-    if p_df.empty:
-        print("Nie znaleziono produktu:", prod)
+    rows = open_store().iter_product(prod, start=args.since, end=args.until)
+    count = 0
+    for _, r in rows:
+        if count == 0:
+            print(f"Historia dla: {prod}\n")
+        print(format_row(r))
+        count += 1
+        if args.limit and count >= args.limit:
+            break
+    if count == 0:
+        if args.since or args.until:
+            print(f"Brak wpisów dla: {prod} w podanym zakresie dat")
+        else:
+            print("Nie znaleziono produktu:", prod)
+        return
+    print(f"\n({count} wpisów)")
+
+def cmd_follow(args):
+    """Ostatnie wpisy produktu, a potem nowe – na bieżąco, jak tail -f (Ctrl+C kończy)."""
+    prod = args.product
+    store = open_store()
+    after = store.end_position()
+    last = deque(store.iter_product(prod, start=args.since), maxlen=args.limit)
+    print(f"Historia dla: {prod} – nowe wpisy co {args.interval:g} s (Ctrl+C kończy)\n")
+    for pos, r in last:
+        print(format_row(r))
+        after = max(after, pos)
+    sys.stdout.flush()
+    try:
+        while True:
+            time.sleep(args.interval)
+            for pos, r in store.iter_product(prod, after=after):
+                print(format_row(r), flush=True)
+                after = max(after, pos)
+    except KeyboardInterrupt:
+        pass
+
+def cmd_summary(args):
+    from price_summary import summarize, trend_emoji
+    start = datetime.now() - timedelta(days=args.days)
+    summary = summarize(load_df(use_cache=not args.no_cache, start=start), args.column)
+    if summary.empty:
+        print(f"Brak danych z ostatnich {args.days:g} dni.")
+        return
+    print(f"Podsumowanie {args.column} – ostatnie {args.days:g} dni ({len(summary)} produktów)\n")
+    for prod, r in summary.to_dict('index').items():
+        print(f"{trend_emoji(r['diff'], flat='➡️')} {prod}: {r['first']} -> {r['last']} PLN "
+              f"({r['diff']:+.2f} PLN, {r['pct']:+.2f}%), min={r['min']}, max={r['max']}, wpisów={r['count']}")
+
+def cmd_analyze(args):
+    """Średnia i zmienność krocząca, percentyl spreadu i punkty zmiany – przyrostowo (price_analytics)."""
+    from price_analytics import PriceAnalytics
+    analytics = PriceAnalytics(open_store(), str(DATA_FILE.with_suffix('.analytics.pkl')),
+                               window=args.window, threshold=args.threshold)
+    state = analytics.update(rebuild=args.no_cache)
+    report = analytics.report(state)
+    if args.format == 'json':
+        print(report.reset_index().to_json(orient='records', force_ascii=False))
+        return
+    if args.format == 'csv':
+        report.to_csv(sys.stdout, index_label='product', lineterminator='\n')
+        return
+    if report.empty:
+        print("Brak danych do analizy.")
+        return
+    print(f"Analiza sell_price – okno {args.window} wpisów, próg zmiany z={args.threshold:g} ({len(report)} produktów)\n")
+    for prod, r in report.to_dict('index').items():
+        vol = "brak" if r['volatility'] != r['volatility'] else f"{r['volatility']:.3f}%"
+        print(f"📊 {prod}: {r['last']} PLN, średnia {r['mean']} PLN, zmienność {vol}, "
+              f"spread {r['spread']} PLN (percentyl {r['spread_pct']:g}%)")
+        if isinstance(r['change_date'], str):
+            print(f"   ↪ ostatnia zmiana poziomu {r['change_date']}: {r['change_from']} → {r['change_to']} PLN "
+                  f"({r['change_pct']:+.2f}%)")
+    if args.changes:
+        changes = state['change_points'].tail(args.changes)
+        print(f"\nOstatnie punkty zmiany ({len(changes)} z {len(state['change_points'])}):")
+        for c in changes.to_dict('records'):
+            print(f"  {c['date']}  {c['product']}: {c['before']} → {c['after']} PLN ({c['pct']:+.2f}%, z={c['z']:g})")
+
+def cmd_premium(args):
+    """Ostatnia premia ponad wartość kruszcu (premium.py); --rebuild przelicza całą historię z zapisanych cen spot."""
+    from premium import PremiumTracker
+    tracker = PremiumTracker.from_config(load_config())
+    if tracker is None:
+        print("Brak produktów z masą kruszcu – sekcja 'premium' w config.json.")
+        return
+    if args.rebuild:
+        n = tracker.rebuild(open_store())
+        print(f"✅ Przeliczono premię: {n} wpisów\n")
+    state = tracker.premium_store.last_state() if tracker.premium_store.exists() else {}
+    rows = [state[p] for p in sorted(state)]
+    columns = ['product', 'date', 'metal', 'melt_pln', 'premium_pln', 'premium_pct']
+    if args.format == 'json':
+        json.dump([{c: r.get(c) for c in columns} for r in rows], sys.stdout, ensure_ascii=False)
+        print()
         return
-    print(f"Historia dla: {prod} ({len(p_df)} wpisów)\n")
-    for _, r in p_df.iterrows():
-        print(f"{r['date']}  sell={r['sell_price']}\tbuy={r['buy_price']}\tspread={r['spread_pln']}")
+    if args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    if not rows:
+        print("Brak zapisanej premii – pojawi się po najbliższym przebiegu monitora.")
+        return
+    for r in rows:
+        print(f"🪙 {r['product']} | {r['date']} | kruszec: {r['melt_pln']} PLN | "
+              f"premia: {r['premium_pln']} PLN ({r['premium_pct']}%)")
 
 def sanitize_fname(s):
     return ''.join(c for c in s if c.isalnum() or c in ' _-').strip().replace(' ', '_')[:120]
 
+RESOLUTION_LABELS = {'week': 'tygodniowe', 'day': 'dzienne', 'hour': 'godzinowe'}
+
+def parse_range(text):
+    """Długość okna wykresu: '1y', '6m', '2w', '30d', '12h'."""
+    m = re.fullmatch(r'(\d+(?:\.\d+)?)([hdwmy])', text.strip())
+    if not m:
+        raise argparse.ArgumentTypeError(f"nieprawidłowy zakres: {text!r} (np. 1y, 6m, 2w, 30d, 12h)")
+    days = {'h': 1 / 24, 'd': 1, 'w': 7, 'm': 30, 'y': 365}[m.group(2)]
+    return timedelta(days=float(m.group(1)) * days)
+
+def pick_resolution(store, prod, start, points):
+    """Najgrubsze świece OHLC z co najmniej 'points' punktami w zakresie; None – surowe wpisy."""
+    from history_rollup import RESOLUTIONS
+    if store.rollups is None:
+        return None
+    store.rollups.sync(store)  # nadrabia wiersze dopisane poza append() (np. stara historia)
+    start_s = start.strftime("%Y-%m-%d %H:%M")
+    for res in RESOLUTIONS:
+        if store.rollups.count(prod, res, start_s) >= points:
+            return res
+    return None
+
 def cmd_plot(args):
-    df = load_df()
+    from chart_cache import ChartCache, chart_key
+    from charts import cached_png, figure_png, new_figure
     prod = args.product
-    p_df = df[df['product'] == prod].sort_values('date')
+    # przy --out - komunikaty na stderr, żeby nie mieszać ich z PNG
+    log = sys.stderr if args.out == '-' else sys.stdout
+    start, res = None, None
+    if args.range:
+        store = open_store()
+        last = store.last_state().get(prod)
+        if last is None:
+            print("Nie znaleziono produktu:", prod, file=log)
+            return
+        # Zakres liczony od ostatniego wpisu produktu
+        start = datetime.strptime(str(last['date'])[:16], "%Y-%m-%d %H:%M") - args.range
+        res = pick_resolution(store, prod, start, args.points)
+
+    if res is not None:
+        p_df = store.rollups.load(prod, res, start.strftime("%Y-%m-%d %H:%M"))
+        cols = ['date', 'sell_price_low', 'sell_price_high', 'sell_price_close', 'buy_price_close']
+    else:
+        p_df = load_df(product=prod, use_cache=not args.no_cache, start=start).sort_values('date')
+        cols = ['date', 'sell_price', 'buy_price']
     if p_df.empty:
-        print("Nie znaleziono produktu:", prod)
+        print("Nie znaleziono produktu:", prod, file=log)
         return
     last_n = args.last
     if last_n:
         p_df = p_df.tail(last_n)
-    plt.figure(figsize=(10,4))
-    plt.plot(p_df['date'], p_df['sell_price'], marker='o', label='sprzedaż')
-    plt.plot(p_df['date'], p_df['buy_price'], marker='o', linestyle='--', label='skup')
-    plt.title(prod)
-    plt.xlabel('data')
-    plt.ylabel('PLN')
-    plt.legend()
-    plt.xticks(rotation=35, ha='right')
-    plt.tight_layout()
+
+    def draw():  # matplotlib tylko, gdy wykresu nie ma w cache
+        fig = new_figure((10, 4))
+        ax = fig.add_subplot()
+        if res is not None:
+            ax.fill_between(p_df['date'], p_df['sell_price_low'], p_df['sell_price_high'],
+                            alpha=0.25, label='sprzedaż min–max')
+            ax.plot(p_df['date'], p_df['sell_price_close'], label='sprzedaż')
+            ax.plot(p_df['date'], p_df['buy_price_close'], linestyle='--', label='skup')
+            ax.set_title(f"{prod} – świece {RESOLUTION_LABELS[res]} ({len(p_df)})")
+        else:
+            ax.plot(p_df['date'], p_df['sell_price'], marker='o', label='sprzedaż')
+            ax.plot(p_df['date'], p_df['buy_price'], marker='o', linestyle='--', label='skup')
+            ax.set_title(prod)
+        ax.set_xlabel('data')
+        ax.set_ylabel('PLN')
+        ax.legend()
+        ax.tick_params(axis='x', rotation=35)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+        fig.tight_layout()
+        return figure_png(fig)
+
+    cache = None if args.no_cache else ChartCache.from_config(load_config())
+    png = cached_png(cache, chart_key(f"cli:plot:(10, 4):{res or 'raw'}", prod, p_df[cols]), draw)
+    if args.out == '-':
+        sys.stdout.buffer.write(png)
+        sys.stdout.buffer.flush()
+        return
     out = args.out or f"chart_{sanitize_fname(prod)}.png"
-    plt.savefig(out)
-    plt.close()
-    print("Zapisano wykres:", out)
+    with open(out, 'wb') as f:
+        f.write(png)
+    print("Zapisano wykres:", out, f"({RESOLUTION_LABELS[res]} OHLC)" if res else "")
+
+def cmd_reindex(args):
+    files = args.files or [str(DATA_FILE)]
+    for data_file in files:
+        if not Path(data_file).exists():
+            print("Brak pliku:", data_file)
+            continue
+        state = CsvHistoryStore.for_file(data_file).rebuild_state()
+        print(f"Odbudowano indeks ostatnich cen: {data_file} ({len(state)} produktów)")
+
+def cmd_migrate(args):
+    from history_store import migrate_csv_to_sqlite
+    files = args.files or [str(DATA_FILE)]
+    for data_file in files:
+        if not Path(data_file).exists():
+            print("Brak pliku:", data_file)
+            continue
+        n = migrate_csv_to_sqlite(data_file, args.db)
+        print(f"Przeniesiono {n} wierszy: {data_file} -> {args.db}")
 
 def main():
     parser = argparse.ArgumentParser(description="CLI do historii cen")
     sub = parser.add_subparsers(dest='cmd')
 
-    p_list = sub.add_parser('list', help='lista produktów i ostatnie ceny')
+    # Wspólne opcje komend czytających historię
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--no-cache', action='store_true',
+                        help='czytaj bezpośrednio CSV, z pominięciem kolumnowej kopii historii (i cache wykresów)')
+
+    p_list = sub.add_parser('list', help='lista produktów i ostatnie ceny', parents=[common])
+    p_list.add_argument('--format', choices=['table', 'json', 'csv'], default='table',
+                        help='table (domyślnie) albo json/csv – np. dla dashboardów')
     p_list.set_defaults(func=cmd_list)
 
-    p_show = sub.add_parser('show', help='pokaż historię produktu')
+    # --no-cache przyjmowane dla zgodności – show i follow i tak czytają historię strumieniowo
+    p_show = sub.add_parser('show', help='pokaż historię produktu', parents=[common])
     p_show.add_argument('product', help='nazwa produktu (dokładnie)')
+    p_show.add_argument('--since', type=parse_when, default=None,
+                        help="od daty: 2024-01-31, '2024-01-31 12:00' albo 7d / 12h temu")
+    p_show.add_argument('--until', type=parse_until, default=None, help='do daty (jak --since)')
+    p_show.add_argument('--limit', type=int, default=None, help='najwyżej N pierwszych wpisów z zakresu')
     p_show.set_defaults(func=cmd_show)
 
-    p_plot = sub.add_parser('plot', help='zapisz wykres trendu produktu')
+    p_follow = sub.add_parser('follow', help='ostatnie wpisy produktu i nowe na bieżąco (jak tail -f)')
+    p_follow.add_argument('product', help='nazwa produktu (dokładnie)')
+    p_follow.add_argument('--since', type=parse_when, default=None, help='pokaż wpisy od daty (jak w show)')
+    p_follow.add_argument('--limit', type=int, default=10, help='ile ostatnich wpisów pokazać na start (domyślnie 10)')
+    p_follow.add_argument('--interval', type=float, default=2, help='co ile sekund sprawdzać nowe wpisy (domyślnie 2)')
+    p_follow.set_defaults(func=cmd_follow)
+
+    p_plot = sub.add_parser('plot', help='zapisz wykres trendu produktu', parents=[common])
     p_plot.add_argument('product', help='nazwa produktu (dokładnie)')
     p_plot.add_argument('--last', type=int, default=None, help='ostatnie N wpisów')
-    p_plot.add_argument('--out', default=None, help='plik wyjściowy (png)')
+    p_plot.add_argument('--range', type=parse_range, default=None,
+                        help='okres do ostatniego wpisu, np. 1y, 6m, 2w, 30d – automatycznie świece tygodniowe/dzienne/godzinowe')
+    p_plot.add_argument('--points', type=int, default=60,
+                        help='minimalna liczba punktów przy wyborze rozdzielczości dla --range (domyślnie 60)')
+    p_plot.add_argument('--out', default=None, help="plik wyjściowy (png); '-' – PNG na stdout")
     p_plot.set_defaults(func=cmd_plot)
 
+    p_summary = sub.add_parser('summary', help='zmiany cen wszystkich produktów w oknie N dni', parents=[common])
+    p_summary.add_argument('--days', type=float, default=7, help='długość okna w dniach (domyślnie 7)')
+    p_summary.add_argument('--column', default='sell_price', help='kolumna ceny (domyślnie sell_price)')
+    p_summary.set_defaults(func=cmd_summary)
+
+    p_analyze = sub.add_parser('analyze', help='statystyki kroczące, percentyl spreadu, punkty zmiany',
+                               parents=[common])
+    p_analyze.add_argument('--window', type=int, default=96, help='okno w wpisach (domyślnie 96 = doba co 15 min)')
+    p_analyze.add_argument('--threshold', type=float, default=4.0, help='próg punktu zmiany (statystyka z, domyślnie 4)')
+    p_analyze.add_argument('--changes', type=int, default=0, help='pokaż też N ostatnich punktów zmiany')
+    p_analyze.add_argument('--format', choices=['table', 'json', 'csv'], default='table')
+    p_analyze.set_defaults(func=cmd_analyze)
+
+    p_premium = sub.add_parser('premium', help='premia dealera ponad wartość kruszcu (sekcja "premium")')
+    p_premium.add_argument('--rebuild', action='store_true',
+                           help='przelicz całą historię z zapisanych cen spot (np. po zmianie masy produktu)')
+    p_premium.add_argument('--format', choices=['table', 'json', 'csv'], default='table')
+    p_premium.set_defaults(func=cmd_premium)
+
+    p_reindex = sub.add_parser('reindex', help='odbuduj indeks ostatnich cen z pełnej historii')
+    p_reindex.add_argument('files', nargs='*', help='pliki historii (domyślnie price_history_spread.csv)')
+    p_reindex.set_defaults(func=cmd_reindex)
+
+    p_migrate = sub.add_parser('migrate', help='jednorazowa migracja historii CSV do SQLite')
+    p_migrate.add_argument('files', nargs='*', help='pliki historii (domyślnie price_history_spread.csv)')
+    p_migrate.add_argument('--db', default='price_history.db', help='plik bazy SQLite')
+    p_migrate.set_defaults(func=cmd_migrate)
+
     args = parser.parse_args()
     if not args.cmd:
         parser.print_help()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Tryb zestawień (digest): zamiast emaila po każdym przebiegu ze zmianami,
+zmiany cen i dostępności trafiają do dziennika zdarzeń (events.db), a po
+upływie okna (np. 2 h od pierwszej zmiany) idzie jeden email ze zmianami
+netto – produkt, który w tym czasie skakał w górę i w dół i wrócił do ceny
+wyjściowej, w ogóle się w nim nie pojawi. Mniej połączeń SMTP i wykresów
+w dni dużej zmienności.
+
+Konfiguracja w config.json:
+  "digest": {
+    "enabled": true,
+    "window_minutes": 120,
+    "min_abs": 0,          # minimalna zmiana netto w PLN
+    "min_pct": 0,          # minimalna zmiana netto w %
+    "products": {"Złoty Dukat Austriacki 3,44 g": {"min_abs": 5, "min_pct": 0.5}}
+  }
+Zmiana ceny trafia do zestawienia, gdy spełnia oba progi; zmiana dostępności – zawsze.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class DigestLog:
+    """Dziennik zdarzeń (zmian) per sklep z oznaczaniem wysłanych w zestawieniu."""
+
+    def __init__(self, path: str = "events.db", window_minutes: float = 120,
+                 min_abs: float = 0, min_pct: float = 0, products: Optional[Dict[str, dict]] = None):
+        self.path = path
+        self.window = timedelta(minutes=float(window_minutes))
+        self.min_abs = float(min_abs)
+        self.min_pct = float(min_pct)
+        self.products = products or {}
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["DigestLog"]:
+        """Dziennik z sekcji 'digest' lub None, gdy tryb zestawień jest wyłączony."""
+        cfg = config.get("digest", {}) or {}
+        if not cfg.get("enabled"):
+            return None
+        return cls(cfg.get("events_file", "events.db"), cfg.get("window_minutes", 120),
+                   cfg.get("min_abs", 0), cfg.get("min_pct", 0), cfg.get("products", {}))
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " shop TEXT NOT NULL, product TEXT NOT NULL, ts TEXT NOT NULL,"
+                " change TEXT NOT NULL, sent INTEGER NOT NULL DEFAULT 0)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_pending ON events (shop, sent, id)")
+            self._conn.commit()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def record(self, shop: str, changes: List[dict], now: datetime):
+        db = self._db()
+        db.executemany(
+            "INSERT INTO events (shop, product, ts, change) VALUES (?, ?, ?, ?)",
+            [(shop, c['name'], now.strftime(TS_FORMAT), json.dumps(c, ensure_ascii=False)) for c in changes])
+        db.commit()
+
+    def pending(self, shop: str) -> List[Tuple[int, str, datetime, dict]]:
+        rows = self._db().execute(
+            "SELECT id, product, ts, change FROM events WHERE shop = ? AND sent = 0 ORDER BY id", (shop,))
+        return [(i, p, datetime.strptime(ts, TS_FORMAT), json.loads(c)) for i, p, ts, c in rows]
+
+    def mark_sent(self, ids: List[int]):
+        db = self._db()
+        db.executemany("UPDATE events SET sent = 1 WHERE id = ?", [(i,) for i in ids])
+        db.commit()
+
+    # --- zmiany netto ---
+
+    def passes(self, adapter, change: dict) -> bool:
+        """Czy zmiana netto przekracza progi produktu (zmiany bez kwoty – zawsze)."""
+        amount = adapter.change_amount(change)
+        if amount is None:
+            return True
+        old, new = amount
+        limits = self.products.get(change['name'], {})
+        min_abs = float(limits.get("min_abs", self.min_abs))
+        min_pct = float(limits.get("min_pct", self.min_pct))
+        pct = abs(new - old) / old * 100 if old else float('inf')
+        return abs(new - old) >= min_abs and pct >= min_pct
+
+    def due(self, events: list, now: datetime) -> bool:
+        """Okno liczone od pierwszej niewysłanej zmiany."""
+        return bool(events) and now - events[0][2] >= self.window
+
+    def net_changes(self, adapter, events: list) -> List[dict]:
+        """Zmiany netto per produkt (kolejność pierwszego wystąpienia), po progach."""
+        by_product: Dict[str, List[dict]] = {}
+        for _, product, _, change in events:
+            by_product.setdefault(product, []).append(change)
+        net = []
+        for changes in by_product.values():
+            net.extend(c for c in adapter.coalesce(changes) if self.passes(adapter, c))
+        return net
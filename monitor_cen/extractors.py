@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Wyciąganie pojedynczych elementów ze stron produktów.
+
+Scrapery potrzebują z całej strony tylko jednego-dwóch elementów (np.
+span.product-poster__price-value na Tavex albo em.main-price na fotoforma),
+a pełne drzewo BeautifulSoup z 'html.parser' to główny koszt CPU na Raspberry Pi.
+Dlatego pola opisujemy deklaratywnie (Field) i wyciągamy je:
+  - szybko: lxml + XPath (parser w C),
+  - awaryjnie: BeautifulSoup, gdy lxml nie jest zainstalowany albo nie znalazł któregoś pola.
+
+Wybór w config.json (opcjonalnie):
+  "fetch": {"parser": "auto"}    # auto | lxml | bs4
+"""
+
+import importlib.util
+import re
+from typing import Dict, Optional
+
+# lxml importowany dopiero przy pierwszym parsowaniu – przebieg, w którym
+# wszystkie strony zwróciły 304, w ogóle go nie ładuje
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w:.-]+)', re.IGNORECASE)
+
+
+class Field:
+    """
+    Opis elementu na stronie: znacznik + klasa CSS, opcjonalnie element
+    potomny (child_tag + child_class) oraz atrybut; bez atrybutu brany jest tekst.
+    """
+
+    def __init__(self, tag: str, css_class: str, attr: Optional[str] = None,
+                 child_tag: Optional[str] = None, child_class: Optional[str] = None):
+        self.tag = tag
+        self.css_class = css_class
+        self.attr = attr
+        self.child_tag = child_tag
+        self.child_class = child_class
+        xpath = f"//{tag}[{_has_class(css_class)}]"
+        if child_tag:
+            xpath += f"//{child_tag}" + (f"[{_has_class(child_class)}]" if child_class else "")
+        self.xpath = xpath
+
+
+def _has_class(css_class: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')"
+
+
+def _text(pieces) -> str:
+    """
+    Tekst elementu jak BeautifulSoup get_text(strip=True): każdy fragment bez białych
+    znaków na brzegach, sklejone bez separatora. Tak zapisana jest dostępność
+    w historii, więc oba parsery muszą dawać ten sam tekst (inaczej fałszywy alert).
+    """
+    return "".join(piece.strip() for piece in pieces)
+
+
+class Bs4Extractor:
+    """Pełne drzewo BeautifulSoup (dotychczasowe zachowanie)."""
+    name = "bs4"
+
+    def extract(self, content, fields: Dict[str, Field]) -> Dict[str, Optional[str]]:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser')
+        out = {}
+        for key, f in fields.items():
+            el = soup.find(f.tag, class_=f.css_class)
+            if el is not None and f.child_tag:
+                el = el.find(f.child_tag, class_=f.child_class) if f.child_class else el.find(f.child_tag)
+            if el is None:
+                out[key] = None
+            elif f.attr:
+                out[key] = el.get(f.attr)
+            else:
+                out[key] = el.get_text(strip=True)
+        return out
+
+
+class LxmlExtractor:
+    """lxml + XPath – kilka razy szybsze niż BeautifulSoup z 'html.parser'."""
+    name = "lxml"
+
+    def extract(self, content, fields: Dict[str, Field]) -> Dict[str, Optional[str]]:
+        from lxml import html as lxml_html
+        # Kodowanie z <meta charset> rozpoznaje libxml2; bez deklaracji przyjąłby
+        # latin-1, więc – jak BeautifulSoup – zakładamy UTF-8
+        if isinstance(content, bytes) and not _META_CHARSET.search(content[:4096]):
+            content = content.decode('utf-8', errors='replace')
+        tree = lxml_html.fromstring(content)
+        out = {}
+        for key, f in fields.items():
+            found = tree.xpath(f.xpath)
+            if not found:
+                out[key] = None
+            elif f.attr:
+                out[key] = found[0].get(f.attr)
+            else:
+                out[key] = _text(found[0].itertext())
+        return out
+
+
+class AutoExtractor:
+    """lxml, a pola, których nie znalazł (albo wszystkie, gdy go brak) – BeautifulSoup."""
+    name = "auto"
+
+    def __init__(self):
+        self.fast = LxmlExtractor() if HAS_LXML else None
+        self.fallback = Bs4Extractor()
+
+    def extract(self, content, fields: Dict[str, Field]) -> Dict[str, Optional[str]]:
+        out = {}
+        if self.fast is not None:
+            try:
+                out = self.fast.extract(content, fields)
+            except Exception:
+                out = {}
+            if all(out.get(key) is not None for key in fields):
+                return out
+        missing = {key: f for key, f in fields.items() if out.get(key) is None}
+        out.update(self.fallback.extract(content, missing))
+        return out
+
+
+def get_extractor(name: str = "auto"):
+    """Zwraca ekstraktor: 'auto' (domyślnie), 'lxml' lub 'bs4'."""
+    if name == "bs4":
+        return Bs4Extractor()
+    if name == "lxml":
+        if not HAS_LXML:
+            print("⚠️ Brak biblioteki lxml – używam BeautifulSoup")
+            return Bs4Extractor()
+        return LxmlExtractor()
+    return AutoExtractor()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Równoległe pobieranie stron produktów dla monitorów cen.
+
+Jedna pula wątków na cały przebieg, jedna sesja HTTP (keep-alive) na host
+i limit zapytań na sekundę na host, żeby nie zasypać sklepu zapytaniami.
+Wyniki wracają w tej samej kolejności co produkty w config.json.
+
+Opcjonalna konfiguracja w config.json:
+  "fetch": {
+    "max_workers": 8,      # maksymalna liczba równoległych zapytań
+    "per_host_rps": 4.0    # maks. zapytań na sekundę do jednego hosta (0 = bez limitu)
+  }
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_RPS = 4.0
+
+
+class FetchPool:
+    """Pula wątków + sesje HTTP per host z prostym limitem zapytań."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 per_host_rps: Optional[float] = DEFAULT_PER_HOST_RPS,
+                 headers: Optional[dict] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.min_interval = 1.0 / per_host_rps if per_host_rps else 0.0
+        self.headers = dict(headers or {})
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._next_slot = {}
+
+    @classmethod
+    def from_config(cls, config: dict, headers: Optional[dict] = None) -> "FetchPool":
+        """Tworzy pulę na podstawie sekcji 'fetch' z config.json."""
+        fetch_cfg = config.get("fetch", {}) or {}
+        return cls(
+            max_workers=fetch_cfg.get("max_workers", DEFAULT_MAX_WORKERS),
+            per_host_rps=fetch_cfg.get("per_host_rps", DEFAULT_PER_HOST_RPS),
+            headers=headers,
+        )
+
+    def session(self, url: str) -> requests.Session:
+        """Zwraca współdzieloną sesję (keep-alive) dla hosta z podanego URL-a."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                s = requests.Session()
+                s.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                self._sessions[host] = s
+            return s
+
+    def _wait_for_slot(self, url: str):
+        """Blokuje wątek do momentu, aż limit zapytań dla hosta pozwoli na kolejne."""
+        if not self.min_interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Odpowiednik requests.get() korzystający z sesji hosta i limitu zapytań."""
+        self._wait_for_slot(url)
+        return self.session(url).get(url, **kwargs)
+
+    def map(self, fn: Callable, items: Iterable) -> List:
+        """Wywołuje fn(item) równolegle; wyniki w kolejności wejściowej."""
+        items = list(items)
+        if not items:
+            return []
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(fn, items))
+
+    def close(self):
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Zagregowana historia cen (OHLC) w rozdzielczości godzinowej, dziennej i tygodniowej.
+
+Wykres z całego roku z wpisów co 15 minut to ~35 tys. punktów na produkt –
+rysuje się długo i nic na nim nie widać. Obok historii trzymamy więc gotowe
+świece: open/high/low/close i liczbę wpisów dla każdej kolumny liczbowej
+(np. sell_price, buy_price) w przedziałach godzina / dzień / tydzień
+(od poniedziałku), jeden wiersz na produkt i przedział:
+  CSV:    price_history_spread.rollup.db       (obok pliku historii)
+  SQLite: tabele <tabela>_rollup w tej samej bazie
+
+Przy każdym dopisaniu do historii (append) świece aktualizowane są od razu,
+bez pandas – UPSERT dla kilku nowych wierszy. Jeśli agregaty nie nadążają za
+historią (nowy plik, przerwany zapis, stara historia sprzed tej zmiany),
+sync() doczytuje brakujące wiersze (load_appended) i agreguje je wektorowo.
+Z tego korzysta 'cli_price_tool.py plot --range 1y'.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+# Od najgrubszej – plot wybiera pierwszą, która daje dość punktów
+RESOLUTIONS = ('week', 'day', 'hour')
+FIELDS = ('open', 'high', 'low', 'close')
+
+
+def bucket(res: str, date: str) -> str:
+    """Początek przedziału dla daty 'YYYY-mm-dd HH:MM' jako tekst."""
+    if res == 'hour':
+        return date[:13] + ":00"
+    if res == 'day':
+        return date[:10]
+    day = datetime.strptime(date[:10], "%Y-%m-%d")
+    return (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+
+
+class Rollups:
+    """Tabela świec (res, product, bucket) -> n i <kolumna>_open/_high/_low/_close, plus pozycja w historii."""
+
+    def __init__(self, db_path: str, columns: Iterable[str], prefix: str = ""):
+        self.db_path = db_path
+        self.columns = list(columns)
+        self.table = f"{prefix}rollup"
+        self.meta = f"{prefix}rollup_meta"
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            values = "".join(f', "{c}_{f}" REAL' for c in self.columns for f in FIELDS)
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" ('
+                f' product TEXT NOT NULL, res TEXT NOT NULL, bucket TEXT NOT NULL, n INTEGER NOT NULL{values},'
+                ' PRIMARY KEY (product, res, bucket)) WITHOUT ROWID')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.meta}" (key TEXT PRIMARY KEY, value INTEGER)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def clear(self, position: int = 0):
+        """Usuwa wszystkie świece – po wyczyszczeniu historii; position: początek pustej historii."""
+        conn = self._db()
+        with conn:
+            conn.execute(f'DELETE FROM "{self.table}"')
+            conn.execute(f'DELETE FROM "{self.meta}"')
+            if position:
+                self._upsert(conn, [], position)
+
+    def position(self) -> int:
+        """Pozycja w historii (bajt w CSV / rowid w SQLite), do której świece są aktualne."""
+        row = self._db().execute(f'SELECT value FROM "{self.meta}" WHERE key = ?', ('position',)).fetchone()
+        return row[0] if row else 0
+
+    def _upsert(self, conn: sqlite3.Connection, candles: Iterable[tuple], position: int):
+        """candles: (product, res, bucket, n, potem open/high/low/close kolejnych kolumn)."""
+        names = [f'"{c}_{f}"' for c in self.columns for f in FIELDS]
+        updates = []
+        for c in self.columns:
+            o, h, l, cl = (f'"{c}_{f}"' for f in FIELDS)
+            # Brak wartości (NULL) w jednym z wierszy nie może wyzerować świecy
+            updates += [f'{o} = coalesce({o}, excluded.{o})',
+                        f'{h} = max(coalesce({h}, excluded.{h}), coalesce(excluded.{h}, {h}))',
+                        f'{l} = min(coalesce({l}, excluded.{l}), coalesce(excluded.{l}, {l}))',
+                        f'{cl} = coalesce(excluded.{cl}, {cl})']
+        marks = ", ".join("?" * (4 + len(names)))
+        conn.executemany(
+            f'INSERT INTO "{self.table}" (product, res, bucket, n, {", ".join(names)}) VALUES ({marks}) '
+            f'ON CONFLICT (product, res, bucket) DO UPDATE SET n = n + excluded.n, {", ".join(updates)}',
+            candles)
+        conn.execute(f'INSERT OR REPLACE INTO "{self.meta}" (key, value) VALUES (?, ?)',
+                     ('position', int(position)))
+
+    def add_rows(self, rows: List[dict], before: int, after: int):
+        """
+        Dopisuje wiersze właśnie dodane do historii (pozycje przed i po zapisie).
+        Gdy świece nie były aktualne do 'before', nic nie robi – nadrobi je sync().
+        """
+        conn = self._db()
+        if self.position() != before:
+            return
+        candles: Dict[tuple, list] = {}
+        for row in rows:
+            for res in RESOLUTIONS:
+                key = (row['product'], res, bucket(res, row['date']))
+                candle = candles.setdefault(key, [0] + [None] * (4 * len(self.columns)))
+                candle[0] += 1
+                for i, col in enumerate(self.columns):
+                    value = row.get(col)
+                    if value is None or value == '':
+                        continue
+                    value = float(value)
+                    o = 1 + 4 * i
+                    if candle[o] is None:
+                        candle[o:o + 4] = [value, value, value, value]
+                    else:
+                        candle[o + 1] = max(candle[o + 1], value)
+                        candle[o + 2] = min(candle[o + 2], value)
+                        candle[o + 3] = value
+        with conn:
+            self._upsert(conn, (key + tuple(c) for key, c in candles.items()), after)
+
+    def sync(self, store) -> int:
+        """Nadrabia świece z wierszy historii za zapamiętaną pozycją; zwraca liczbę wierszy."""
+        import pandas as pd
+        conn = self._db()
+        position = self.position()
+        if position > store.end_position():
+            # Historia się skurczyła (ręczna edycja) – liczymy od nowa
+            with conn:
+                conn.execute(f'DELETE FROM "{self.table}"')
+            position = 0
+        df, end = store.load_appended(position)
+        if df.empty:
+            if end != position:
+                with conn:
+                    self._upsert(conn, [], end)
+            return 0
+
+        dates = df['date'].astype(str)
+        day = pd.to_datetime(dates.str[:10], format="%Y-%m-%d")
+        buckets = {
+            'hour': dates.str[:13] + ":00",
+            'day': dates.str[:10],
+            'week': (day - pd.to_timedelta(day.dt.weekday, unit='D')).dt.strftime("%Y-%m-%d"),
+        }
+        values = df[self.columns].apply(pd.to_numeric, errors='coerce')
+        candles = []
+        for res in RESOLUTIONS:
+            grouped = values.groupby([df['product'], buckets[res]], sort=False)
+            # first/last pomijają puste wartości – jak w add_rows
+            parts = [grouped.size().rename('n')]
+            for col in self.columns:
+                parts.append(grouped[col].agg(['first', 'max', 'min', 'last'])
+                             .set_axis([f"{col}_{f}" for f in FIELDS], axis=1))
+            agg = pd.concat(parts, axis=1).reset_index()
+            agg = agg.astype(object).where(agg.notna(), None)
+            candles.extend((p, res, b, int(n), *rest) for p, b, n, *rest in agg.itertuples(index=False))
+        with conn:
+            self._upsert(conn, candles, end)
+        return len(df)
+
+    def count(self, product: str, res: str, start: Optional[str] = None) -> int:
+        """Liczba świec produktu w danej rozdzielczości (od przedziału zawierającego start)."""
+        sql = f'SELECT COUNT(*) FROM "{self.table}" WHERE product = ? AND res = ?'
+        params = [product, res]
+        if start is not None:
+            sql += ' AND bucket >= ?'
+            params.append(bucket(res, start))
+        return self._db().execute(sql, params).fetchone()[0]
+
+    def load(self, product: str, res: str, start: Optional[str] = None):
+        """DataFrame: date (początek przedziału), n oraz <kolumna>_open/_high/_low/_close dla każdej kolumny."""
+        import pandas as pd
+        names = ", ".join(f'"{c}_{f}"' for c in self.columns for f in FIELDS)
+        sql = f'SELECT bucket AS date, n, {names} FROM "{self.table}" WHERE product = ? AND res = ?'
+        params = [product, res]
+        if start is not None:
+            sql += ' AND bucket >= ?'
+            params.append(bucket(res, start))
+        df = pd.read_sql_query(sql + ' ORDER BY bucket', self._db(), params=params)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Kolumnowa kopia historii cen dla szybkiego wczytywania w CLI i raportach.
+
+Parsowanie dat i kolumny tekstowej 'product' z CSV dominuje czas wczytania,
+gdy historia ma setki tysięcy wierszy. Obok pliku CSV trzymamy więc kopię
+(snapshot) z datami jako datetime64 i produktem jako category:
+  price_history_spread.snapshot.parquet   (lub .pkl, gdy brak pyarrow)
+  price_history_spread.snapshot.json      (pozycja w CSV, do której kopia jest aktualna)
+
+Przy odczycie doczytywane są tylko wiersze dopisane do CSV od ostatniego razu
+i zapisywane w małym pliku różnicowym (*.snapshot.delta.*), który jest scalany
+z główną kopią, gdy urośnie. Jeśli CSV się skurczył (ręczna edycja), kopia jest
+budowana od nowa.
+Dotyczy tylko magazynu CSV – SQLite ma własne indeksy.
+"""
+
+import importlib.util
+import io
+import json
+import os
+
+import pandas as pd
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+# Plik różnicowy jest scalany z główną kopią, gdy przekroczy ten rozmiar
+# (liczba wierszy albo ułamek wierszy głównej kopii – co większe).
+DELTA_MIN_ROWS = 20000
+DELTA_MAX_FRACTION = 0.1
+HAS_PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+
+def _parse_dates(series: pd.Series) -> pd.Series:
+    try:
+        return pd.to_datetime(series, format=DATE_FORMAT)
+    except (ValueError, TypeError):
+        return pd.to_datetime(series)
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df['date'] = _parse_dates(df['date'])
+    df['product'] = df['product'].astype('category')
+    return df
+
+
+class HistorySnapshot:
+    """Kolumnowa kopia jednego pliku historii CSV (CsvHistoryStore)."""
+
+    def __init__(self, store):
+        self.store = store
+        base = os.path.splitext(store.data_file)[0] + ".snapshot"
+        self.ext = ".parquet" if HAS_PARQUET else ".pkl"
+        self.snapshot_file = base + self.ext
+        self.delta_file = base + ".delta" + self.ext
+        self.meta_file = base + ".json"
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('format') != self.ext or not os.path.exists(self.snapshot_file):
+                return None
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _read_frame(self, path: str) -> pd.DataFrame:
+        if self.ext == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _write_frame(self, df: pd.DataFrame, path: str):
+        tmp = path + ".tmp"
+        if self.ext == ".parquet":
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    def _write_meta(self, csv_size: int, rows: int, delta_rows: int):
+        tmp = self.meta_file + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'csv_size': csv_size, 'rows': rows, 'delta_rows': delta_rows,
+                       'format': self.ext}, f)
+        os.replace(tmp, self.meta_file)
+
+    def _write(self, df: pd.DataFrame, csv_size: int):
+        """Zapisuje pełną kopię (bez pliku różnicowego)."""
+        self._write_frame(df, self.snapshot_file)
+        if os.path.exists(self.delta_file):
+            os.remove(self.delta_file)
+        self._write_meta(csv_size, len(df), 0)
+
+    def _read_csv_from(self, offset: int):
+        """Wczytuje wiersze CSV od pozycji offset (0 = cały plik z nagłówkiem)."""
+        with open(self.store.data_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # Pomijamy ewentualną niedokończoną ostatnią linię
+        data = data[:data.rfind(b'\n') + 1]
+        end = offset + len(data)
+        if offset == 0:
+            df = pd.read_csv(io.BytesIO(data), encoding='utf-8')
+        elif data:
+            df = pd.read_csv(io.BytesIO(data), encoding='utf-8', header=None,
+                             names=self.store.columns)
+        else:
+            df = pd.DataFrame(columns=self.store.columns)
+        return df, end
+
+    def rebuild(self) -> pd.DataFrame:
+        df, end = self._read_csv_from(0)
+        df = _normalize(df)
+        self._write(df, end)
+        return df
+
+    def load(self) -> pd.DataFrame:
+        """Zwraca całą historię; doczytuje z CSV tylko nowe wiersze."""
+        meta = self._read_meta()
+        size = os.path.getsize(self.store.data_file)
+        if meta is None or meta['csv_size'] > size:
+            return self.rebuild()
+        base = self._read_frame(self.snapshot_file)
+        delta = None
+        if meta.get('delta_rows') and os.path.exists(self.delta_file):
+            delta = self._read_frame(self.delta_file)
+        csv_size = meta['csv_size']
+
+        if csv_size < size:
+            new, csv_size = self._read_csv_from(csv_size)
+            if not new.empty:
+                new = _normalize(new)
+                delta = new if delta is None else pd.concat([delta, new], ignore_index=True)
+                delta['product'] = delta['product'].astype('category')
+                if len(delta) > max(DELTA_MIN_ROWS, DELTA_MAX_FRACTION * len(base)):
+                    df = _concat(base, delta)
+                    self._write(df, csv_size)
+                    return df
+                self._write_frame(delta, self.delta_file)
+                self._write_meta(csv_size, len(base), len(delta))
+
+        return base if delta is None else _concat(base, delta)
+
+
+def _concat(base: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Łączy kopię główną z różnicową, zachowując 'product' jako category."""
+    cats = base['product'].cat.categories.union(delta['product'].cat.categories)
+    base = base.assign(product=base['product'].cat.set_categories(cats))
+    delta = delta.assign(product=delta['product'].cat.set_categories(cats))
+    return pd.concat([base, delta], ignore_index=True)
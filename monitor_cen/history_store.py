@@ -0,0 +1,639 @@
+# -*- coding: utf-8 -*-
+"""
+Historia cen w pliku CSV zapisywana przyrostowo (tylko dopisywanie).
+
+Każdy przebieg monitora dopisuje wyłącznie nowe wiersze (append + fsync),
+zamiast wczytywać i nadpisywać cały plik. Ostatni znany stan każdego produktu
+trzymany jest w małym pliku obok historii (np. price_history_spread.state.json),
+więc monitor nie musi czytać całej historii, żeby wykryć zmiany.
+
+Po awarii w trakcie zapisu w pliku może zostać niedokończona ostatnia linia –
+jest ona obcinana przed kolejnym dopisaniem. Plik stanu (indeks ostatnich
+wpisów) zapisywany jest atomowo (plik tymczasowy + os.replace) i zawiera
+pozycję w historii, do której jest aktualny. Jeśli historia urosła od tego
+czasu, doczytywane są tylko nowe wiersze; jeśli się skurczyła – indeks jest
+odbudowywany z całego CSV.
+
+Opcjonalnie historia może być trzymana w bazie SQLite (tryb WAL, indeks na
+(product, date)) – wtedy raporty i CLI czytają tylko potrzebny zakres dat.
+Wybór magazynu w config.json:
+  "storage": {"backend": "sqlite", "sqlite_path": "price_history.db"}
+Domyślnie ("csv") zachowanie jest takie jak wcześniej.
+
+Przy każdym dopisaniu aktualizowane są też świece OHLC (godzina/dzień/tydzień,
+history_rollup.py); wyłączenie: "storage": {"rollups": false}.
+
+Ręczna odbudowa indeksu:
+  python history_store.py rebuild price_history_spread.csv price_history_foto.csv
+Jednorazowa migracja CSV → SQLite:
+  python history_store.py migrate price_history_spread.csv price_history_foto.csv [--db price_history.db]
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from history_rollup import Rollups
+
+DEFAULT_SQLITE_PATH = "price_history.db"
+
+# Znane pliki historii: (kolumny, kolumny liczbowe)
+SCHEMAS = {
+    "price_history_spread.csv": (['date', 'product', 'sell_price', 'buy_price', 'spread_pln'],
+                                 ['sell_price', 'buy_price', 'spread_pln']),
+    "price_history_foto.csv":   (['date', 'product', 'price', 'availability'],
+                                 ['price']),
+    # Ceny spot zapisywane przy każdym przebiegu (produkt = metal) i premia dealera (premium.py)
+    "price_history_spot.csv":   (['date', 'product', 'usd_oz', 'usd_pln', 'pln_gram'],
+                                 ['usd_oz', 'usd_pln', 'pln_gram']),
+    "price_history_premium.csv": (['date', 'product', 'metal', 'melt_pln', 'premium_pln', 'premium_pct'],
+                                  ['melt_pln', 'premium_pln', 'premium_pct']),
+}
+
+
+class CsvHistoryStore:
+    """Plik CSV z historią cen + plik stanu z ostatnim wpisem dla każdego produktu."""
+
+    def __init__(self, data_file: str, columns: Iterable[str], numeric: Iterable[str] = (),
+                 rollups: bool = True):
+        self.data_file = data_file
+        self.columns = list(columns)
+        self.numeric = set(numeric)
+        self.state_file = os.path.splitext(data_file)[0] + ".state.json"
+        self.rollups = Rollups(os.path.splitext(data_file)[0] + ".rollup.db",
+                               [c for c in self.columns if c in self.numeric]) if rollups else None
+
+    @classmethod
+    def for_file(cls, data_file: str, rollups: bool = True) -> "CsvHistoryStore":
+        """Tworzy magazyn dla jednego ze znanych plików historii (SCHEMAS)."""
+        columns, numeric = _schema(data_file)
+        return cls(data_file, columns, numeric, rollups)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.data_file)
+
+    # --- plik historii ---
+
+    def ensure_file(self):
+        """Tworzy pusty plik historii z nagłówkiem, jeśli nie istnieje."""
+        if not os.path.exists(self.data_file):
+            with open(self.data_file, 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f, lineterminator='\n').writerow(self.columns)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _repair_tail(self):
+        """Obcina niedokończoną ostatnią linię (przerwany zapis)."""
+        with open(self.data_file, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Szukamy ostatniego znaku nowej linii od końca pliku
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                idx = f.read(step).rfind(b'\n')
+                if idx != -1:
+                    f.truncate(pos + idx + 1)
+                    break
+            else:
+                # Uszkodzony nawet nagłówek – zapisujemy go od nowa
+                f.seek(0)
+                f.truncate(0)
+                f.write((','.join(self.columns) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"⚠️ Obcięto niedokończony wpis w {self.data_file}")
+
+    def _parse_row(self, row: dict) -> dict:
+        """Konwertuje wiersz odczytany z CSV (same stringi) na typy jak przy zapisie."""
+        out = {}
+        for col in self.columns:
+            val = row.get(col)
+            if col in self.numeric:
+                try:
+                    val = float(val) if val not in (None, '') else None
+                except ValueError:
+                    val = None
+            out[col] = val
+        return out
+
+    def append(self, rows: List[dict]):
+        """Dopisuje wiersze na koniec historii i aktualizuje plik stanu."""
+        self.ensure_file()
+        if not rows:
+            return
+        self._repair_tail()
+        state = self.last_state()
+        before = self._history_size()
+        # Pusta historia (sam nagłówek) – świece liczone od pozycji za nagłówkiem,
+        # inaczej pozycja 0 nowych agregatów nigdy nie zgadza się z rozmiarem pliku
+        start = before if self.rollups is not None and before == self._header_end() else None
+        with open(self.data_file, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction='ignore',
+                                    lineterminator='\n')
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+        for row in rows:
+            state[row['product']] = {col: row.get(col) for col in self.columns}
+        self._write_state(state)
+        _update_rollups(self.rollups, rows, before, self._history_size(), start)
+
+    def clear(self):
+        """Usuwa całą historię (np. przed przeliczeniem tabeli pochodnej od nowa)."""
+        for path in (self.data_file, self.state_file):
+            if os.path.exists(path):
+                os.remove(path)
+        if self.rollups is not None:
+            self.rollups.clear()
+        self.ensure_file()
+
+    def iter_rows(self):
+        """Zwraca kolejne wiersze historii (z typami) bez wczytywania całego pliku."""
+        if not self.exists():
+            return
+        with open(self.data_file, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield self._parse_row(row)
+
+    def _offset_for_date(self, f, start: str) -> int:
+        """
+        Pozycja pierwszej linii z datą >= start – wyszukiwanie binarne po bajtach
+        pliku (historia jest dopisywana chronologicznie), bez czytania początku.
+        """
+        f.seek(0)
+        f.readline()
+        lo, hi = f.tell(), os.fstat(f.fileno()).st_size
+        if lo == 0:
+            return 0
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid - 1)
+            f.readline()  # początek pierwszej linii od pozycji mid
+            line = f.readline()
+            if not line or line.split(b',', 1)[0].decode('utf-8', 'replace') >= start:
+                hi = mid
+            else:
+                lo = mid + 1
+        f.seek(lo - 1)
+        f.readline()
+        return f.tell()
+
+    def end_position(self) -> int:
+        """Pozycja za ostatnią pełną linią historii (punkt startu dla iter_product(after=...))."""
+        size = self._history_size()
+        if size == 0:
+            return 0
+        with open(self.data_file, 'rb') as f:
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+        return size - len(tail) + tail.rfind(b'\n') + 1
+
+    def iter_product(self, product: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, after: Optional[int] = None):
+        """
+        Generator (pozycja, wiersz) wpisów jednego produktu z zakresu [start, end],
+        czytanych strumieniowo z pliku – bez pandas i bez wczytywania całej historii.
+        'after' (pozycja z poprzedniego wywołania) wznawia czytanie za tym wierszem.
+        """
+        if not self.exists():
+            return
+        start_s = start.strftime("%Y-%m-%d %H:%M") if start is not None else None
+        end_s = end.strftime("%Y-%m-%d %H:%M") if end is not None else None
+        key = product.encode('utf-8')
+        quick = b'"' not in key  # nazwy z cudzysłowem są w CSV zapisane inaczej
+        with open(self.data_file, 'rb') as f:
+            if after is not None:
+                f.seek(after)
+            elif start_s is not None:
+                f.seek(self._offset_for_date(f, start_s))
+            else:
+                f.readline()  # nagłówek
+            pos = f.tell()
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # niedokończony zapis – wiersz pojawi się przy kolejnym czytaniu
+                pos += len(line)
+                if quick and key not in line:
+                    continue
+                row = dict(zip(self.columns, next(csv.reader([line.decode('utf-8')]))))
+                if row.get('product') != product:
+                    continue
+                if start_s is not None and row['date'] < start_s:
+                    continue
+                if end_s is not None and row['date'] > end_s:
+                    break
+                yield pos, self._parse_row(row)
+
+    def load_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   product: Optional[str] = None):
+        """Zwraca DataFrame z wpisami z zakresu [start, end] (CSV: filtr po wczytaniu)."""
+        import pandas as pd
+        df = pd.read_csv(self.data_file, encoding='utf-8')
+        df['date'] = pd.to_datetime(df['date'])
+        if product is not None:
+            df = df[df['product'] == product]
+        if start is not None:
+            df = df[df['date'] >= start]
+        if end is not None:
+            df = df[df['date'] <= end]
+        return df
+
+    def load_appended(self, position: int = 0):
+        """
+        (DataFrame wierszy dopisanych za pozycją, nowa pozycja) – dla obliczeń
+        przyrostowych; pozycja 0 oznacza całą historię. Daty jako tekst.
+        """
+        import pandas as pd
+        with open(self.data_file, 'rb') as f:
+            f.seek(position)
+            if position == 0:
+                f.readline()  # nagłówek
+            start = f.tell()
+            data = f.read()
+        # Pomijamy ewentualną niedokończoną ostatnią linię
+        data = data[:data.rfind(b'\n') + 1]
+        if not data:
+            return pd.DataFrame(columns=self.columns), start
+        df = pd.read_csv(io.BytesIO(data), encoding='utf-8', header=None, names=self.columns)
+        return df, start + len(data)
+
+    def load_last(self, product: str, n: int):
+        """Zwraca ostatnie n wpisów produktu (daty jako tekst, jak w pliku)."""
+        import pandas as pd
+        df = pd.read_csv(self.data_file, encoding='utf-8')
+        return df[df['product'] == product].tail(n)
+
+    def load_last_many(self, products: Iterable[str], n: int) -> dict:
+        """Ostatnie n wpisów każdego z produktów – jedno czytanie pliku dla wszystkich."""
+        import pandas as pd
+        products = list(products)
+        df = pd.read_csv(self.data_file, encoding='utf-8')
+        df = df[df['product'].isin(products)].groupby('product', sort=False).tail(n)
+        groups = dict(tuple(df.groupby('product', sort=False)))
+        return {p: groups[p] for p in products if p in groups}
+
+    # --- indeks ostatnich wpisów (ostatni wiersz per produkt) ---
+
+    def close(self):
+        if self.rollups is not None:
+            self.rollups.close()
+
+    def _header_end(self) -> int:
+        with open(self.data_file, 'rb') as f:
+            return len(f.readline())
+
+    def _history_size(self) -> int:
+        return os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+
+    def _write_state(self, state: Dict[str, dict], history_size: Optional[int] = None):
+        if history_size is None:
+            history_size = self._history_size()
+        tmp = self.state_file + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'history_size': history_size, 'products': state},
+                      f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.state_file)
+
+    def _load_state(self):
+        """Zwraca (stan, pozycja_w_historii) z pliku indeksu lub None."""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data['products'], int(data['history_size'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _read_rows_from(self, offset: int):
+        """Czyta wiersze historii od podanej pozycji (początek linii) do końca pliku."""
+        with open(self.data_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        # Pomijamy ewentualną niedokończoną ostatnią linię
+        data = data[:data.rfind(b'\n') + 1]
+        end = offset + len(data)
+        text = io.StringIO(data.decode('utf-8'), newline='')
+        rows = [dict(zip(self.columns, r)) for r in csv.reader(text) if r]
+        return rows, end
+
+    def rebuild_state(self) -> Dict[str, dict]:
+        """Odtwarza indeks z pełnej historii (czytanej strumieniowo, bez pandas)."""
+        state = {}
+        if self.exists():
+            # Tylko ostatni surowy wiersz na produkt – typy konwertowane raz, na końcu
+            product = self.columns.index('product')
+            latest = {}
+            with open(self.data_file, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for r in reader:
+                    if len(r) > product and r[product]:
+                        latest[r[product]] = r
+            state = {p: self._parse_row(dict(zip(self.columns, r))) for p, r in latest.items()}
+            self._write_state(state)
+        return state
+
+    def last_state(self) -> Dict[str, dict]:
+        """
+        Zwraca {produkt: ostatni wiersz}.
+        Indeks jest doczytywany przyrostowo, gdy historia urosła od ostatniego
+        zapisu, i odbudowywany w całości, gdy jest brakujący lub niespójny.
+        """
+        loaded = self._load_state()
+        size = self._history_size()
+        if loaded is None or loaded[1] > size or loaded[1] <= 0:
+            return self.rebuild_state()
+        state, offset = loaded
+        if offset < size:
+            rows, end = self._read_rows_from(offset)
+            for row in rows:
+                if row.get('product'):
+                    state[row['product']] = self._parse_row(row)
+            self._write_state(state, end)
+        return state
+
+
+class SqliteHistoryStore:
+    """
+    Historia cen w tabeli SQLite (jedna tabela na plik historii).
+    Indeks (product, date) pozwala czytać zakresy dat i ostatnie wpisy bez
+    skanowania całej historii, więc osobny plik stanu nie jest potrzebny.
+    """
+
+    def __init__(self, db_path: str, table: str, columns: Iterable[str], numeric: Iterable[str] = (),
+                 rollups: bool = True):
+        self.db_path = db_path
+        self.table = table
+        self.columns = list(columns)
+        self.numeric = set(numeric)
+        self.rollups = Rollups(db_path, [c for c in self.columns if c in self.numeric],
+                               prefix=table + "_") if rollups else None
+        self._conn = None
+
+    @classmethod
+    def for_file(cls, data_file: str, db_path: str = DEFAULT_SQLITE_PATH,
+                 rollups: bool = True) -> "SqliteHistoryStore":
+        """Tabela odpowiadająca jednemu ze znanych plików historii (np. price_history_spread)."""
+        columns, numeric = _schema(data_file)
+        table = os.path.splitext(os.path.basename(data_file))[0]
+        return cls(db_path, table, columns, numeric, rollups)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            cols = ", ".join(f'"{c}" {"REAL" if c in self.numeric else "TEXT"}' for c in self.columns)
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" ({cols})')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{self.table}_product_date" '
+                         f'ON "{self.table}" (product, date)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{self.table}_date" '
+                         f'ON "{self.table}" (date)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def exists(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def ensure_file(self):
+        self._connect()
+
+    def count(self) -> int:
+        return self._connect().execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+
+    def append(self, rows: List[dict]):
+        """Dopisuje wiersze w jednej transakcji."""
+        if not rows:
+            return
+        conn = self._connect()
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        before = self.end_position()
+        with conn:
+            conn.executemany(f'INSERT INTO "{self.table}" ({cols}) VALUES ({marks})',
+                             ([row.get(c) for c in self.columns] for row in rows))
+        _update_rollups(self.rollups, rows, before, self.end_position())
+
+    def clear(self):
+        """Usuwa całą historię z tabeli (i jej świece)."""
+        with self._connect() as conn:
+            conn.execute(f'DELETE FROM "{self.table}"')
+        if self.rollups is not None:
+            self.rollups.clear()
+
+    def last_state(self) -> Dict[str, dict]:
+        """Zwraca {produkt: ostatni wiersz} (ostatni wstawiony wiersz dla produktu)."""
+        conn = self._connect()
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        cur = conn.execute(
+            f'SELECT {cols} FROM "{self.table}" WHERE rowid IN '
+            f'(SELECT MAX(rowid) FROM "{self.table}" GROUP BY product)'
+        )
+        return {r[self.columns.index('product')]: dict(zip(self.columns, r)) for r in cur}
+
+    def rebuild_state(self) -> Dict[str, dict]:
+        # Stan wynika bezpośrednio z indeksu w bazie – nie ma czego odbudowywać
+        return self.last_state()
+
+    def iter_rows(self):
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        for r in self._connect().execute(f'SELECT {cols} FROM "{self.table}" ORDER BY rowid'):
+            yield dict(zip(self.columns, r))
+
+    def end_position(self) -> int:
+        """Największy rowid (punkt startu dla iter_product(after=...))."""
+        return self._connect().execute(f'SELECT MAX(rowid) FROM "{self.table}"').fetchone()[0] or 0
+
+    def iter_product(self, product: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, after: Optional[int] = None):
+        """Generator (rowid, wiersz) wpisów produktu z zakresu [start, end] – kursor po indeksie (product, date)."""
+        where, params = ["product = ?"], [product]
+        if start is not None:
+            where.append("date >= ?")
+            params.append(start.strftime("%Y-%m-%d %H:%M"))
+        if end is not None:
+            where.append("date <= ?")
+            params.append(end.strftime("%Y-%m-%d %H:%M"))
+        if after is not None:
+            where.append("rowid > ?")
+            params.append(after)
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        cur = self._connect().execute(
+            f'SELECT rowid, {cols} FROM "{self.table}" WHERE {" AND ".join(where)} ORDER BY date, rowid', params)
+        for r in cur:
+            yield r[0], dict(zip(self.columns, r[1:]))
+
+    def load_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   product: Optional[str] = None):
+        """Zwraca DataFrame z wpisami z zakresu [start, end] – zapytanie po indeksie."""
+        import pandas as pd
+        where, params = [], []
+        if product is not None:
+            where.append("product = ?")
+            params.append(product)
+        if start is not None:
+            where.append("date >= ?")
+            params.append(start.strftime("%Y-%m-%d %H:%M"))
+        if end is not None:
+            where.append("date <= ?")
+            params.append(end.strftime("%Y-%m-%d %H:%M"))
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        sql = f'SELECT {cols} FROM "{self.table}"'
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY rowid"
+        df = pd.read_sql_query(sql, self._connect(), params=params)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def load_appended(self, position: int = 0):
+        """(DataFrame wierszy o rowid > position, największy rowid) – dla obliczeń przyrostowych."""
+        import pandas as pd
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        df = pd.read_sql_query(f'SELECT rowid AS rid, {cols} FROM "{self.table}" WHERE rowid > ? ORDER BY rowid',
+                               self._connect(), params=[int(position)])
+        if df.empty:
+            return df.drop(columns=['rid']), position
+        return df.drop(columns=['rid']), int(df['rid'].iloc[-1])
+
+    def load_last(self, product: str, n: int):
+        """Zwraca ostatnie n wpisów produktu (daty jako tekst)."""
+        import pandas as pd
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        sql = (f'SELECT * FROM (SELECT rowid AS rid, {cols} FROM "{self.table}" '
+               f'WHERE product = ? ORDER BY date DESC, rowid DESC LIMIT ?) ORDER BY rid')
+        df = pd.read_sql_query(sql, self._connect(), params=[product, int(n)])
+        return df.drop(columns=['rid'])
+
+    def load_last_many(self, products: Iterable[str], n: int) -> dict:
+        """Ostatnie n wpisów każdego z produktów – jedno zapytanie (ROW_NUMBER po indeksie product, date)."""
+        import pandas as pd
+        products = list(products)
+        if not products:
+            return {}
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        marks = ", ".join("?" * len(products))
+        sql = (f'SELECT {cols} FROM (SELECT rowid AS rid, {cols}, ROW_NUMBER() OVER '
+               f'(PARTITION BY product ORDER BY date DESC, rowid DESC) AS rn FROM "{self.table}" '
+               f'WHERE product IN ({marks})) WHERE rn <= ? ORDER BY rid')
+        df = pd.read_sql_query(sql, self._connect(), params=products + [int(n)])
+        groups = dict(tuple(df.groupby('product', sort=False)))
+        return {p: groups[p] for p in products if p in groups}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.rollups is not None:
+            self.rollups.close()
+
+
+def _update_rollups(rollups: Optional[Rollups], rows: List[dict], before: int, after: int,
+                    start: Optional[int] = None):
+    """
+    Świece OHLC po dopisaniu; start – pozycja pustej historii (świece od zera).
+    Błąd agregatów nie może zatrzymać zapisu historii (nadrobi je sync()).
+    """
+    if rollups is None:
+        return
+    try:
+        if start is not None:
+            rollups.clear(start)
+        rollups.add_rows(rows, before, after)
+    except sqlite3.Error as e:
+        print(f"⚠️ Nie zaktualizowano agregatów OHLC ({e}) – zostaną nadrobione przy odczycie")
+
+
+def _schema(data_file: str):
+    name = os.path.basename(str(data_file))
+    if name not in SCHEMAS:
+        raise ValueError(f"Nieznany plik historii: {name}")
+    return SCHEMAS[name]
+
+
+def open_history(data_file: str, config: Optional[dict] = None, rollups: bool = True):
+    """
+    Zwraca magazyn historii dla danego pliku zgodnie z sekcją 'storage' w config.json:
+    CsvHistoryStore (domyślnie) lub SqliteHistoryStore. rollups=False – bez świec OHLC
+    (historie pomocnicze, których nie rysuje 'plot --range').
+    """
+    storage = (config or {}).get("storage", {}) or {}
+    backend = storage.get("backend", "csv")
+    rollups = rollups and storage.get("rollups", True)
+    if backend == "sqlite":
+        return SqliteHistoryStore.for_file(data_file, storage.get("sqlite_path", DEFAULT_SQLITE_PATH), rollups)
+    if backend != "csv":
+        raise ValueError(f"Nieznany backend historii: {backend}")
+    return CsvHistoryStore.for_file(data_file, rollups)
+
+
+def migrate_csv_to_sqlite(data_file: str, db_path: str = DEFAULT_SQLITE_PATH, chunk: int = 10000) -> int:
+    """
+    Jednorazowo kopiuje historię z CSV do SQLite. Jeśli tabela nie jest pusta,
+    migracja jest pomijana (żeby nie zdublować danych). Zwraca liczbę wierszy.
+    """
+    src = CsvHistoryStore.for_file(data_file, rollups=False)
+    # Świece zbudowane zostaną wektorowo przy pierwszym odczycie (sync), nie wiersz po wierszu
+    dst = SqliteHistoryStore.for_file(data_file, db_path, rollups=False)
+    if dst.count() > 0:
+        print(f"⚠️ Tabela {dst.table} w {db_path} nie jest pusta – pomijam migrację {data_file}")
+        return 0
+    total, batch = 0, []
+    for row in src.iter_rows():
+        batch.append(row)
+        if len(batch) >= chunk:
+            dst.append(batch)
+            total += len(batch)
+            batch = []
+    dst.append(batch)
+    total += len(batch)
+    dst.close()
+    return total
+
+
+def main(argv: List[str]):
+    if len(argv) >= 2 and argv[0] == 'rebuild':
+        for data_file in argv[1:]:
+            if not os.path.exists(data_file):
+                print(f"⚠️ Brak pliku: {data_file}")
+                continue
+            state = CsvHistoryStore.for_file(data_file).rebuild_state()
+            print(f"✅ Odbudowano indeks {data_file}: {len(state)} produktów")
+        return 0
+    if len(argv) >= 2 and argv[0] == 'migrate':
+        args = argv[1:]
+        db_path = DEFAULT_SQLITE_PATH
+        if '--db' in args:
+            i = args.index('--db')
+            db_path = args[i + 1]
+            del args[i:i + 2]
+        for data_file in args:
+            if not os.path.exists(data_file):
+                print(f"⚠️ Brak pliku: {data_file}")
+                continue
+            n = migrate_csv_to_sqlite(data_file, db_path)
+            print(f"✅ Przeniesiono {n} wierszy z {data_file} do {db_path}")
+        return 0
+    print("Użycie:\n"
+          "  python history_store.py rebuild <plik_historii.csv> [...]\n"
+          "  python history_store.py migrate <plik_historii.csv> [...] [--db price_history.db]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
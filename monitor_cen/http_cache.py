@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Dyskowy cache HTTP (warunkowe GET) dla stron produktów.
+
+Dla każdego URL-a pamiętamy nagłówki ETag / Last-Modified z ostatniej odpowiedzi
+oraz wynik jej parsowania (np. cena i dostępność). Przy kolejnym pobraniu
+wysyłamy If-None-Match / If-Modified-Since; odpowiedź 304 oznacza, że strona się
+nie zmieniła – zwracamy zapamiętany wynik bez pobierania treści i bez parsowania.
+
+Opcjonalna konfiguracja w config.json:
+  "fetch": {"http_cache": true}    # false wyłącza cache
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Optional
+
+
+class HttpCache:
+    """Cache warunkowych zapytań: URL → (ETag, Last-Modified, wynik parsowania)."""
+
+    def __init__(self, cache_file: str, enabled: bool = True):
+        self.cache_file = cache_file
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = self._load() if enabled else {}
+        self._dirty = False
+
+    @classmethod
+    def from_config(cls, config: dict, cache_file: str) -> "HttpCache":
+        fetch_cfg = config.get("fetch", {}) or {}
+        return cls(cache_file, enabled=fetch_cfg.get("http_cache", True))
+
+    def _load(self) -> dict:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Wpisy bez ceny (zapisane przez starsze wersje po nieudanym parsowaniu) pobieramy od nowa
+        return {url: entry for url, entry in entries.items() if not self._unpriced(entry.get('result'))}
+
+    @staticmethod
+    def _unpriced(result) -> bool:
+        return result is None or (isinstance(result, list) and (not result or result[0] is None))
+
+    def save(self):
+        """Zapisuje cache na dysk (atomowo), jeśli coś się zmieniło."""
+        if not self.enabled or not self._dirty:
+            return
+        with self._lock:
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_file)
+            self._dirty = False
+
+    def fetch(self, http, url: str, parse: Callable[[bytes], object],
+              headers: Optional[dict] = None, **kwargs):
+        """
+        Pobiera URL (http: requests lub FetchPool) i zwraca parse(response.content).
+        Przy 304 Not Modified zwraca zapamiętany wynik bez parsowania.
+        parse zwraca None, gdy nie udało się odczytać danych – taki wynik nie trafia do cache.
+        Wyjątki requests (np. HTTPError dla 4xx/5xx) przechodzą dalej.
+        """
+        headers = dict(headers or {})
+        entry = self._entries.get(url) if self.enabled else None
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = http.get(url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry:
+            with self._lock:
+                self.hits += 1
+            result = entry['result']
+            return tuple(result) if isinstance(result, list) else result
+
+        response.raise_for_status()
+        result = parse(response.content)
+        with self._lock:
+            self.misses += 1
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if self.enabled and result is not None and (etag or last_modified):
+                self._entries[url] = {'etag': etag, 'last_modified': last_modified,
+                                      'result': result}
+                self._dirty = True
+        return result
+
+    def report(self):
+        """Wypisuje liczniki od poprzedniego raportu (w trybie demona – dla jednego przebiegu)."""
+        if self.enabled:
+            print(f"🗄️ Cache HTTP: {self.hits} bez zmian (304), {self.misses} pobranych stron")
+        with self._lock:
+            self.hits = self.misses = 0
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Trwała kolejka wychodzących emaili (SQLite).
+
+Raporty nie są wysyłane od razu – trafiają do kolejki (mail_queue.db),
+a flush() wysyła wszystkie oczekujące wiadomości przez jedno połączenie
+SMTP z jednym logowaniem. Jeśli Gmail nie odpowiada albo odrzuci
+wiadomość, zostaje ona w kolejce i jest ponawiana z rosnącym odstępem
+(1 min, 2 min, 4 min, … do 6 h) – także przy następnym uruchomieniu
+monitora, więc raport nie ginie po wypisaniu błędu.
+
+Opcjonalna konfiguracja w config.json:
+  "smtp": {
+    "host": "smtp.gmail.com", "port": 465, "ssl": true, "starttls": false,
+    "queue_file": "mail_queue.db", "max_attempts": 20
+  }
+Podgląd kolejki:  python mail_queue.py [--flush]
+
+smtplib importowany jest dopiero, gdy jest co wysłać (pusty flush() go nie ładuje).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+BACKOFF_BASE = 60           # s – odstęp po pierwszej nieudanej próbie
+BACKOFF_MAX = 6 * 3600      # s – najdłuższy odstęp między próbami
+CONNECT_RETRIES = (2, 5)    # s – ponowienia połączenia w ramach jednego flush()
+
+
+def backoff(attempts: int) -> float:
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def describe(error: Exception) -> str:
+    """Czytelny opis błędu SMTP (kod i odpowiedź serwera zamiast krotki bajtów)."""
+    code, reply = getattr(error, 'smtp_code', None), getattr(error, 'smtp_error', None)
+    if code is not None and reply is not None:
+        if isinstance(reply, bytes):
+            reply = reply.decode('utf-8', errors='replace')
+        return f"{code} {reply}"
+    return str(error)
+
+
+class MailQueue:
+    """Kolejka wiadomości do wysłania: enqueue() przez producentów, flush() przez nadawcę."""
+
+    def __init__(self, path: str, sender: str, password: str, host: str = "smtp.gmail.com",
+                 port: int = 465, use_ssl: bool = True, starttls: bool = False,
+                 max_attempts: int = 20, timeout: float = 30):
+        self.path = path
+        self.sender = sender
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "MailQueue":
+        smtp_cfg = config.get("smtp", {}) or {}
+        return cls(smtp_cfg.get("queue_file", "mail_queue.db"),
+                   config["email_sender"], config["email_password"],
+                   host=smtp_cfg.get("host", "smtp.gmail.com"),
+                   port=int(smtp_cfg.get("port", 465)),
+                   use_ssl=smtp_cfg.get("ssl", True),
+                   starttls=smtp_cfg.get("starttls", False),
+                   max_attempts=int(smtp_cfg.get("max_attempts", 20)))
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " created TEXT NOT NULL,"
+                " recipients TEXT NOT NULL,"
+                " message BLOB NOT NULL,"
+                " ok_text TEXT, error_text TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt REAL NOT NULL,"
+                " last_error TEXT,"
+                " failed INTEGER NOT NULL DEFAULT 0)")
+            self._conn.commit()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- producenci ---
+
+    def enqueue(self, msg, ok_text: str = "✅ Wysłano email.", error_text: str = "emaila") -> int:
+        """Zapisuje wiadomość (email.message) w kolejce; ok_text/error_text – komunikaty przy wysyłce."""
+        from email.utils import getaddresses
+        recipients = [addr for _, addr in getaddresses(msg.get_all('To', []) + msg.get_all('Cc', []))]
+        db = self._db()
+        cur = db.execute(
+            "INSERT INTO outbox (created, recipients, message, ok_text, error_text, next_attempt) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (time.strftime("%Y-%m-%d %H:%M:%S"), json.dumps(recipients),
+             # końce linii CRLF – sendmail nie poprawia ich w wiadomości podanej jako bajty
+             msg.as_bytes(policy=msg.policy.clone(linesep='\r\n')),
+             ok_text, error_text, time.time()))
+        db.commit()
+        return cur.lastrowid
+
+    # --- nadawca ---
+
+    def pending(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM outbox WHERE failed = 0").fetchone()[0]
+
+    def _due(self, now: float) -> List[tuple]:
+        return self._db().execute(
+            "SELECT id, recipients, message, ok_text, error_text, attempts FROM outbox "
+            "WHERE failed = 0 AND next_attempt <= ? ORDER BY id", (now,)).fetchall()
+
+    def _open(self):
+        import smtplib
+        cls = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        server = cls(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            server.ehlo_or_helo_if_needed()
+            if server.has_extn('auth'):
+                server.login(self.sender, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _connect(self):
+        """Połączenie z logowaniem; błędy sieci ponawiane kilka razy, błąd logowania – od razu dalej."""
+        import smtplib
+        for delay in CONNECT_RETRIES + (None,):
+            try:
+                return self._open()
+            except smtplib.SMTPAuthenticationError:
+                raise
+            except (OSError, smtplib.SMTPException) as e:
+                if delay is None:
+                    raise
+                print(f"⚠️ Serwer SMTP nie odpowiada ({describe(e)}) – ponowna próba za {delay} s")
+                time.sleep(delay)
+
+    def _retry_later(self, row_id: int, attempts: int, error: str):
+        attempts += 1
+        failed = attempts >= self.max_attempts
+        self._db().execute(
+            "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ?, failed = ? WHERE id = ?",
+            (attempts, time.time() + backoff(attempts), error, int(failed), row_id))
+        if failed:
+            print(f"❌ Wiadomość #{row_id} porzucona po {attempts} próbach: {error}")
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """Wysyła oczekujące wiadomości przez jedno połączenie; zwraca liczbę wysłanych."""
+        rows = self._due(time.time() if now is None else now)
+        if not rows:
+            return 0
+
+        import smtplib
+        db = self._db()
+        try:
+            server = self._connect()
+        except smtplib.SMTPAuthenticationError as e:
+            print("❌ Błąd: Nieprawidłowy email lub hasło Gmail.")
+            error = describe(e)
+            server = None
+        except Exception as e:
+            error = describe(e)
+            server = None
+        if server is None:
+            for row_id, _, _, _, error_text, attempts in rows:
+                print(f"❌ Błąd wysyłania {error_text}: {error}")
+                self._retry_later(row_id, attempts, error)
+            db.commit()
+            print(f"📮 W kolejce czeka {self.pending()} wiadomości – zostaną wysłane przy kolejnej próbie.")
+            return 0
+
+        sent = 0
+        try:
+            for row_id, recipients, message, ok_text, error_text, attempts in rows:
+                try:
+                    server.sendmail(self.sender, json.loads(recipients), message)
+                except smtplib.SMTPServerDisconnected as e:
+                    # Połączenie zerwane – ta i pozostałe wiadomości czekają na kolejną próbę
+                    print(f"❌ Błąd wysyłania {error_text}: {describe(e)}")
+                    self._retry_later(row_id, attempts, describe(e))
+                    break
+                except smtplib.SMTPException as e:  # odrzucona wiadomość – kolejne wysyłamy dalej
+                    print(f"❌ Błąd wysyłania {error_text}: {describe(e)}")
+                    self._retry_later(row_id, attempts, describe(e))
+                except OSError as e:
+                    print(f"❌ Błąd wysyłania {error_text}: {describe(e)}")
+                    self._retry_later(row_id, attempts, describe(e))
+                    break
+                else:
+                    db.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+                    sent += 1
+                    print(ok_text)
+                finally:
+                    db.commit()
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+        waiting = self.pending()
+        if waiting:
+            print(f"📮 W kolejce czeka {waiting} wiadomości.")
+        return sent
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Kolejka wychodzących emaili monitora cen")
+    parser.add_argument('--flush', action='store_true', help='wyślij teraz wszystkie oczekujące (również odłożone)')
+    args = parser.parse_args(argv)
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from monitor_engine import load_config
+    queue = MailQueue.from_config(load_config())
+    rows = queue._db().execute(
+        "SELECT id, created, attempts, last_error, failed FROM outbox ORDER BY id").fetchall()
+    for row_id, created, attempts, last_error, failed in rows:
+        state = "porzucona" if failed else "czeka"
+        print(f"#{row_id} {created} – {state}, prób: {attempts}" + (f", błąd: {last_error}" if last_error else ""))
+    if not rows:
+        print("📭 Kolejka jest pusta.")
+    if args.flush:
+        queue.flush(now=float('inf'))
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
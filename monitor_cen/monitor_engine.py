@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+"""
+Wspólny silnik monitorów cen – wszystkie sklepy z rejestru shops.py
+(Tavex, fotoforma, kolejne) w jednym procesie: jeden import pandas/matplotlib,
+jedna pula HTTP dla wszystkich produktów, osobna historia i emaile per sklep.
+
+Ciężkie biblioteki ładowane są dopiero, gdy są potrzebne: matplotlib (charts.py) –
+przy wykresach do emaila ze zmianami, pandas – przy raporcie okresowym, smtplib/email –
+przy wysyłce. Przebieg „bez zmian” ich nie importuje (pomiar: benchmark.py startup).
+
+Użycie:
+  python monitor_engine.py                  # wszystkie sklepy, które mają produkty w config.json
+  python monitor_engine.py --shop foto      # tylko wybrany sklep (można podać kilka razy)
+  python monitor_engine.py --daemon         # proces stały z wewnętrznym planistą (zamiast cron)
+
+monitor_cen.py i monitor_cen_foto.py to cienkie punkty wejścia do tego silnika.
+Kopiowanie na Raspberry:
+scp *.py config.json pi@192.168.1.101:/home/pi/python_scripts/
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import requests
+
+from digest import DigestLog
+from extractors import get_extractor
+from fetch_pool import FetchPool
+from history_store import open_history
+from http_cache import HttpCache
+from mail_queue import MailQueue
+from premium import PremiumTracker
+from scheduler import (ReportState, Scheduler, monthly_slot, next_monthly_slot,
+                       next_weekly_slot, weekly_slot)
+from shops import SHOPS, shop_for_url
+
+CONFIG_FILE = "config.json"
+
+EXAMPLE_CONFIG = {
+    "email_sender": "twoj_email@gmail.com",
+    "email_password": "twoje_haslo_aplikacji",
+    "email_receivers": ["dstatnik@protonmail.com"],
+    "products_inwest": {
+        "Złoty Dukat Austriacki 3,44 g": "https://tavex.pl/zlote-monety/zloty-dukat-austriacki-3-44-g"
+    }
+}
+
+
+def load_config(path: str = CONFIG_FILE) -> dict:
+    """Wczytuje config.json; przy błędzie wypisuje komunikat i kończy program."""
+    if not os.path.exists(path):
+        print(f"❌ Błąd: Plik {path} nie istnieje!")
+        print("\nTwórz plik config.json z następującą zawartością:")
+        print(json.dumps(EXAMPLE_CONFIG, indent=2, ensure_ascii=False))
+        sys.exit(1)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except json.JSONDecodeError as e:
+        print(f"❌ Błąd w formacie JSON: {e}")
+        sys.exit(1)
+
+    if not config.get("email_sender") or not config.get("email_password"):
+        print("❌ Błąd: email_sender lub email_password nie ustawione w config.json")
+        sys.exit(1)
+    return config
+
+
+class Shop:
+    """Sklep skonfigurowany do monitorowania: adapter + produkty, odbiorcy, historia, cache HTTP."""
+
+    def __init__(self, adapter, products: Dict[str, str], receivers: List[str], history, cache: HttpCache):
+        self.adapter = adapter
+        self.name = adapter.name
+        self.products = products
+        self.receivers = receivers
+        self.history = history
+        self.cache = cache
+        self._last = None
+
+    def last_state(self) -> Dict[str, dict]:
+        """Ostatni wpis każdego produktu; w trybie demona trzymany w pamięci między przebiegami."""
+        if self._last is None:
+            self._last = self.history.last_state()
+        return self._last
+
+    def remember(self, rows: List[dict]):
+        if self._last is not None:
+            for row in rows:
+                self._last[row['product']] = row
+
+
+def build_shops(config: dict, names: Optional[List[str]] = None) -> List[Shop]:
+    """
+    Tworzy sklepy z config.json. Produkty sklepu to jego własna sekcja
+    (np. 'products_foto') oraz wpisy ze wspólnej sekcji 'products',
+    których URL należy do domeny sklepu.
+    """
+    extractor = get_extractor((config.get("fetch", {}) or {}).get("parser", "auto"))
+
+    routed: Dict[str, Dict[str, str]] = {}
+    for product, url in (config.get("products", {}) or {}).items():
+        shop_name = shop_for_url(url)
+        if shop_name is None:
+            print(f"⚠️ Nieobsługiwany sklep dla produktu '{product}': {url}")
+            continue
+        routed.setdefault(shop_name, {})[product] = url
+
+    shops = []
+    for name in (names or list(SHOPS)):
+        cls = SHOPS[name]
+        products = dict(config.get(cls.products_key, {}) or {})
+        products.update(routed.get(name, {}))
+        if not products:
+            if names:
+                print(f"❌ Błąd: Brak produktów w sekcji '{cls.products_key}' w config.json")
+                sys.exit(1)
+            continue
+
+        receivers = config.get(cls.receivers_key, config.get("email_receivers", []))
+        if not receivers:
+            print(f"❌ Błąd: Brak odbiorców email ({cls.receivers_key}) w config.json")
+            sys.exit(1)
+
+        shops.append(Shop(
+            adapter=cls(extractor),
+            products=products,
+            receivers=receivers,
+            history=open_history(cls.data_file, config),  # CSV (domyślnie) lub SQLite – sekcja 'storage'
+            cache=HttpCache.from_config(config, cls.http_cache_file),
+        ))
+
+    if not shops:
+        print("❌ Błąd: Brak produktów w config.json")
+        sys.exit(1)
+    return shops
+
+
+class MonitorEngine:
+    """Jeden przebieg monitorowania dla wielu sklepów ze wspólną pulą HTTP."""
+
+    def __init__(self, config: dict, shops: List[Shop]):
+        self.config = config
+        self.shops = shops
+        self.pool = FetchPool.from_config(config)
+        self.mail = MailQueue.from_config(config)
+        self.digest = DigestLog.from_config(config)
+        self.premium = PremiumTracker.from_config(config)
+
+    def close(self):
+        self.pool.close()
+        self.mail.close()
+        for shop in self.shops:
+            shop.history.close()
+        if self.digest is not None:
+            self.digest.close()
+        if self.premium is not None:
+            self.premium.close()
+
+    # --- pobieranie ---
+
+    def _fetch(self, task):
+        shop, name, url = task
+        adapter = shop.adapter
+        try:
+            return shop.cache.fetch(self.pool, url, adapter.parse, headers=adapter.headers, timeout=15)
+        except requests.RequestException as e:
+            print(f"    ⚠️ Błąd pobierania {name}: {e}")
+            return adapter.failed("błąd połączenia")
+        except Exception as e:
+            print(f"    ⚠️ Nieoczekiwany błąd {name}: {e}")
+            return adapter.failed("błąd parsowania")
+
+    def fetch_all(self, selected: Dict[str, Dict[str, str]]) -> Dict[str, list]:
+        """Pobiera wybrane produkty wszystkich sklepów naraz; wyniki w kolejności z config.json."""
+        tasks = [(shop, name, url) for shop in self.shops
+                 for name, url in selected.get(shop.name, {}).items()]
+        results = self.pool.map(self._fetch, tasks)
+        grouped: Dict[str, list] = {shop.name: [] for shop in self.shops}
+        for (shop, _, _), result in zip(tasks, results):
+            grouped[shop.name].append(result)
+        for shop in self.shops:
+            shop.cache.save()
+        return grouped
+
+    # --- przebieg ---
+
+    def run_once(self, now: Optional[datetime] = None, due: Optional[Dict[str, List[str]]] = None,
+                 periodic: bool = True):
+        """
+        Jeden przebieg: wszystkie produkty albo tylko 'due' ({sklep: [produkty]}, tryb demona).
+        periodic=False pomija raporty okresowe (demon wysyła je o dokładnych godzinach).
+        """
+        now = now or datetime.now()
+        selected = {}
+        for shop in self.shops:
+            names = shop.products if due is None else due.get(shop.name, [])
+            if names:
+                selected[shop.name] = {n: shop.products[n] for n in names}
+        for shop in self.shops:
+            shop.history.ensure_file()
+        results = self.fetch_all(selected)
+        for shop in self.shops:
+            if shop.name in selected:
+                self.process_shop(shop, selected[shop.name], results[shop.name], now)
+            if self.digest is not None:
+                self.send_digest(shop, now)
+            if periodic:
+                self.periodic_reports(shop, now)
+        # Wszystkie raporty z przebiegu (i zaległe z poprzednich) – jedno połączenie SMTP
+        self.mail.flush()
+
+    def process_shop(self, shop: Shop, products: Dict[str, str], results: list, now: datetime):
+        adapter = shop.adapter
+        now_str = now.strftime("%Y-%m-%d %H:%M")
+        adapter.log_start(now_str, len(products))
+        shop.cache.report()
+
+        # Ostatni wpis dla każdego produktu – bez wczytywania całej historii
+        last_state = shop.last_state()
+        new_rows, changes = [], []
+        for (name, url), result in zip(products.items(), results):
+            row, product_changes = adapter.observe(name, url, result, last_state.get(name), now_str)
+            if row is not None:
+                new_rows.append(row)
+                changes.extend(product_changes)
+
+        # Ceny spot i premia ponad kruszec (sekcja 'premium'); w trybie alertu premii – zmiany premii
+        if self.premium is not None:
+            changes = self.premium.process(adapter, new_rows, changes, last_state, now_str)
+
+        # Dopisz tylko nowe wiersze (bez nadpisywania całego pliku)
+        shop.history.append(new_rows)
+        shop.remember(new_rows)
+        adapter.log_saved()
+
+        if changes and self.digest is not None:
+            self.digest.record(shop.name, changes, now)
+            print(f"🗞️ Wykryto {len(changes)} zmian – dopisane do zestawienia.")
+        elif changes:
+            adapter.log_changes(changes)
+            self.send_report(shop, changes)
+        else:
+            adapter.log_no_changes()
+
+    def periodic_reports(self, shop: Shop, now: datetime):
+        hour = shop.adapter.report_hour
+        # Raport tygodniowy – każdy poniedziałek o godzinie raportów sklepu
+        if now.weekday() == 0 and hour <= now.hour < hour + 1:
+            print("📆 Generowanie raportu tygodniowego...")
+            self.send_summary(shop, 7)
+        # Raport miesięczny – 1. dzień miesiąca o godzinie raportów sklepu
+        if now.day == 1 and hour <= now.hour < hour + 1:
+            print("📅 Generowanie raportu miesięcznego...")
+            self.send_summary(shop, 30)
+
+    # --- emaile ---
+
+    def _message(self, shop: Shop, subject: str, body: str):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['From'] = self.config["email_sender"]
+        msg['To'] = ", ".join(shop.receivers)
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        return msg
+
+    def send_email(self, msg, ok_text: str, error_text: str):
+        """Odkłada wiadomość do trwałej kolejki; wysyła ją mail.flush() na końcu przebiegu."""
+        self.mail.enqueue(msg, ok_text, error_text)
+
+    def send_report(self, shop: Shop, changes: List[dict], heading: Optional[tuple] = None):
+        """
+        Wysyła jeden email z raportem dla wszystkich zmienionych produktów sklepu;
+        heading = (przedrostek tematu, wstęp treści) – dla zestawień.
+        """
+        from email.mime.image import MIMEImage
+
+        subject, body = shop.adapter.report(changes)
+        if heading is not None:
+            subject, body = heading[0] + subject, heading[1] + body
+        msg = self._message(shop, subject, body)
+        charts = []
+        try:
+            from chart_cache import ChartCache
+            from charts import render_charts
+            combined = (self.config.get("charts", {}) or {}).get("combined", False)
+            charts = render_charts(shop.history, shop.adapter,
+                                   shop.adapter.chart_products(changes), combined,
+                                   cache=ChartCache.from_config(self.config, email=True))
+        except Exception as e:
+            print(f"⚠️ Błąd tworzenia wykresów (email bez wykresów): {e}")
+        # PNG prosto z pamięci do wiadomości – bez plików tymczasowych
+        for filename, png in charts:
+            img = MIMEImage(png, _subtype='png')
+            img.add_header('Content-Disposition', 'attachment', filename=filename)
+            msg.attach(img)
+        self.send_email(msg, "✅ Wysłano raport zbiorczy.", "emaila")
+
+    def send_digest(self, shop: Shop, now: datetime):
+        """Po upływie okna: jeden email ze zmianami netto z dziennika zdarzeń sklepu."""
+        events = self.digest.pending(shop.name)
+        if not self.digest.due(events, now):
+            return
+        net = self.digest.net_changes(shop.adapter, events)
+        start, end = events[0][2], events[-1][2]
+        runs = len({ts for _, _, ts, _ in events})
+        if net:
+            print(f"🗞️ Zestawienie: {len(events)} zmian z {runs} przebiegów → {len(net)} zmian netto.")
+            heading = (f"🗞️ Zestawienie {start:%d.%m %H:%M}–{end:%H:%M} | ",
+                       f"Zmiany netto z {runs} przebiegów ({start:%Y-%m-%d %H:%M} – {end:%Y-%m-%d %H:%M}).\n\n")
+            self.send_report(shop, net, heading)
+        else:
+            print(f"🗞️ {len(events)} zmian z {runs} przebiegów zniosło się lub jest poniżej progów – bez emaila.")
+        self.digest.mark_sent([event_id for event_id, _, _, _ in events])
+
+    def send_summary(self, shop: Shop, days: int):
+        """Wysyła podsumowanie zmian cen z ostatnich 'days' dni (7 – tygodniowe, 30 – miesięczne)."""
+        if not shop.history.exists():
+            print("⚠️ Brak pliku z historią cen.")
+            return
+
+        start = datetime.now() - timedelta(days=days)
+        try:
+            recent = shop.history.load_range(start=start)  # Tylko wpisy z okresu raportu
+        except Exception as e:
+            print(f"❌ Błąd czytania historii cen: {e}")
+            return
+
+        if recent.empty:
+            print(f"⚠️ Brak danych z ostatnich {days} dni - raport nie zostanie wysłany.")
+            return
+
+        from price_summary import summarize
+
+        # Wszystkie produkty w jednym przejściu
+        summary = summarize(recent, shop.adapter.summary_column, shop.adapter.summary_last_cols)
+        if self.premium is not None:
+            summary = self.premium.join_summary(summary, start)
+        subject, body = shop.adapter.summary_report(days, summary)
+        if days == 7:
+            self.send_email(self._message(shop, subject, body),
+                            "📆 Wysłano raport tygodniowy.", "raportu tygodniowego")
+        else:
+            self.send_email(self._message(shop, subject, body),
+                            "📅 Wysłano raport miesięczny.", "raportu miesięcznego")
+
+
+REPORT_KINDS = {
+    'weekly':  (7, weekly_slot, next_weekly_slot),
+    'monthly': (30, monthly_slot, next_monthly_slot),
+}
+
+
+class MonitorDaemon:
+    """
+    Tryb demona: config, sesje HTTP i ostatni stan produktów zostają w pamięci,
+    każdy produkt ma własny interwał sprawdzania, a raporty okresowe idą
+    o dokładnych godzinach (zaległe – od razu po starcie).
+
+    Opcjonalna konfiguracja w config.json (minuty):
+      "daemon": {
+        "interval_minutes": 30,
+        "shop_interval_minutes": {"foto": 1440},
+        "product_interval_minutes": {"Złoty Dukat Austriacki 3,44 g": 10}
+      }
+    Zmiana config.json jest wczytywana bez restartu.
+    """
+
+    MAX_SLEEP = 60  # co tyle sekund sprawdzamy zmiany config.json i zegar
+
+    def __init__(self, names: Optional[List[str]] = None, config_file: str = CONFIG_FILE,
+                 state_file: str = "daemon_state.json"):
+        self.names = names
+        self.config_file = config_file
+        self.reports = ReportState(state_file)
+        self.scheduler = Scheduler()
+        self.engine: Optional[MonitorEngine] = None
+        self.config_mtime = None
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        self._stop.set()
+
+    # --- konfiguracja ---
+
+    def load(self):
+        config = load_config(self.config_file)
+        shops = build_shops(config, self.names)
+        if self.engine is not None:
+            self.engine.close()
+        self.engine = MonitorEngine(config, shops)
+        self.config_mtime = os.path.getmtime(self.config_file)
+        self.schedule(datetime.now())
+
+    def reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.config_file)
+        except OSError:
+            return
+        if mtime == self.config_mtime:
+            return
+        try:
+            self.load()
+            print(f"🔄 Wczytano ponownie {self.config_file}")
+        except SystemExit:
+            self.config_mtime = mtime
+            print(f"⚠️ Błędny {self.config_file} – zostaję przy poprzedniej konfiguracji.")
+
+    def interval(self, shop: Shop, product: str) -> timedelta:
+        cfg = self.engine.config.get("daemon", {}) or {}
+        # null w ręcznie edytowanym config.json (przeładowanym w trakcie pracy) = brak ustawienia
+        minutes = ((cfg.get("product_interval_minutes") or {}).get(product)
+                   or (cfg.get("shop_interval_minutes") or {}).get(shop.name)
+                   or cfg.get("interval_minutes")
+                   or 30)
+        return timedelta(minutes=float(minutes))
+
+    def schedule(self, now: datetime):
+        """Wszystkie produkty do sprawdzenia od razu, raporty – zaległe teraz, pozostałe o ich godzinie."""
+        self.scheduler.clear()
+        for shop in self.engine.shops:
+            for product in shop.products:
+                self.scheduler.add(now, ('poll', shop.name, product))
+            for kind, (_, last_slot, next_slot) in REPORT_KINDS.items():
+                slot = last_slot(now, shop.adapter.report_hour)
+                sent = self.reports.get(shop.name, kind)
+                if sent is None:
+                    # Pierwsze uruchomienie: bieżący termin mógł już obsłużyć cron
+                    self.reports.set(shop.name, kind, slot)
+                    sent = slot
+                self.scheduler.add(slot if sent < slot else next_slot(slot), ('report', shop.name, kind))
+
+    # --- pętla ---
+
+    def run_due(self, now: datetime):
+        shops = {shop.name: shop for shop in self.engine.shops}
+        due_polls: Dict[str, List[str]] = {}
+        due_reports = []
+        for job in self.scheduler.pop_due(now):
+            kind, shop_name, item = job
+            if shop_name not in shops:
+                continue
+            if kind == 'poll':
+                due_polls.setdefault(shop_name, []).append(item)
+            else:
+                due_reports.append((shops[shop_name], item))
+
+        if due_polls:
+            try:
+                self.engine.run_once(now, due=due_polls, periodic=False)
+            except Exception as e:
+                print(f"❌ Błąd przebiegu monitora: {e}")
+            done = datetime.now()
+            for shop_name, products in due_polls.items():
+                for product in products:
+                    self.scheduler.add(done + self.interval(shops[shop_name], product),
+                                       ('poll', shop_name, product))
+
+        for shop, kind in due_reports:
+            days, last_slot, next_slot = REPORT_KINDS[kind]
+            slot = last_slot(now, shop.adapter.report_hour)
+            print("📆 Generowanie raportu tygodniowego..." if kind == 'weekly'
+                  else "📅 Generowanie raportu miesięcznego...")
+            try:
+                self.engine.send_summary(shop, days)
+            except Exception as e:
+                print(f"❌ Błąd raportu okresowego: {e}")
+            self.reports.set(shop.name, kind, slot)
+            self.scheduler.add(next_slot(slot), ('report', shop.name, kind))
+
+        # Raporty okresowe i wiadomości czekające na ponowienie (backoff)
+        try:
+            self.engine.mail.flush()
+        except Exception as e:
+            print(f"❌ Błąd kolejki emaili: {e}")
+
+    def run(self):
+        self.load()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.stop)
+        print(f"🕰️ Tryb demona: {', '.join(s.name for s in self.engine.shops)} "
+              f"({sum(len(s.products) for s in self.engine.shops)} produktów)")
+        try:
+            while not self._stop.is_set():
+                self.run_due(datetime.now())
+                next_time = self.scheduler.next_time()
+                wait = self.MAX_SLEEP if next_time is None else (next_time - datetime.now()).total_seconds()
+                self._stop.wait(min(max(wait, 0), self.MAX_SLEEP))
+                self.reload_if_changed()
+        finally:
+            self.engine.close()
+            print("👋 Zatrzymano demona monitora cen.")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Monitor cen – wszystkie sklepy w jednym procesie")
+    parser.add_argument('--shop', action='append', choices=sorted(SHOPS),
+                        help='monitoruj tylko wybrany sklep (można podać kilka razy)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='działaj stale z wewnętrznym planistą (interwały z sekcji "daemon")')
+    args = parser.parse_args(argv)
+
+    # --- USTALENIE ŚCIEŻEK ---
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.daemon:
+        MonitorDaemon(args.shop).run()
+        return
+
+    config = load_config()
+    shops = build_shops(config, args.shop)
+    engine = MonitorEngine(config, shops)
+    try:
+        engine.run_once()
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Premia dealera ponad wartość kruszcu (premium over melt) dla produktów z masą metalu.
+
+Gdy w config.json jest sekcja "premium", każdy przebieg monitora zapisuje też:
+  price_history_spot.csv     – ceny spot (USD/oz, kurs USD/PLN, PLN/g), jeden wiersz na metal,
+  price_history_premium.csv  – wartość kruszcu i premię każdego produktu z masą w konfiguracji.
+Wartość kruszcu = cena spot PLN/g × masa × próba; premia = cena sprzedaży − wartość
+kruszcu (w PLN i w % wartości kruszcu). Obie historie leżą w tym samym magazynie
+co historia cen (CSV albo SQLite – sekcja "storage").
+
+Ceny spot pochodzą ze spot_prices.py (cache z TTL), więc demon sprawdzający
+produkty co kilka minut nie odpytuje Yahoo przy każdym przebiegu.
+
+Przeliczenie premii dla całej historii (np. po poprawieniu masy produktu) korzysta
+z zapisanych cen spot – wektorowo (pandas.merge_asof), bez ponownego pobierania:
+  python cli_price_tool.py premium --rebuild
+
+Konfiguracja:
+  "premium": {
+    "products": {
+      "Złoty Dukat Austriacki 3,44 g": {"metal": "gold", "weight_g": 3.44, "purity": 0.986}
+    },
+    "alert": "premium",         # "price" (domyślnie) – alert po zmianie ceny; "premium" – po zmianie premii
+    "min_change_pct": 0.5,      # próg zmiany premii (punkty procentowe) dla "alert": "premium"
+    "max_spot_age_hours": 72    # przy przeliczaniu: najstarsza cena spot dopasowana do wpisu
+  }
+"""
+
+from typing import Dict, List, Optional
+
+from history_store import open_history
+from spot_prices import FX_USD_PLN, METALS, SpotPrices, melt_value, usd_oz_to_pln_gram
+
+SPOT_FILE = "price_history_spot.csv"
+PREMIUM_FILE = "price_history_premium.csv"
+
+
+class PremiumTracker:
+    """Zapis cen spot i premii przy przebiegu monitora oraz przeliczanie całej historii."""
+
+    def __init__(self, products: Dict[str, dict], spot: SpotPrices, spot_store, premium_store,
+                 alert: str = "price", min_change_pct: float = 0.5, max_spot_age_hours: float = 72):
+        self.products = products
+        self.spot = spot
+        self.spot_store = spot_store
+        self.premium_store = premium_store
+        self.alert = alert
+        self.min_change_pct = float(min_change_pct)
+        self.max_spot_age_hours = float(max_spot_age_hours)
+        self._spot_date = None
+        self._spot: Dict[str, dict] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["PremiumTracker"]:
+        """None, gdy w config.json nie ma produktów z masą kruszcu."""
+        cfg = config.get("premium", {}) or {}
+        products = {}
+        for name, spec in (cfg.get("products", {}) or {}).items():
+            if spec.get("metal") not in METALS or not spec.get("weight_g"):
+                print(f"⚠️ Premia: pomijam '{name}' – wymagane 'metal' ({', '.join(METALS)}) i 'weight_g'")
+                continue
+            products[name] = spec
+        if not products:
+            return None
+        alert = cfg.get("alert", "price")
+        if alert not in ("price", "premium"):
+            print(f"⚠️ Premia: nieznany tryb alertu '{alert}' – używam 'price'")
+            alert = "price"
+        return cls(products, SpotPrices.from_config(config),
+                   # świece OHLC rysuje tylko 'plot --range' dla historii sklepów – tu zbędne
+                   open_history(SPOT_FILE, config, rollups=False),
+                   open_history(PREMIUM_FILE, config, rollups=False),
+                   alert, cfg.get("min_change_pct", 0.5), cfg.get("max_spot_age_hours", 72))
+
+    def close(self):
+        for store in (self.spot_store, self.premium_store):
+            store.close()
+
+    def _fine_grams(self, spec: dict) -> float:
+        return float(spec['weight_g']) * float(spec.get('purity', 1.0))
+
+    # --- przebieg monitora ---
+
+    def spot_for(self, now_str: str) -> Dict[str, dict]:
+        """Ceny spot metali z konfiguracji, zapisane raz na przebieg (wiersze historii spot)."""
+        if self._spot_date == now_str:
+            return self._spot
+        metals = sorted({spec['metal'] for spec in self.products.values()})
+        quotes = self.spot.quotes([METALS[m] for m in metals] + [FX_USD_PLN])
+        fx = quotes.get(FX_USD_PLN)
+        rows = {}
+        if fx is not None:
+            for metal in metals:
+                q = quotes.get(METALS[metal])
+                if q is None:
+                    continue
+                rows[metal] = {'date': now_str, 'product': metal, 'usd_oz': q['close'],
+                               'usd_pln': fx['close'],
+                               'pln_gram': round(usd_oz_to_pln_gram(q['close'], fx['close']), 4)}
+        self.spot_store.append(list(rows.values()))
+        self._spot_date, self._spot = now_str, rows
+        return rows
+
+    def process(self, adapter, rows: List[dict], changes: List[dict], last_state: Dict[str, dict],
+                now_str: str) -> List[dict]:
+        """
+        Zapisuje premię nowych wierszy historii i zwraca zmiany do raportu: z polami
+        melt/premium/premium_pct/premium_old, a w trybie "alert": "premium" –
+        tylko te, w których premia zmieniła się o co najmniej min_change_pct.
+        """
+        price_col = adapter.summary_column
+        priced = [r for r in rows if r['product'] in self.products and r.get(price_col) is not None]
+        if not priced:
+            return changes
+        spot = self.spot_for(now_str)
+        if not spot:
+            print("⚠️ Brak cen spot – premia nie zostanie zapisana w tym przebiegu.")
+            return changes
+
+        previous = self.premium_store.last_state()
+        premium: Dict[str, dict] = {}
+        for row in priced:
+            spec = self.products[row['product']]
+            if spec['metal'] not in spot:
+                continue
+            melt = melt_value(spot[spec['metal']]['pln_gram'], self._fine_grams(spec))
+            diff = row[price_col] - melt
+            premium[row['product']] = {
+                'date': now_str, 'product': row['product'], 'metal': spec['metal'],
+                'melt_pln': round(melt, 2), 'premium_pln': round(diff, 2),
+                'premium_pct': round(diff / melt * 100, 2),
+            }
+        self.premium_store.append(list(premium.values()))
+
+        by_name: Dict[str, List[dict]] = {}
+        for c in changes:
+            by_name.setdefault(c['name'], []).append(c)
+        out = []
+        for row in rows:
+            name = row['product']
+            own = by_name.get(name, [])
+            p = premium.get(name)
+            if p is None:
+                out.extend(own)
+                continue
+            old = (previous.get(name) or {}).get('premium_pct')
+            extra = {'melt': p['melt_pln'], 'premium': p['premium_pln'],
+                     'premium_pct': p['premium_pct'], 'premium_old': old}
+            if self.alert == "premium":
+                if old is None or abs(p['premium_pct'] - old) < self.min_change_pct:
+                    continue
+                own = own or [adapter.change_for(row, last_state.get(name))]
+                extra['premium_alert'] = True
+            out.extend(dict(c, **extra) for c in own)
+        return out
+
+    # --- raporty i przeliczanie historii ---
+
+    def join_summary(self, summary, start):
+        """Dokleja do podsumowania okresowego premię na początku i końcu okresu (premium_first/_last)."""
+        from price_summary import summarize
+        recent = self.premium_store.load_range(start=start)
+        if recent.empty:
+            return summary
+        prem = summarize(recent, 'premium_pct', min_count=1)[['first', 'last']]
+        return summary.join(prem.rename(columns={'first': 'premium_first', 'last': 'premium_last'}))
+
+    def compute(self, prices, spot, price_col: str = 'sell_price'):
+        """
+        Premia dla wszystkich wierszy historii cen naraz: każdy wpis dostaje ostatnią
+        cenę spot swojego metalu sprzed wpisu (nie starszą niż max_spot_age_hours).
+        """
+        import pandas as pd
+        spec = pd.DataFrame.from_dict(self.products, orient='index')
+        purity = spec['purity'].fillna(1.0) if 'purity' in spec else 1.0
+        fine = spec['weight_g'].astype(float) * purity
+
+        data = prices.loc[prices['product'].isin(spec.index), ['date', 'product', price_col]].copy()
+        data['date'] = pd.to_datetime(data['date'])
+        data['metal'] = data['product'].map(spec['metal'])
+        quotes = spot[['date', 'product', 'pln_gram']].rename(columns={'product': 'metal'})
+        quotes['date'] = pd.to_datetime(quotes['date'])
+        merged = pd.merge_asof(data.sort_values('date', kind='stable'), quotes.sort_values('date', kind='stable'),
+                               on='date', by='metal', direction='backward',
+                               tolerance=pd.Timedelta(hours=self.max_spot_age_hours))
+        merged = merged.dropna(subset=['pln_gram', price_col])
+
+        melt = melt_value(merged['pln_gram'], merged['product'].map(fine))
+        diff = merged[price_col] - melt
+        return pd.DataFrame({
+            'date': merged['date'].dt.strftime("%Y-%m-%d %H:%M"), 'product': merged['product'],
+            'metal': merged['metal'], 'melt_pln': melt.round(2), 'premium_pln': diff.round(2),
+            'premium_pct': (diff / melt * 100).round(2),
+        })
+
+    def rebuild(self, price_store, price_col: str = 'sell_price', chunk: int = 10000) -> int:
+        """Przelicza historię premii od nowa z zapisanych cen spot; zwraca liczbę wierszy."""
+        if not self.spot_store.exists():
+            return 0
+        frame = self.compute(price_store.load_range(), self.spot_store.load_range(), price_col)
+        self.premium_store.clear()
+        rows = frame.to_dict('records')
+        for i in range(0, len(rows), chunk):
+            self.premium_store.append(rows[i:i + chunk])
+        return len(rows)
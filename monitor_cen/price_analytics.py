@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Analizy historii cen dla 'cli_price_tool.py analyze' – wszystkie produkty naraz,
+wektorowo (pandas/NumPy, bez pętli po produktach):
+  - średnia krocząca ceny i zmienność (odchylenie standardowe zmian procentowych)
+    z ostatnich N wpisów,
+  - percentyl bieżącego spreadu na tle całej historii produktu,
+  - proste wykrywanie punktów zmiany poziomu ceny: średnia z N wpisów po danym
+    punkcie vs N wpisów przed nim (statystyka z, lokalne maksimum).
+
+Wyniki liczone są przyrostowo. Obok historii leży plik cache
+(np. price_history_spread.analytics.pkl) z pozycją w historii, ostatnimi 4N
+wpisami każdego produktu, licznościami wartości spreadu i znalezionymi dotąd
+punktami zmiany – kolejne uruchomienie przetwarza tylko dopisane wiersze.
+Punkt zmiany jest oceniany dopiero, gdy znane są wszystkie wpisy potrzebne do
+sprawdzenia lokalnego maksimum, więc wynik nie zależy od podziału na przebiegi.
+"""
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Zwiększ po zmianie sposobu liczenia – stary cache zostanie przeliczony od nowa
+ANALYTICS_VERSION = 2
+
+REPORT_COLUMNS = ['date', 'last', 'mean', 'volatility', 'spread', 'spread_pct',
+                  'change_date', 'change_from', 'change_to', 'change_pct']
+CHANGE_COLUMNS = ['product', 'date', 'before', 'after', 'pct', 'z']
+
+
+class PriceAnalytics:
+    """Przyrostowe statystyki jednego magazynu historii (CsvHistoryStore / SqliteHistoryStore)."""
+
+    def __init__(self, store, cache_file: str, window: int = 96, threshold: float = 4.0,
+                 value_col: str = 'sell_price', spread_col: str = 'spread_pln'):
+        self.store = store
+        self.cache_file = cache_file
+        self.window = int(window)
+        self.threshold = float(threshold)
+        self.value_col = value_col
+        self.spread_col = spread_col
+        self.params = {'version': ANALYTICS_VERSION, 'backend': type(store).__name__,
+                       'window': self.window, 'threshold': self.threshold,
+                       'value_col': value_col, 'spread_col': spread_col}
+
+    # --- cache ---
+
+    def _empty_state(self) -> dict:
+        return {
+            'params': self.params,
+            'position': 0,
+            'seq': 0,  # numer kolejny wiersza w całej historii
+            'tail': pd.DataFrame(columns=['product', 'date', self.value_col, self.spread_col, 'seq']),
+            'spread_counts': pd.Series(dtype='float64'),
+            'cp_seen': {},  # produkt -> seq ostatniego punktu ocenionego ostatecznie
+            'change_points': pd.DataFrame(columns=CHANGE_COLUMNS),
+            'latest': pd.DataFrame(),
+        }
+
+    def _load_cache(self) -> Optional[dict]:
+        try:
+            state = pd.read_pickle(self.cache_file)
+        except Exception:
+            return None
+        if not isinstance(state, dict) or state.get('params') != self.params:
+            return None
+        if state['position'] > self.store.end_position():
+            return None  # historia się skurczyła (ręczna edycja) – liczymy od nowa
+        return state
+
+    def _save_cache(self, state: dict):
+        tmp = self.cache_file + ".tmp"
+        pd.to_pickle(state, tmp)
+        os.replace(tmp, self.cache_file)
+
+    # --- obliczenia ---
+
+    def update(self, rebuild: bool = False) -> dict:
+        """Doczytuje nowe wiersze i aktualizuje statystyki; zwraca stan (zapisany w cache)."""
+        state = None if rebuild else self._load_cache()
+        if state is None:
+            state = self._empty_state()
+        new, position = self.store.load_appended(state['position'])
+        if new.empty and not state['latest'].empty:
+            return state
+
+        new = new[['product', 'date', self.value_col, self.spread_col]].copy()
+        new['product'] = new['product'].astype(object)
+        new['seq'] = np.arange(state['seq'], state['seq'] + len(new))
+
+        counts = new.groupby(['product', self.spread_col]).size().astype('float64')
+        if state['spread_counts'].empty:
+            state['spread_counts'] = counts
+        else:
+            state['spread_counts'] = state['spread_counts'].add(counts, fill_value=0)
+
+        data = pd.concat([state['tail'], new], ignore_index=True)
+        data['seq'] = data['seq'].astype('int64')
+        data[self.value_col] = data[self.value_col].astype('float64')
+        data[self.spread_col] = data[self.spread_col].astype('float64')
+        # Wiersze każdego produktu obok siebie, w kolejności historii
+        data = data.sort_values(['product', 'seq'], kind='stable', ignore_index=True)
+
+        found = self._change_points(data, state['cp_seen'])
+        if not found.empty:
+            state['change_points'] = pd.concat([state['change_points'], found], ignore_index=True)
+        state['latest'] = self._latest(data, state['spread_counts'])
+        # Punkt jeszcze nieoceniony potrzebuje 2N wpisów przed sobą i 2N po sobie
+        state['tail'] = data.groupby('product', sort=False).tail(4 * self.window)
+        state['position'] = position
+        state['seq'] += len(new)
+        self._save_cache(state)
+        return state
+
+    def _change_points(self, data: pd.DataFrame, seen: Dict[str, int]) -> pd.DataFrame:
+        """
+        Punkt t jest punktem zmiany, gdy średnia z N wpisów po t różni się od średniej
+        z N wpisów do t o co najmniej 'threshold' błędów standardowych i jest to
+        lokalne maksimum |z| w oknie ±N wpisów. Punkt oceniany jest ostatecznie dopiero,
+        gdy z jest znane dla całego tego okna (N wpisów po nim – czyli 2N wierszy
+        historii) – wcześniej ocena mogłaby się zmienić po dopisaniu kolejnych wierszy.
+        Aktualizuje 'seen' (punkty ocenione ostatecznie); pozostałe czekają w 'tail'.
+        """
+        w = self.window
+        product = data['product']
+        values = data.groupby(product, sort=False)[self.value_col]
+        before = values.rolling(w).mean().reset_index(level=0, drop=True)
+        before_std = values.rolling(w).std(ddof=0).reset_index(level=0, drop=True)
+        after = before.groupby(product, sort=False).shift(-w)
+        after_std = before_std.groupby(product, sort=False).shift(-w)
+        # Dolne ograniczenie błędu (0,1% ceny) – stała cena nie daje z = ∞ przy pierwszej zmianie
+        se = np.maximum(np.sqrt((before_std ** 2 + after_std ** 2) / w), 0.001 * before.abs())
+        z = (after - before) / se
+        abs_z = z.abs()
+        local_max = abs_z.groupby(product, sort=False).rolling(2 * w + 1, center=True, min_periods=1) \
+                         .max().reset_index(level=0, drop=True)
+        position = data.groupby(product, sort=False).cumcount()
+        last_evaluated = position.where(z.notna()).groupby(product, sort=False).transform('max')
+        final = position <= last_evaluated - w
+        last_seen = product.map(seen).fillna(-1)
+        hit = (abs_z >= self.threshold) & (abs_z == local_max) & final & (data['seq'] > last_seen)
+
+        done = data.loc[final, ['product', 'seq']]
+        if not done.empty:
+            seen.update(done.groupby('product', sort=False)['seq'].max().to_dict())
+
+        next_date = data.groupby(product, sort=False)['date'].shift(-1)
+        found = pd.DataFrame({
+            'product': product[hit], 'date': next_date[hit],
+            'before': before[hit].round(2), 'after': after[hit].round(2),
+            'pct': ((after[hit] - before[hit]) / before[hit] * 100).round(2), 'z': z[hit].round(1),
+        })
+        # Kolejność chronologiczna (jak przy przyrostowym liczeniu), nie po produktach
+        order = np.argsort(data['seq'][hit].to_numpy(), kind='stable')
+        return found[CHANGE_COLUMNS].iloc[order].reset_index(drop=True)
+
+    def _latest(self, data: pd.DataFrame, spread_counts: pd.Series) -> pd.DataFrame:
+        """Ostatni wpis produktu ze średnią, zmiennością i percentylem spreadu."""
+        w = self.window
+        product = data['product']
+        values = data.groupby(product, sort=False)[self.value_col]
+        returns = values.pct_change() * 100
+        data = data.assign(
+            mean=values.rolling(w, min_periods=1).mean().reset_index(level=0, drop=True),
+            volatility=returns.groupby(product, sort=False).rolling(w, min_periods=2).std()
+                              .reset_index(level=0, drop=True),
+        )
+        latest = data.groupby('product', sort=False).tail(1).set_index('product')
+
+        # Percentyl = odsetek historii produktu ze spreadem <= bieżący
+        counts = spread_counts.rename('count').reset_index()
+        counts.columns = ['product', 'spread', 'count']
+        current = counts['product'].map(latest[self.spread_col])
+        below = counts['count'].where(counts['spread'] <= current, 0)
+        pct = below.groupby(counts['product']).sum() / counts.groupby('product')['count'].sum() * 100
+
+        return pd.DataFrame({
+            'date': latest['date'], 'last': latest[self.value_col],
+            'mean': latest['mean'].round(2), 'volatility': latest['volatility'].round(3),
+            'spread': latest[self.spread_col], 'spread_pct': pct.reindex(latest.index).round(1),
+        })
+
+    def report(self, state: dict) -> pd.DataFrame:
+        """Tabela per produkt (alfabetycznie) z ostatnim punktem zmiany."""
+        latest = state['latest']
+        if latest.empty:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+        out = latest.copy()
+        last_cp = state['change_points'].groupby('product').tail(1).set_index('product')
+        out['change_date'] = last_cp['date'].reindex(out.index)
+        out['change_from'] = last_cp['before'].reindex(out.index)
+        out['change_to'] = last_cp['after'].reindex(out.index)
+        out['change_pct'] = last_cp['pct'].reindex(out.index)
+        return out[REPORT_COLUMNS].sort_index()
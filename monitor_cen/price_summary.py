@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Podsumowania zmian cen w dowolnym oknie czasu (7 dni, 30 dni, dowolne).
+
+Jedno przejście groupby po wszystkich produktach naraz: pierwsza/ostatnia
+cena, min, max, liczba wpisów, zmiana w PLN i w procentach. Z tego korzystają
+raporty tygodniowe i miesięczne obu monitorów oraz 'cli_price_tool.py summary'.
+"""
+
+from typing import Iterable
+
+import pandas as pd
+
+SUMMARY_COLUMNS = ['first', 'last', 'min', 'max', 'count', 'diff', 'pct']
+
+
+def summarize(df: pd.DataFrame, value_col: str, last_cols: Iterable[str] = (),
+              min_count: int = 2) -> pd.DataFrame:
+    """
+    Zwraca DataFrame indeksowany nazwą produktu z kolumnami:
+    first, last, min, max, count, diff, pct oraz ostatnimi wartościami last_cols
+    (np. 'availability'). Produkty z mniej niż min_count wpisami są pomijane.
+    Kolejność produktów – wg pierwszego wystąpienia w df.
+    """
+    last_cols = list(last_cols)
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS + last_cols)
+
+    # Stabilne sortowanie po dacie – kolejność wpisów z tą samą datą bez zmian
+    data = df.sort_values('date', kind='stable')
+    grouped = data.groupby('product', sort=False, observed=True)
+    out = grouped[value_col].agg(['first', 'last', 'min', 'max', 'count'])
+    if last_cols:
+        out = out.join(grouped[last_cols].last())
+
+    out = out[out['count'] >= min_count]
+    out['diff'] = (out['last'] - out['first']).round(2)
+    out['pct'] = (out['diff'] / out['first'] * 100).round(2)
+
+    # Kolejność jak w danych wejściowych (pierwsze wystąpienie produktu)
+    order = pd.unique(df['product'].astype(object))
+    out = out.reindex([p for p in order if p in out.index])
+    return out[SUMMARY_COLUMNS + last_cols]
+
+
+def trend_emoji(diff: float, flat: str = "📉") -> str:
+    """📈 dla wzrostu, 📉 dla spadku; flat – znak dla braku zmiany."""
+    if diff > 0:
+        return "📈"
+    if diff < 0:
+        return "📉"
+    return flat
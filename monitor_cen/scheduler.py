@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Prosty planista zadań dla trybu demona (monitor_engine.py --daemon).
+
+- Scheduler: kolejka zadań uporządkowana po czasie (heapq); zadania o tym
+  samym terminie zdejmowane są razem, więc produkty z kilku sklepów
+  pobierane są w jednym przebiegu puli HTTP.
+- weekly_slot / monthly_slot: dokładne terminy raportów okresowych
+  (poniedziałek / 1. dzień miesiąca o godzinie raportów sklepu).
+- ReportState: zapamiętany ostatnio wysłany termin każdego raportu
+  (daemon_state.json) – po restarcie lub uśpieniu Raspberry zaległy raport
+  wysyłany jest od razu (catch-up), ale tylko raz.
+"""
+
+import heapq
+import itertools
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Hashable, List, Optional
+
+SLOT_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class Scheduler:
+    """Zadania (dowolne klucze) z terminami wykonania."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, when: datetime, key: Hashable):
+        heapq.heappush(self._heap, (when, next(self._seq), key))
+
+    def next_time(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Hashable]:
+        """Zdejmuje wszystkie zadania z terminem <= now (w kolejności terminów)."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def clear(self):
+        self._heap = []
+
+
+def weekly_slot(now: datetime, hour: int) -> datetime:
+    """Ostatni termin raportu tygodniowego (poniedziałek, hour:00) nie późniejszy niż now."""
+    slot = now.replace(hour=hour, minute=0, second=0, microsecond=0) - timedelta(days=now.weekday())
+    if slot > now:
+        slot -= timedelta(days=7)
+    return slot
+
+
+def next_weekly_slot(slot: datetime) -> datetime:
+    return slot + timedelta(days=7)
+
+
+def monthly_slot(now: datetime, hour: int) -> datetime:
+    """Ostatni termin raportu miesięcznego (1. dzień miesiąca, hour:00) nie późniejszy niż now."""
+    slot = now.replace(day=1, hour=hour, minute=0, second=0, microsecond=0)
+    if slot > now:
+        slot = (slot - timedelta(days=1)).replace(day=1)
+    return slot
+
+
+def next_monthly_slot(slot: datetime) -> datetime:
+    return (slot + timedelta(days=32)).replace(day=1)
+
+
+class ReportState:
+    """Ostatnio wysłane terminy raportów: {sklep: {'weekly': 'YYYY-mm-dd HH:MM', ...}}."""
+
+    def __init__(self, path: str = "daemon_state.json"):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def get(self, shop: str, kind: str) -> Optional[datetime]:
+        value = self._state.get(shop, {}).get(kind)
+        return datetime.strptime(value, SLOT_FORMAT) if value else None
+
+    def set(self, shop: str, kind: str, slot: datetime):
+        self._state.setdefault(shop, {})[kind] = slot.strftime(SLOT_FORMAT)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
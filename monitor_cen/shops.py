@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+"""
+Rejestr sklepów (adapterów) dla wspólnego silnika monitora cen.
+
+Adapter opisuje wszystko, czym różnią się sklepy: domeny, klucze w config.json,
+plik historii, pola wyciągane ze strony, wykrywanie zmian, treść emaili,
+wykresy i godzinę raportów okresowych. Silnik (monitor_engine.py) jest wspólny.
+
+Nowy sklep = nowa klasa z dekoratorem @register, np.:
+
+    @register
+    class NowySklep(ShopAdapter):
+        name = "nowy"
+        domains = ("nowysklep.pl",)
+        ...
+        # + wszystkie metody @abstractmethod z ShopAdapter (parse, observe, report, …)
+
+Produkty przypisuje się do sklepu przez jego klucz w config.json
+(np. 'products_inwest') albo we wspólnej sekcji 'products' – wtedy sklep
+wybierany jest po domenie URL-a.
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from extractors import Field
+
+SHOPS: Dict[str, type] = {}
+
+
+def register(cls):
+    """Dekorator rejestrujący adapter sklepu pod jego nazwą."""
+    SHOPS[cls.name] = cls
+    return cls
+
+
+def shop_for_url(url: str) -> Optional[str]:
+    """Zwraca nazwę sklepu obsługującego domenę z URL-a (lub None)."""
+    host = urlsplit(url).netloc.lower()
+    for name, cls in SHOPS.items():
+        if any(host == d or host.endswith("." + d) for d in cls.domains):
+            return name
+    return None
+
+
+def clean_filename(name: str) -> str:
+    """Zamienia niedozwolone znaki w nazwie pliku na myślniki."""
+    return re.sub(r'[\\/*?:"<>|]', "-", name)
+
+
+class ShopAdapter(ABC):
+    """
+    Wspólny interfejs adaptera sklepu. Metody abstrakcyjne muszą być w każdym sklepie –
+    adapter bez którejś z nich zgłasza TypeError już w build_shops(), a nie w trakcie przebiegu.
+    """
+    name = ""                   # klucz sklepu, np. 'inwest'
+    domains: Tuple[str, ...] = ()
+    products_key = ""           # klucz listy produktów w config.json
+    receivers_key = ""          # klucz odbiorców w config.json (fallback: email_receivers)
+    data_file = ""              # plik historii (patrz history_store.SCHEMAS)
+    http_cache_file = ""
+    headers: Dict[str, str] = {}
+    fields: Dict[str, Field] = {}
+    report_hour = 7             # godzina raportów tygodniowych/miesięcznych
+    chart_points = 15           # liczba ostatnich wpisów na wykresie
+    chart_size = (8, 4)
+    chart_prefix = "chart_"
+    summary_column = ""         # kolumna ceny do podsumowań
+    summary_last_cols: Tuple[str, ...] = ()
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+
+    @abstractmethod
+    def parse(self, content: bytes):
+        """Wynik parsowania strony (krotka) lub None, gdy nie znaleziono ceny."""
+
+    @abstractmethod
+    def failed(self, reason: str):
+        """Wynik zwracany, gdy strony nie udało się pobrać."""
+
+    def log_start(self, now_str: str, count: int):
+        print(f"⏰ Sprawdzanie cen: {now_str}")
+
+    @abstractmethod
+    def observe(self, name: str, url: str, result, last: Optional[dict],
+                now_str: str) -> Tuple[Optional[dict], List[dict]]:
+        """Zwraca (nowy wiersz historii lub None, lista zmian) dla jednego produktu."""
+
+    def log_saved(self):
+        pass
+
+    def log_changes(self, changes: List[dict]):
+        print(f"🚨 Wykryto {len(changes)} zmian. Wysyłanie raportu...")
+
+    def log_no_changes(self):
+        print("✅ Brak zmian cen. Nie wysyłamy raportu.")
+
+    @abstractmethod
+    def report(self, changes: List[dict]) -> Tuple[str, str]:
+        """(temat, treść) emaila ze zmianami."""
+
+    def chart_products(self, changes: List[dict]) -> List[str]:
+        """Produkty, dla których do emaila dołączany jest wykres."""
+        return [c['name'] for c in changes]
+
+    @abstractmethod
+    def change_for(self, row: dict, last: Optional[dict]) -> dict:
+        """Zmiana w formacie raportu dla wiersza historii, także bez zmiany ceny (alert premii – premium.py)."""
+
+    @abstractmethod
+    def coalesce(self, changes: List[dict]) -> List[dict]:
+        """Zmiany netto jednego produktu z kolejnych zmian w oknie zestawienia (digest.py)."""
+
+    def change_amount(self, change: dict) -> Optional[Tuple[float, float]]:
+        """(stara, nowa) cena zmiany – do progów zestawienia; None, gdy zmiana nie dotyczy ceny."""
+        return None
+
+    def chart_filename(self, product: str) -> str:
+        return f"{self.chart_prefix}{clean_filename(product)}.png"
+
+    @abstractmethod
+    def draw_chart(self, ax, data, product: str):
+        """Rysuje wykres produktu (matplotlib ax) z ostatnich wpisów historii."""
+
+    @abstractmethod
+    def summary_report(self, days: int, summary) -> Tuple[str, str]:
+        """(temat, treść) raportu okresowego (7 lub 30 dni) z price_summary.summarize()."""
+
+
+@register
+class TavexShop(ShopAdapter):
+    """Metale szlachetne – Tavex.pl (cena sprzedaży, skupu i spread)."""
+    name = "inwest"
+    domains = ("tavex.pl",)
+    products_key = "products_inwest"
+    receivers_key = "email_receivers_inwest"
+    data_file = "price_history_spread.csv"
+    http_cache_file = "http_cache_spread.json"
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+    fields = {'pricelist': Field("span", "product-poster__price-value", attr='data-pricelist')}
+    report_hour = 7
+    chart_points = 15
+    chart_prefix = "chart_"
+    summary_column = 'sell_price'
+
+    def parse(self, content):  # Wyciąga (sprzedaż, skup) ze strony produktu Tavex; None gdy brak ceny
+        pricelist = self.extractor.extract(content, self.fields)['pricelist']
+        if pricelist:
+            data = json.loads(pricelist)
+            sell = float(data['sell'][0]['price']) if data.get('sell') else None
+            buy = float(data['buy'][0]['price']) if data.get('buy') else None
+            return sell, buy
+        return None
+
+    def failed(self, reason):
+        return None, None
+
+    def observe(self, name, url, result, last, now_str):
+        sell, buy = result or (None, None)
+        if sell is None:
+            print(f"⚠️ Problem z ceną dla: {name}")
+            return None, []
+
+        last_sell = last['sell_price'] if last else None
+        row = {'date': now_str, 'product': name, 'sell_price': sell, 'buy_price': buy,
+               'spread_pln': round(sell - buy, 2)}
+
+        changes = []
+        if last_sell is not None:
+            if sell != last_sell:
+                changes.append(self.change_for(row, last))
+            else:
+                print(f"😴 {name}: stabilnie ({sell} PLN)")
+        else:
+            print(f"🆕 Zainicjowano: {name}")
+        return row, changes
+
+    def change_for(self, row, last):
+        sell, buy = row['sell_price'], row['buy_price']
+        old = last['sell_price'] if last else sell
+        return {'name': row['product'], 'old': old, 'new': sell, 'buy': buy,
+                'diff': round(sell - old, 2), 'spread': round(sell - buy, 2)}
+
+    def report(self, changes):
+        subject = f"📊 RAPORT ZMIAN CEN ({len(changes)} produktów)"
+        body = "Wykryto zmiany cen dla Twoich produktów:\n\n"
+        for c in changes:
+            if c['diff'] == 0:
+                trend = "➡️ BEZ ZMIANY"
+            else:
+                trend = "📈 WZROST" if c['diff'] > 0 else "📉 SPADEK"
+            spread_pct = round((c['spread'] / c['new']) * 100, 2)
+            diff_pct = round(((c['new'] - c['old']) / c['old']) * 100, 2) if c['old'] > 0 else 0
+            body += (
+                f"--- ALERT CENOWY: {c['name']} ---\n"
+                f"Trend: {trend} o {c['diff']} PLN ({diff_pct}%)\n"
+                f"🛒 Cena zakupu: {c['new']} PLN\n"
+                f"💰 Cena skupu: {c['buy']} PLN\n"
+                f"⚖️ Spread: {c['spread']} PLN ({spread_pct}%)\n"
+                f"Poprzednia cena: {c['old']} PLN\n"
+            )
+            if 'premium_pct' in c:
+                body += f"🪙 Wartość kruszcu: {c['melt']} PLN | Premia: {c['premium']} PLN ({c['premium_pct']}%)\n"
+                if c.get('premium_old') is not None:
+                    body += f"Poprzednia premia: {c['premium_old']}%\n"
+            body += "--------------------------------------------\n\n"
+        return subject, body
+
+    def coalesce(self, changes):
+        first, last = changes[0], changes[-1]
+        # Alert premii zostaje mimo powrotu ceny – premia zmieniła się przez cenę spot
+        if last['new'] == first['old'] and not last.get('premium_alert'):
+            return []
+        net = dict(last, old=first['old'], diff=round(last['new'] - first['old'], 2))
+        if 'premium_old' in first:
+            net['premium_old'] = first['premium_old']
+        return [net]
+
+    def change_amount(self, change):
+        if change.get('premium_alert'):
+            return None  # progi zestawienia dotyczą ceny, a tu zmieniła się premia
+        return change['old'], change['new']
+
+    def draw_chart(self, ax, data, product):
+        ax.plot(data['date'], data['sell_price'], color='#d4af37', marker='o', label='Sprzedaż')
+        ax.plot(data['date'], data['buy_price'], color='#707070', linestyle='--', label='Skup')
+        ax.set_title(f"Trend: {product}")
+        ax.tick_params(axis='x', rotation=35)
+        for label in ax.get_xticklabels():
+            label.set_horizontalalignment('right')
+        ax.legend()
+
+    def summary_report(self, days, summary):
+        from price_summary import trend_emoji
+        weekly = days == 7
+        title = "PODSUMOWANIE TYGODNIOWE" if weekly else "PODSUMOWANIE MIESIĘCZNE"
+        body = f"📊 {title}\n==========================\n\n"
+        for product, r in summary.to_dict('index').items():
+            emoji = trend_emoji(r['diff'])
+            body += (f"🔹 {product}:\n   Cena {days} dni temu: {r['first']} PLN | Dziś: {r['last']} PLN\n"
+                     f"   Wynik: {emoji} {r['diff']} PLN ({r['pct']}%)\n")
+            if weekly:
+                body += f"   Min/Max: {r['min']} - {r['max']} PLN\n"
+            if 'premium_last' in r and r['premium_last'] == r['premium_last']:  # NaN – brak premii dla produktu
+                body += f"   Premia ponad kruszec: {r['premium_first']}% → {r['premium_last']}%\n"
+            body += "   --------------------------\n"
+        if weekly:
+            subject = f"📆 {title}: {datetime.now().strftime('%d.%m.%Y')}"
+        else:
+            subject = f"📅 {title}: {datetime.now().strftime('%B %Y')}"
+        return subject, body
+
+
+# Słownik opisów dostępności do wyświetlania w emailach
+AVAIL_LABELS = {
+    "dostępny":           "✅ dostępny",
+    "magazyn dostawcy":   "📦 magazyn dostawcy",
+    "na wyczerpaniu":     "⚠️ na wyczerpaniu",
+    "niedostępny":        "❌ niedostępny",
+    "zamówienie":         "🕐 na zamówienie",
+}
+
+
+def parse_price(text: str) -> Optional[float]:
+    """Konwertuje tekst ceny np. '3 899,00 zł' → 3899.0."""
+    if not text:
+        return None
+    cleaned = re.sub(r'[^\d,]', '', text.replace('\xa0', '').replace(' ', ''))
+    cleaned = cleaned.replace(',', '.')
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def avail_label(raw: str) -> str:
+    """Zwraca czytelną etykietę dostępności."""
+    lower = raw.lower().strip()
+    for key, label in AVAIL_LABELS.items():
+        if key in lower:
+            return label
+    return raw.strip()
+
+
+@register
+class FotoformaShop(ShopAdapter):
+    """Obiektywy Fuji X – fotoforma.pl (cena i dostępność)."""
+    name = "foto"
+    domains = ("fotoforma.pl",)
+    products_key = "products_foto"
+    receivers_key = "email_receivers_foto"
+    data_file = "price_history_foto.csv"
+    http_cache_file = "http_cache_foto.json"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "pl-PL,pl;q=0.9,en-US;q=0.8",
+    }
+    fields = {
+        'price':        Field('em', 'main-price'),
+        'availability': Field('div', 'availability__availability', child_tag='span', child_class='second'),
+    }
+    report_hour = 10
+    chart_points = 20
+    chart_size = (9, 4)
+    chart_prefix = "chart_foto_"
+    summary_column = 'price'
+    summary_last_cols = ('availability',)
+
+    def parse(self, content):
+        """Wyciąga (cena_float, tekst_dostepnosci) z treści strony produktu fotoforma.pl; None gdy brak ceny."""
+        fields = self.extractor.extract(content, self.fields)
+        price = parse_price(fields['price']) if fields['price'] else None
+        if price is None:
+            return None
+        availability = fields['availability'] or "nieznana"
+        return price, availability
+
+    def failed(self, reason):
+        return None, reason
+
+    def log_start(self, now_str, count):
+        print(f"⏰ Sprawdzanie cen obiektywów Fuji X: {now_str}")
+        print(f"   Źródło: fotoforma.pl | Produkty: {count}")
+        print()
+
+    def observe(self, name, url, result, last, now_str):
+        price, availability = result or (None, "nieznana")
+        print(f"  🔍 {name}")
+
+        if price is None:
+            print(f"    ⚠️ Nie udało się pobrać ceny – pomijam.")
+            return None, []
+
+        print(f"    💰 {price:.2f} PLN  |  📦 {avail_label(availability)}")
+
+        changes = []
+        if last:
+            last_price = float(last['price'])
+            last_avail = str(last['availability'])
+
+            # Zmiana ceny
+            if price != last_price:
+                diff = round(price - last_price, 2)
+                trend = "📈 WZROST" if diff > 0 else "📉 SPADEK"
+                print(f"    🚨 {trend}: {last_price} → {price} PLN ({diff:+.2f})")
+                changes.append({
+                    'type': 'price', 'name': name, 'url': url,
+                    'old_price': last_price, 'new_price': price,
+                    'diff': diff, 'availability': availability,
+                })
+            else:
+                print(f"    😴 Cena stabilna ({price} PLN)")
+
+            # Zmiana dostępności
+            if availability.lower() != last_avail.lower():
+                print(f"    🔔 Zmiana dostępności: '{last_avail}' → '{availability}'")
+                changes.append({
+                    'type': 'availability', 'name': name, 'url': url,
+                    'old_avail': last_avail, 'new_avail': availability,
+                    'price': price,
+                })
+        else:
+            print(f"    🆕 Inicjalizacja wpisu.")
+        print()
+
+        row = {'date': now_str, 'product': name, 'price': price, 'availability': availability}
+        return row, changes
+
+    def change_for(self, row, last):
+        price = row['price']
+        old = float(last['price']) if last else price
+        return {'type': 'price', 'name': row['product'], 'url': row.get('url', ""),
+                'old_price': old, 'new_price': price, 'diff': round(price - old, 2),
+                'availability': row['availability']}
+
+    def log_saved(self):
+        print(f"💾 Zapisano historię do: {self.data_file}")
+
+    def log_changes(self, changes):
+        n_price = sum(1 for c in changes if c['type'] == 'price')
+        n_avail = sum(1 for c in changes if c['type'] == 'availability')
+        print(f"\n🚨 Wykryto zmiany: {n_price} cen, {n_avail} dostępności. Wysyłanie emaila...")
+
+    def log_no_changes(self):
+        print("✅ Brak zmian cen ani dostępności. Email nie jest wysyłany.")
+
+    def report(self, changes):
+        price_changes = [c for c in changes if c['type'] == 'price']
+        avail_changes = [c for c in changes if c['type'] == 'availability']
+
+        parts = []
+        if price_changes:
+            parts.append(f"💰 {len(price_changes)} zmian cen")
+        if avail_changes:
+            parts.append(f"📦 {len(avail_changes)} zmian dostępności")
+        subject = f"📷 FUJI X: {', '.join(parts)}"
+
+        body = "Wykryto zmiany dla obiektywów Fuji X (fotoforma.pl):\n\n"
+
+        # --- Zmiany cen ---
+        if price_changes:
+            body += "═══ ZMIANY CEN ═══════════════════════════════\n"
+            for c in price_changes:
+                if c['diff'] == 0:
+                    trend = "➡️ BEZ ZMIANY"
+                else:
+                    trend = "📈 WZROST" if c['diff'] > 0 else "📉 SPADEK"
+                diff_pct = round(((c['new_price'] - c['old_price']) / c['old_price']) * 100, 2) if c['old_price'] > 0 else 0
+                body += (
+                    f"\n🔹 {c['name']}\n"
+                    f"   Trend:           {trend} o {c['diff']:+.2f} PLN ({diff_pct:+.2f}%)\n"
+                    f"   Nowa cena:       {c['new_price']:.2f} PLN\n"
+                    f"   Poprzednia cena: {c['old_price']:.2f} PLN\n"
+                    f"   Dostępność:      {avail_label(c['availability'])}\n"
+                    + (f"   Link: {c['url']}\n" if c.get('url') else "")
+                )
+
+        # --- Zmiany dostępności ---
+        if avail_changes:
+            body += "\n═══ ZMIANY DOSTĘPNOŚCI ════════════════════════\n"
+            for c in avail_changes:
+                body += (
+                    f"\n🔹 {c['name']}\n"
+                    f"   Poprzednio: {avail_label(c['old_avail'])}\n"
+                    f"   Teraz:      {avail_label(c['new_avail'])}\n"
+                    f"   Cena:       {c['price']:.2f} PLN\n"
+                    f"   Link: {c['url']}\n"
+                )
+        return subject, body
+
+    def chart_products(self, changes):
+        return [c['name'] for c in changes if c['type'] == 'price']
+
+    def coalesce(self, changes):
+        net = []
+        prices = [c for c in changes if c['type'] == 'price']
+        if prices and prices[-1]['new_price'] != prices[0]['old_price']:
+            old = prices[0]['old_price']
+            net.append(dict(prices[-1], old_price=old, diff=round(prices[-1]['new_price'] - old, 2)))
+        avails = [c for c in changes if c['type'] == 'availability']
+        if avails and avails[-1]['new_avail'].lower() != avails[0]['old_avail'].lower():
+            net.append(dict(avails[-1], old_avail=avails[0]['old_avail']))
+        return net
+
+    def change_amount(self, change):
+        if change['type'] != 'price':
+            return None
+        return change['old_price'], change['new_price']
+
+    def draw_chart(self, ax, data, product):
+        ax.plot(data['date'], data['price'], color='#e07c24',
+                marker='o', linewidth=2, label='Cena (PLN)')
+        ax.set_title(f"Historia cen: {product}", fontsize=11)
+        ax.set_ylabel("Cena (PLN)")
+        ax.tick_params(axis='x', rotation=35)
+        ax.legend()
+
+    def summary_report(self, days, summary):
+        from price_summary import trend_emoji
+        weekly = days == 7
+        title = "PODSUMOWANIE TYGODNIOWE" if weekly else "PODSUMOWANIE MIESIĘCZNE"
+        body = f"📊 {title} – Obiektywy Fuji X\n" + "=" * 50 + "\n\n"
+        for product, r in summary.to_dict('index').items():
+            emoji = trend_emoji(r['diff'], flat="➡️")
+            if weekly:
+                body += (
+                    f"🔹 {product}:\n"
+                    f"   7 dni temu: {r['first']} PLN  →  Dziś: {r['last']} PLN\n"
+                    f"   Wynik:      {emoji} {r['diff']:+.2f} PLN ({r['pct']:+.2f}%)\n"
+                    f"   Min/Max:    {r['min']} / {r['max']} PLN\n"
+                    f"   Dostępność: {avail_label(r['availability'])}\n"
+                    f"   {'─' * 44}\n"
+                )
+            else:
+                body += (
+                    f"🔹 {product}:\n"
+                    f"   {days} dni temu: {r['first']} PLN  →  Dziś: {r['last']} PLN\n"
+                    f"   Wynik:       {emoji} {r['diff']:+.2f} PLN ({r['pct']:+.2f}%)\n"
+                    f"   Dostępność:  {avail_label(r['availability'])}\n"
+                    f"   {'─' * 44}\n"
+                )
+        if weekly:
+            subject = f"📆 FUJI X - {title}: {datetime.now().strftime('%d.%m.%Y')}"
+        else:
+            subject = f"📅 FUJI X - {title}: {datetime.now().strftime('%B %Y')}"
+        return subject, body
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Ceny spot metali szlachetnych i kurs USD/PLN (Yahoo Finance przez yfinance).
+
+Zamiast osobnego zapytania o każdy notowany instrument (wcześniej test.py
+pobierał złoto i kurs PLN=X po dwa razy) wszystkie tickery idą jednym
+yf.download(). Notowania trafiają do cache na dysku (spot_cache.json) z
+czasem ważności – kolejne wywołania w tym czasie nie łączą się z siecią,
+a gdy Yahoo nie odpowiada, używane są ostatnie znane ceny (z ostrzeżeniem).
+
+Przeliczenia USD/uncja → PLN/gram to zwykła arytmetyka, więc działają tak samo
+na liczbach, tablicach NumPy i kolumnach pandas (cała historia naraz).
+
+Warstwę sieciową można podmienić: FixtureFeed czyta notowania z pliku JSON
+(np. zapisanego przez --save-fixture), więc moduł działa bez internetu.
+
+Opcjonalna konfiguracja w config.json:
+  "spot": {"cache_file": "spot_cache.json", "ttl_minutes": 15, "fixture": null}
+
+Użycie:
+  python spot_prices.py                          # aktualne ceny w PLN/g
+  python spot_prices.py --refresh                # z pominięciem cache
+  python spot_prices.py --save-fixture spot.json # zapisz notowania do pracy offline
+  python spot_prices.py --fixture spot.json      # bez sieci
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+TROY_OUNCE_G = 31.1034768
+
+# Kontrakty terminowe COMEX/NYMEX (USD za uncję trojańską) i kurs USD/PLN
+METALS = {
+    'gold': 'GC=F',
+    'silver': 'SI=F',
+    'platinum': 'PL=F',
+    'palladium': 'PA=F',
+}
+FX_USD_PLN = 'PLN=X'
+METAL_LABELS = {'gold': 'Złoto', 'silver': 'Srebro', 'platinum': 'Platyna', 'palladium': 'Pallad'}
+
+
+# --- przeliczenia (wektorowe) ---
+
+def usd_oz_to_pln_gram(usd_per_oz, usd_pln):
+    """Cena USD/uncja → PLN/gram; liczby, tablice NumPy albo kolumny pandas."""
+    return usd_per_oz * usd_pln / TROY_OUNCE_G
+
+
+def pln_gram_to_usd_oz(pln_per_gram, usd_pln):
+    return pln_per_gram * TROY_OUNCE_G / usd_pln
+
+
+def melt_value(pln_per_gram, weight_g, purity=1.0):
+    """Wartość kruszcu w produkcie (PLN): cena spot za gram × masa × próba."""
+    return pln_per_gram * weight_g * purity
+
+
+# --- warstwa sieciowa ---
+
+class YahooFeed:
+    """Notowania z Yahoo Finance – wszystkie tickery jednym yf.download()."""
+
+    def __init__(self, period: str = "5d"):
+        self.period = period
+
+    def download(self, tickers: List[str]) -> Dict[str, dict]:
+        """{ticker: {'close', 'prev_close', 'time'}} dla tickerów z notowaniami."""
+        import yfinance as yf
+
+        data = yf.download(tickers, period=self.period, interval="1d", group_by='column',
+                           auto_adjust=False, progress=False, threads=False)
+        close = data['Close']
+        if not hasattr(close, 'columns'):  # starsze yfinance dla jednego tickera
+            close = close.to_frame(tickers[0])
+        quotes = {}
+        for ticker in tickers:
+            if ticker not in close.columns:
+                continue
+            series = close[ticker].dropna()
+            if series.empty:
+                continue
+            quotes[ticker] = {
+                'close': float(series.iloc[-1]),
+                'prev_close': float(series.iloc[-2]) if len(series) > 1 else None,
+                'time': str(series.index[-1])[:19],
+            }
+        return quotes
+
+
+class FixtureFeed:
+    """Notowania z pliku JSON ({ticker: {'close', 'prev_close', 'time'}}) – praca offline i testy."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def download(self, tickers: List[str]) -> Dict[str, dict]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            quotes = json.load(f)
+        return {t: quotes[t] for t in tickers if t in quotes}
+
+
+# --- cache i fasada ---
+
+class SpotPrices:
+    """Notowania z cache (ważne ttl sekund) albo z feed.download() – brakujące naraz."""
+
+    def __init__(self, feed=None, cache_file: Optional[str] = "spot_cache.json", ttl: float = 900):
+        self.feed = feed or YahooFeed()
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._cache = self._load_cache()
+
+    @classmethod
+    def from_config(cls, config: dict, fixture: Optional[str] = None) -> "SpotPrices":
+        spot_cfg = config.get("spot", {}) or {}
+        fixture = fixture or spot_cfg.get("fixture")
+        feed = FixtureFeed(fixture) if fixture else YahooFeed()
+        return cls(feed, spot_cfg.get("cache_file", "spot_cache.json"),
+                   float(spot_cfg.get("ttl_minutes", 15)) * 60)
+
+    def _load_cache(self) -> Dict[str, dict]:
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        tmp = self.cache_file + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.cache_file)
+
+    def quotes(self, tickers: Iterable[str], refresh: bool = False) -> Dict[str, dict]:
+        """Notowania tickerów; przeterminowane lub brakujące pobierane jednym zapytaniem."""
+        tickers = list(dict.fromkeys(tickers))
+        now = time.time()
+        stale = [t for t in tickers
+                 if refresh or t not in self._cache or now - self._cache[t].get('fetched', 0) > self.ttl]
+        if stale:
+            try:
+                fresh = self.feed.download(stale)
+            except Exception as e:
+                fresh = {}
+                print(f"⚠️ Błąd pobierania cen spot: {e}")
+            for ticker, quote in fresh.items():
+                self._cache[ticker] = dict(quote, fetched=now)
+            if fresh:
+                self._save_cache()
+            missing = [t for t in stale if t not in fresh and t in self._cache]
+            if missing:
+                print(f"⚠️ Brak świeżych notowań {', '.join(missing)} – używam ostatnich znanych")
+        return {t: self._cache[t] for t in tickers if t in self._cache}
+
+    def pln_per_gram(self, metals: Iterable[str] = ('gold', 'silver'),
+                     refresh: bool = False) -> Dict[str, dict]:
+        """{metal: {'price', 'prev_price', 'time'}} w PLN/g (poprzednia cena – z poprzednim kursem)."""
+        metals = list(metals)
+        quotes = self.quotes([METALS[m] for m in metals] + [FX_USD_PLN], refresh)
+        fx = quotes.get(FX_USD_PLN)
+        if fx is None:
+            return {}
+        out = {}
+        for metal in metals:
+            q = quotes.get(METALS[metal])
+            if q is None:
+                continue
+            prev = None
+            if q.get('prev_close') is not None:
+                prev = usd_oz_to_pln_gram(q['prev_close'], fx.get('prev_close') or fx['close'])
+            out[metal] = {'price': usd_oz_to_pln_gram(q['close'], fx['close']),
+                          'prev_price': prev, 'time': q.get('time')}
+        return out
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Ceny spot metali szlachetnych w PLN za gram")
+    parser.add_argument('--metals', nargs='+', default=['gold', 'silver'], choices=sorted(METALS),
+                        help='metale (domyślnie gold silver)')
+    parser.add_argument('--refresh', action='store_true', help='pobierz z pominięciem cache')
+    parser.add_argument('--fixture', help='notowania z pliku JSON zamiast z sieci')
+    parser.add_argument('--save-fixture', help='zapisz pobrane notowania do pliku JSON (do pracy offline)')
+    args = parser.parse_args(argv)
+    # Ścieżki z linii poleceń względem katalogu wywołania
+    fixture = os.path.abspath(args.fixture) if args.fixture else None
+    save_fixture = os.path.abspath(args.save_fixture) if args.save_fixture else None
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    config = {}
+    if os.path.exists("config.json"):
+        with open("config.json", 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    spot = SpotPrices.from_config(config, fixture=fixture)
+    prices = spot.pln_per_gram(args.metals, refresh=args.refresh)
+    if not prices:
+        print("❌ Brak notowań (sieć niedostępna i pusty cache).")
+        return 1
+
+    print("AKTUALNE CENY METALI SZLACHETNYCH")
+    print("=================================")
+    for metal, p in prices.items():
+        line = f"{METAL_LABELS[metal]}: {p['price']:.2f} PLN/g"
+        if p['prev_price']:
+            diff = p['price'] - p['prev_price']
+            line = f"{'📈' if diff >= 0 else '📉'} {line} (zmiana: {diff:+.2f} / {diff / p['prev_price'] * 100:+.2f}%)"
+        print(line)
+
+    if save_fixture:
+        tickers = [METALS[m] for m in args.metals] + [FX_USD_PLN]
+        quotes = {t: {k: v for k, v in q.items() if k != 'fetched'} for t, q in spot.quotes(tickers).items()}
+        with open(save_fixture, 'w', encoding='utf-8') as f:
+            json.dump(quotes, f, ensure_ascii=False, indent=2)
+        print(f"💾 Zapisano notowania do: {save_fixture}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
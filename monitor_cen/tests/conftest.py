@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# Moduły monitora importują się nawzajem jako moduły najwyższego poziomu (jak przy uruchamianiu skryptów)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
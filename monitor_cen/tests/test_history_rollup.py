@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Świece OHLC aktualizowane przy append() muszą być takie same jak przeliczone przez sync()."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from history_rollup import Rollups
+from history_store import CsvHistoryStore, SqliteHistoryStore
+
+PRODUCTS = ['Złoty Dukat', 'Krugerrand 1 oz', 'Srebrny Liść Klonu']
+COLUMNS = ['sell_price', 'buy_price', 'spread_pln']
+
+
+def runs(count, start=datetime(2024, 3, 1, 8, 0)):
+    """Przebiegi monitora co 50 minut; co siódmy bez ceny skupu."""
+    for i in range(count):
+        date = (start + timedelta(minutes=50 * i)).strftime("%Y-%m-%d %H:%M")
+        rows = []
+        for j, product in enumerate(PRODUCTS):
+            sell = 1000.0 * (j + 1) + (i * 37 % 23) - 11
+            buy = None if (i + j) % 7 == 0 else sell - 20 - i % 3
+            rows.append({'date': date, 'product': product, 'sell_price': sell, 'buy_price': buy,
+                         'spread_pln': None if buy is None else round(sell - buy, 2)})
+        yield rows
+
+
+def candles(rollups):
+    return rollups._db().execute(f'SELECT * FROM "{rollups.table}" ORDER BY product, res, bucket').fetchall()
+
+
+def open_store(kind, tmp_path):
+    if kind == 'csv':
+        return CsvHistoryStore.for_file(str(tmp_path / "price_history_spread.csv"))
+    return SqliteHistoryStore.for_file("price_history_spread.csv", str(tmp_path / "price_history.db"))
+
+
+def assert_matches_sync(store, tmp_path):
+    reference = Rollups(str(tmp_path / "wzorzec.db"), COLUMNS)
+    reference.sync(store)
+    assert candles(store.rollups) == candles(reference)
+    assert store.rollups.position() == store.end_position()
+    reference.close()
+
+
+@pytest.mark.parametrize('kind', ['csv', 'sqlite'])
+def test_append_to_new_history_updates_candles(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    for rows in runs(40):
+        store.append(rows)
+    assert len(candles(store.rollups)) > 0
+    assert_matches_sync(store, tmp_path)
+    store.close()
+
+
+@pytest.mark.parametrize('kind', ['csv', 'sqlite'])
+def test_append_after_clear_updates_candles(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    for rows in runs(10):
+        store.append(rows)
+    store.clear()
+    for rows in runs(25, start=datetime(2024, 6, 3, 23, 30)):
+        store.append(rows)
+    assert_matches_sync(store, tmp_path)
+    store.close()
+
+
+def test_header_only_file_from_older_version(tmp_path):
+    store = open_store('csv', tmp_path)
+    store.ensure_file()   # pusty plik z nagłówkiem, agregaty jeszcze nie istnieją
+    store.rollups._db()
+    for rows in runs(5):
+        store.append(rows)
+    assert_matches_sync(store, tmp_path)
+    store.close()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Historia CSV dopisywana na końcu pliku (naprawa przerwanego zapisu) i indeks ostatnich cen."""
+
+import json
+import os
+
+import pytest
+
+from history_store import CsvHistoryStore
+
+HEADER = "date,product,sell_price,buy_price,spread_pln\n"
+
+
+def row(date, product, sell, buy=None):
+    return {'date': date, 'product': product, 'sell_price': sell, 'buy_price': buy,
+            'spread_pln': None if buy is None else round(sell - buy, 2)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CsvHistoryStore.for_file(str(tmp_path / "price_history_spread.csv"), rollups=False)
+
+
+def read(store):
+    with open(store.data_file, 'rb') as f:
+        return f.read()
+
+
+def test_append_only_adds_at_end(store):
+    store.append([row("2024-05-01 10:00", "Dukat", 1500.0, 1450.0), row("2024-05-01 10:00", "Krugerrand", 11000.0)])
+    before = read(store)
+    assert before.decode() == HEADER + "2024-05-01 10:00,Dukat,1500.0,1450.0,50.0\n" \
+                                       "2024-05-01 10:00,Krugerrand,11000.0,,\n"
+    store.append([row("2024-05-01 10:15", "Dukat", 1510.0, 1455.0)])
+    after = read(store)
+    assert after.startswith(before)
+    assert after[len(before):] == b"2024-05-01 10:15,Dukat,1510.0,1455.0,55.0\n"
+    assert store.last_state() == {
+        'Dukat': row("2024-05-01 10:15", "Dukat", 1510.0, 1455.0),
+        'Krugerrand': row("2024-05-01 10:00", "Krugerrand", 11000.0),
+    }
+
+
+def test_interrupted_write_is_truncated(store, capsys):
+    store.append([row("2024-05-01 10:00", "Dukat", 1500.0, 1450.0)])
+    with open(store.data_file, 'ab') as f:
+        f.write(b"2024-05-01 10:15,Dukat,15")   # przerwany zapis – bez końca linii
+    assert store.last_state()['Dukat']['sell_price'] == 1500.0   # niedokończona linia pomijana
+
+    store.append([row("2024-05-01 10:30", "Dukat", 1520.0, 1460.0)])
+    assert "Obcięto niedokończony wpis" in capsys.readouterr().out
+    assert read(store).decode() == HEADER + "2024-05-01 10:00,Dukat,1500.0,1450.0,50.0\n" \
+                                            "2024-05-01 10:30,Dukat,1520.0,1460.0,60.0\n"
+    assert [r['date'] for r in store.iter_rows()] == ["2024-05-01 10:00", "2024-05-01 10:30"]
+    assert store.last_state()['Dukat']['sell_price'] == 1520.0
+
+
+def test_broken_header_is_rewritten(store):
+    with open(store.data_file, 'wb') as f:
+        f.write(b"date,prod")
+    store.append([row("2024-05-01 10:00", "Dukat", 1500.0, 1450.0)])
+    assert read(store).decode() == HEADER + "2024-05-01 10:00,Dukat,1500.0,1450.0,50.0\n"
+
+
+def test_state_catches_up_with_rows_written_elsewhere(store):
+    store.append([row("2024-05-01 10:00", "Dukat", 1500.0, 1450.0)])
+    with open(store.data_file, 'a', encoding='utf-8') as f:
+        f.write("2024-05-01 10:15,Dukat,1505.0,1451.0,54.0\n2024-05-01 10:15,Srebrny Liść,150.5,,\n")
+    state = store.last_state()
+    assert state['Dukat'] == row("2024-05-01 10:15", "Dukat", 1505.0, 1451.0)
+    assert state['Srebrny Liść']['sell_price'] == 150.5 and state['Srebrny Liść']['buy_price'] is None
+    with open(store.state_file, encoding='utf-8') as f:
+        assert json.load(f)['history_size'] == len(read(store))
+
+
+@pytest.mark.parametrize('damage', ['missing', 'corrupt', 'history_shrunk'])
+def test_state_rebuilt_when_missing_or_inconsistent(store, damage):
+    store.append([row("2024-05-01 10:00", "Dukat", 1500.0, 1450.0), row("2024-05-01 10:00", "Krugerrand", 11000.0)])
+    store.append([row("2024-05-01 10:15", "Dukat", 1510.0, 1455.0)])
+    expected = store.last_state()
+    if damage == 'missing':
+        os.remove(store.state_file)
+    elif damage == 'corrupt':
+        with open(store.state_file, 'w', encoding='utf-8') as f:
+            f.write('{"history_size": ')
+    else:
+        with open(store.state_file, 'w', encoding='utf-8') as f:
+            json.dump({'history_size': 10 ** 9, 'products': {'Dukat': {'sell_price': 1.0}}}, f)
+    assert store.last_state() == expected
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Warunkowe GET z cache ETag/Last-Modified (http_cache.py) na atrapie klienta HTTP."""
+
+import json
+
+import pytest
+import requests
+
+from http_cache import HttpCache
+
+URL = "https://fotoforma.pl/obiektyw"
+
+
+class Response:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class FakeHttp:
+    """Odpowiada kolejnymi odpowiedziami z listy i zapamiętuje wysłane nagłówki."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.sent.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+class Parser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, content):
+        self.calls += 1
+        if content == b"bez ceny":
+            return None
+        price, availability = content.decode().split("|")
+        return float(price), availability
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "http_cache_foto.json")
+
+
+def test_not_modified_returns_cached_result_without_parsing(cache_file):
+    parse = Parser()
+    cache = HttpCache(cache_file)
+    http = FakeHttp(Response(200, "3899|Dostępny".encode(), {'ETag': '"v1"', 'Last-Modified': 'Wed, 01 May 2024 10:00:00 GMT'}))
+    assert cache.fetch(http, URL, parse, headers={'User-Agent': 'test'}) == (3899.0, "Dostępny")
+    assert http.sent == [{'User-Agent': 'test'}]
+    cache.save()
+
+    cache = HttpCache(cache_file)   # kolejne uruchomienie – cache z pliku
+    http = FakeHttp(Response(304))
+    assert cache.fetch(http, URL, parse, headers={'User-Agent': 'test'}) == (3899.0, "Dostępny")
+    assert http.sent == [{'User-Agent': 'test', 'If-None-Match': '"v1"',
+                          'If-Modified-Since': 'Wed, 01 May 2024 10:00:00 GMT'}]
+    assert parse.calls == 1
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_changed_page_is_parsed_and_replaces_entry(cache_file):
+    parse = Parser()
+    cache = HttpCache(cache_file)
+    http = FakeHttp(Response(200, "3899|Dostępny".encode(), {'ETag': '"v1"'}),
+                    Response(200, b"3799|Brak", {'ETag': '"v2"'}),
+                    Response(304))
+    cache.fetch(http, URL, parse)
+    assert cache.fetch(http, URL, parse) == (3799.0, "Brak")
+    assert cache.fetch(http, URL, parse) == (3799.0, "Brak")
+    assert [h.get('If-None-Match') for h in http.sent] == [None, '"v1"', '"v2"']
+    assert parse.calls == 2
+    cache.save()
+    with open(cache_file, encoding='utf-8') as f:
+        assert json.load(f)[URL] == {'etag': '"v2"', 'last_modified': None, 'result': [3799.0, "Brak"]}
+
+
+def test_failed_parse_is_not_cached(cache_file):
+    parse = Parser()
+    cache = HttpCache(cache_file)
+    http = FakeHttp(Response(200, b"bez ceny", {'ETag': '"v1"'}), Response(200, "3899|Dostępny".encode(), {'ETag': '"v1"'}))
+    assert cache.fetch(http, URL, parse) is None
+    assert cache.fetch(http, URL, parse) == (3899.0, "Dostępny")
+    assert 'If-None-Match' not in http.sent[1]   # bez zapamiętanego wyniku nie ma warunkowego GET
+
+
+def test_entries_without_price_are_dropped_on_load(cache_file):
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({URL: {'etag': '"v1"', 'result': [None, "nieznana"]},
+                   "https://tavex.pl/dukat": {'etag': '"t1"', 'result': [1500.0, 1450.0]}}, f)
+    assert list(HttpCache(cache_file)._entries) == ["https://tavex.pl/dukat"]
+
+
+def test_disabled_cache_sends_plain_get(cache_file):
+    parse = Parser()
+    cache = HttpCache(cache_file, enabled=False)
+    http = FakeHttp(Response(200, "3899|Dostępny".encode(), {'ETag': '"v1"'}), Response(200, "3899|Dostępny".encode()))
+    cache.fetch(http, URL, parse)
+    cache.fetch(http, URL, parse)
+    cache.save()
+    assert http.sent == [{}, {}]
+    assert parse.calls == 2
+    with pytest.raises(FileNotFoundError):
+        open(cache_file)
+
+
+def test_http_error_propagates_and_keeps_entry(cache_file):
+    parse = Parser()
+    cache = HttpCache(cache_file)
+    http = FakeHttp(Response(200, "3899|Dostępny".encode(), {'ETag': '"v1"'}), Response(503), Response(304))
+    cache.fetch(http, URL, parse)
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(http, URL, parse)
+    assert cache.fetch(http, URL, parse) == (3899.0, "Dostępny")
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Kolejka emaili (mail_queue.py) z lokalnym serwerem SMTP (aiosmtpd) zamiast Gmaila.
+
+  python -m pytest tests
+"""
+
+import socket
+from email.message import EmailMessage
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+import mail_queue
+from mail_queue import MailQueue
+
+
+class Recorder:
+    """Handler aiosmtpd: zapisuje wiadomości i połączenia; reply – odpowiedź na DATA."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = []
+        self.reply = "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if session not in self.sessions:
+            self.sessions.append(session)
+        if self.reply.startswith("250"):
+            self.messages.append(envelope)
+        return self.reply
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    handler = Recorder()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture(autouse=True)
+def no_connect_delay(monkeypatch):
+    monkeypatch.setattr(mail_queue, "CONNECT_RETRIES", ())
+
+
+def make_queue(tmp_path, port, **kwargs):
+    return MailQueue(str(tmp_path / "mail_queue.db"), "monitor@example.com", "haslo",
+                     host="127.0.0.1", port=port, use_ssl=False, **kwargs)
+
+
+def message(n):
+    msg = EmailMessage()
+    msg['Subject'] = f"Raport {n}"
+    msg['From'] = "monitor@example.com"
+    msg['To'] = "odbiorca@example.com, drugi@example.com"
+    msg.set_content(f"Treść raportu {n} – zażółć gęślą jaźń")
+    return msg
+
+
+def outbox(queue):
+    return queue._db().execute("SELECT attempts, next_attempt, failed FROM outbox ORDER BY id").fetchall()
+
+
+def test_flush_sends_all_over_one_connection(tmp_path, smtp):
+    queue = make_queue(tmp_path, smtp.port)
+    for n in range(3):
+        queue.enqueue(message(n))
+    assert queue.pending() == 3
+
+    assert queue.flush() == 3
+    assert queue.pending() == 0
+    handler = smtp.handler
+    assert len(handler.sessions) == 1
+    assert [m.rcpt_tos for m in handler.messages] == [["odbiorca@example.com", "drugi@example.com"]] * 3
+    assert "Raport 2" in handler.messages[2].content.decode()
+    queue.close()
+
+
+def test_temporary_failure_backs_off(tmp_path, smtp):
+    queue = make_queue(tmp_path, smtp.port)
+    queue.enqueue(message(1))
+    smtp.handler.reply = "451 4.3.0 Try again later"
+
+    assert queue.flush() == 0
+    (attempts, next_attempt, failed), = outbox(queue)
+    assert (attempts, failed) == (1, 0)
+    smtp.handler.reply = "250 OK"
+
+    assert queue.flush(now=next_attempt - 1) == 0   # przed terminem – bez połączenia
+    assert len(smtp.handler.sessions) == 1
+    assert queue.flush(now=next_attempt) == 1
+    assert len(smtp.handler.messages) == 1
+    assert queue.pending() == 0
+    queue.close()
+
+
+def test_refused_connection_keeps_messages(tmp_path, smtp):
+    queue = make_queue(tmp_path, free_port())   # nikt nie nasłuchuje
+    queue.enqueue(message(1))
+    queue.enqueue(message(2))
+
+    assert queue.flush() == 0
+    assert queue.pending() == 2
+    assert [row[0] for row in outbox(queue)] == [1, 1]
+
+    queue.port = smtp.port
+    assert queue.flush(now=float('inf')) == 2
+    assert queue.pending() == 0
+    assert len(smtp.handler.messages) == 2
+    queue.close()
+
+
+def test_message_dropped_after_max_attempts(tmp_path, smtp):
+    queue = make_queue(tmp_path, smtp.port, max_attempts=3)
+    queue.enqueue(message(1))
+    smtp.handler.reply = "451 4.3.0 Try again later"
+
+    for _ in range(3):
+        assert queue.flush(now=float('inf')) == 0
+    assert outbox(queue)[0][0] == 3
+    assert outbox(queue)[0][2] == 1
+    assert queue.pending() == 0
+
+    smtp.handler.reply = "250 OK"
+    assert queue.flush(now=float('inf')) == 0   # porzuconej nie wysyłamy ponownie
+    assert smtp.handler.messages == []
+    queue.close()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Przyrostowe analizy (price_analytics.py) muszą dawać to samo co pełne przeliczenie."""
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from history_store import CsvHistoryStore
+from price_analytics import PriceAnalytics
+
+PRODUCTS = ['Złoty Dukat', 'Krugerrand 1 oz', 'Srebrny Liść Klonu', 'Sztabka 100 g']
+
+
+def history(runs, seed=7):
+    """Przebiegi monitora: jeden wiersz na produkt, poziom ceny skacze co jakiś czas."""
+    rnd = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=runs, freq="15min").strftime("%Y-%m-%d %H:%M")
+    rows = []
+    for i, product in enumerate(PRODUCTS):
+        level = 1000.0 * (i + 1) + np.cumsum(rnd.choice([0, 0, 0, 1], runs) * rnd.normal(0, 40, runs)
+                                            * (rnd.random(runs) < 0.01))
+        sell = np.round(level + rnd.normal(0, 3, runs), 2)
+        spread = np.round(rnd.choice([20.0, 25.0, 30.0], runs), 2)
+        rows.append(pd.DataFrame({'date': dates, 'product': product, 'sell_price': sell,
+                                  'buy_price': sell - spread, 'spread_pln': spread}))
+    frame = pd.concat(rows).sort_values('date', kind='stable')
+    return frame.to_dict('records')
+
+
+def test_incremental_matches_rebuild(tmp_path):
+    rows = history(15000)   # 60 tys. wierszy
+    store = CsvHistoryStore.for_file(str(tmp_path / "price_history_spread.csv"), rollups=False)
+    incremental = PriceAnalytics(store, str(tmp_path / "przyrostowo.pkl"), window=24)
+
+    rnd = np.random.default_rng(1)
+    start = 0
+    while start < len(rows):
+        size = int(rnd.integers(1, 4000))
+        store.append(rows[start:start + size])
+        state = incremental.update()
+        start += size
+
+    full = PriceAnalytics(store, str(tmp_path / "pelne.pkl"), window=24).update(rebuild=True)
+    found, expected = state['change_points'], full['change_points']
+    assert len(expected) > 10
+    # Te same punkty; wartości z dokładnością do zaokrąglenia (suma krocząca zależy
+    # od miejsca startu okna na poziomie 1e-12, co czasem zmienia ostatni grosz)
+    assert_frame_equal(found[['product', 'date']], expected[['product', 'date']])
+    for column, atol in (('before', 0.011), ('after', 0.011), ('pct', 0.011), ('z', 0.11)):
+        np.testing.assert_allclose(found[column].astype(float), expected[column].astype(float), atol=atol)
+    assert_frame_equal(state['latest'], full['latest'], check_dtype=False, check_exact=False, atol=0.011)
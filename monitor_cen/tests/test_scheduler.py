@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Planista trybu demona: kolejność zadań, terminy raportów i nadrabianie zaległych (catch-up)."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from monitor_engine import MonitorDaemon
+from scheduler import (ReportState, Scheduler, monthly_slot, next_monthly_slot, next_weekly_slot,
+                       weekly_slot)
+
+
+def test_pop_due_returns_jobs_in_time_order():
+    s = Scheduler()
+    t = datetime(2024, 5, 6, 10, 0)
+    s.add(t + timedelta(minutes=5), 'c')
+    s.add(t, 'a')
+    s.add(t, 'b')
+    s.add(t + timedelta(hours=1), 'd')
+    assert s.next_time() == t
+    assert s.pop_due(t - timedelta(seconds=1)) == []
+    assert s.pop_due(t + timedelta(minutes=10)) == ['a', 'b', 'c']   # ten sam termin – w kolejności dodania
+    assert len(s) == 1 and s.next_time() == t + timedelta(hours=1)
+
+
+@pytest.mark.parametrize('now, expected', [
+    (datetime(2024, 5, 6, 7, 0), datetime(2024, 5, 6, 7, 0)),     # poniedziałek, dokładnie o godzinie
+    (datetime(2024, 5, 6, 6, 59), datetime(2024, 4, 29, 7, 0)),   # poniedziałek przed godziną – tydzień wcześniej
+    (datetime(2024, 5, 12, 23, 0), datetime(2024, 5, 6, 7, 0)),   # niedziela
+])
+def test_weekly_slot(now, expected):
+    assert weekly_slot(now, 7) == expected
+    assert next_weekly_slot(expected) == expected + timedelta(days=7)
+
+
+@pytest.mark.parametrize('now, expected, following', [
+    (datetime(2024, 3, 1, 10, 0), datetime(2024, 3, 1, 10, 0), datetime(2024, 4, 1, 10, 0)),
+    (datetime(2024, 3, 1, 9, 0), datetime(2024, 2, 1, 10, 0), datetime(2024, 3, 1, 10, 0)),
+    (datetime(2024, 1, 1, 9, 0), datetime(2023, 12, 1, 10, 0), datetime(2024, 1, 1, 10, 0)),
+    (datetime(2024, 1, 31, 23, 0), datetime(2024, 1, 1, 10, 0), datetime(2024, 2, 1, 10, 0)),
+])
+def test_monthly_slot(now, expected, following):
+    assert monthly_slot(now, 10) == expected
+    assert next_monthly_slot(expected) == following
+
+
+def test_report_state_persists(tmp_path):
+    path = str(tmp_path / "daemon_state.json")
+    ReportState(path).set('inwest', 'weekly', datetime(2024, 5, 6, 7, 0))
+    assert ReportState(path).get('inwest', 'weekly') == datetime(2024, 5, 6, 7, 0)
+    assert ReportState(path).get('foto', 'monthly') is None
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("{uszkodzony")
+    assert ReportState(path).get('inwest', 'weekly') is None
+
+
+class FakeEngine:
+    """Silnik bez sieci: zapisuje przebiegi i wysłane raporty okresowe."""
+
+    def __init__(self):
+        adapter = SimpleNamespace(report_hour=7)
+        self.shops = [SimpleNamespace(name='inwest', adapter=adapter, products={'Dukat': 'u1', 'Krugerrand': 'u2'})]
+        self.config = {"daemon": {"interval_minutes": 15}}
+        self.runs = []
+        self.summaries = []
+        self.mail = SimpleNamespace(flush=lambda: 0)
+
+    def run_once(self, now, due=None, periodic=True):
+        self.runs.append((now, due, periodic))
+
+    def send_summary(self, shop, days):
+        self.summaries.append((shop.name, days))
+
+
+def daemon(tmp_path, now):
+    d = MonitorDaemon(state_file=str(tmp_path / "daemon_state.json"))
+    d.engine = FakeEngine()
+    d.schedule(now)
+    return d
+
+
+def test_first_start_does_not_send_current_report(tmp_path):
+    now = datetime(2024, 5, 8, 12, 0)   # środa
+    d = daemon(tmp_path, now)
+    d.run_due(now)
+    assert d.engine.runs == [(now, {'inwest': ['Dukat', 'Krugerrand']}, False)]
+    assert d.engine.summaries == []
+    assert d.reports.get('inwest', 'weekly') == datetime(2024, 5, 6, 7, 0)
+
+    d.run_due(datetime(2024, 5, 13, 7, 0))   # następny poniedziałek o 7:00
+    assert d.engine.summaries == [('inwest', 7)]
+
+
+def test_missed_reports_are_sent_once_after_restart(tmp_path):
+    state = ReportState(str(tmp_path / "daemon_state.json"))
+    state.set('inwest', 'weekly', datetime(2024, 4, 22, 7, 0))    # Raspberry uśpione przez 2 tygodnie
+    state.set('inwest', 'monthly', datetime(2024, 5, 1, 7, 0))
+
+    now = datetime(2024, 5, 8, 12, 0)
+    d = daemon(tmp_path, now)
+    d.run_due(now)
+    assert d.engine.summaries == [('inwest', 7)]   # dwa zaległe tygodnie – jeden raport
+    assert d.reports.get('inwest', 'weekly') == datetime(2024, 5, 6, 7, 0)
+    d.run_due(now + timedelta(minutes=1))
+    assert d.engine.summaries == [('inwest', 7)]
+
+    again = daemon(tmp_path, now + timedelta(minutes=5))   # restart po nadrobieniu
+    again.run_due(now + timedelta(minutes=5))
+    assert again.engine.summaries == []
+
+
+def test_polls_rescheduled_after_interval(tmp_path):
+    now = datetime(2024, 5, 8, 12, 0)
+    d = daemon(tmp_path, now)
+    before = datetime.now()
+    d.run_due(now)
+    polls = sorted(((when, key) for when, _, key in d.scheduler._heap if key[0] == 'poll'), key=lambda p: p[1])
+    assert [key for _, key in polls] == [('poll', 'inwest', 'Dukat'), ('poll', 'inwest', 'Krugerrand')]
+    assert all(when >= before + timedelta(minutes=15) for when, _ in polls)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Rejestr sklepów: niekompletny adapter zgłasza błąd przy budowie sklepów, nie w trakcie przebiegu."""
+
+import pytest
+
+from monitor_engine import build_shops
+from shops import SHOPS, FotoformaShop, ShopAdapter
+
+
+def test_registered_adapters_are_complete():
+    for cls in SHOPS.values():
+        cls(extractor=None)
+
+
+def test_incomplete_adapter_fails_in_build_shops(monkeypatch):
+    class NiepelnySklep(ShopAdapter):
+        name = "niepelny"
+        domains = ("niepelny.pl",)
+        products_key = "products_niepelny"
+        data_file = "price_history_spread.csv"
+
+        def parse(self, content):
+            return None
+
+    monkeypatch.setitem(SHOPS, "niepelny", NiepelnySklep)
+    config = {"products_niepelny": {"Produkt": "https://niepelny.pl/p"}, "email_receivers": ["a@example.com"]}
+    with pytest.raises(TypeError, match="abstract"):
+        build_shops(config, ["niepelny"])
+
+
+def test_fotoforma_change_for_in_report():
+    shop = FotoformaShop(extractor=None)
+    row = {'date': '2024-05-01 10:00', 'product': 'Fujinon XF 23mm', 'price': 3899.0, 'availability': 'Dostępny'}
+    change = shop.change_for(row, {'price': '3999.0', 'availability': 'Dostępny'})
+    assert (change['old_price'], change['new_price'], change['diff']) == (3999.0, 3899.0, -100.0)
+    subject, body = shop.report([change])
+    assert "1 zmian cen" in subject and "📉 SPADEK" in body and "Link:" not in body
+    assert "➡️ BEZ ZMIANY" in shop.report([shop.change_for(row, None)])[1]
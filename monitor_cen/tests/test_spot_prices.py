@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Ceny spot (spot_prices.py) offline – notowania z FixtureFeed zamiast Yahoo."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spot_prices import (FX_USD_PLN, METALS, FixtureFeed, SpotPrices, TROY_OUNCE_G, melt_value,
+                         pln_gram_to_usd_oz, usd_oz_to_pln_gram)
+
+QUOTES = {
+    'GC=F': {'close': 3110.34768, 'prev_close': 3079.2442032, 'time': '2024-05-02 00:00:00'},
+    'SI=F': {'close': 31.1034768, 'prev_close': None, 'time': '2024-05-02 00:00:00'},
+    'PLN=X': {'close': 4.0, 'prev_close': 4.0, 'time': '2024-05-02 00:00:00'},
+}
+
+
+class CountingFeed(FixtureFeed):
+    """FixtureFeed zapamiętujący każde wywołanie download() (listę tickerów)."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = []
+        self.broken = False
+
+    def download(self, tickers):
+        self.calls.append(list(tickers))
+        if self.broken:
+            raise ConnectionError("Yahoo nie odpowiada")
+        return super().download(tickers)
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = tmp_path / "spot.json"
+    path.write_text(json.dumps(QUOTES), encoding='utf-8')
+    return CountingFeed(str(path))
+
+
+def test_all_tickers_in_one_download(feed, tmp_path):
+    spot = SpotPrices(feed, str(tmp_path / "spot_cache.json"), ttl=900)
+    prices = spot.pln_per_gram(['gold', 'silver'])
+    assert feed.calls == [[METALS['gold'], METALS['silver'], FX_USD_PLN]]
+    assert prices['gold']['price'] == pytest.approx(400.0)
+    assert prices['gold']['prev_price'] == pytest.approx(396.0)
+    assert prices['silver']['price'] == pytest.approx(4.0)
+    assert prices['silver']['prev_price'] is None
+
+
+def test_cache_within_ttl_skips_download(feed, tmp_path):
+    cache_file = str(tmp_path / "spot_cache.json")
+    SpotPrices(feed, cache_file, ttl=900).quotes(['GC=F', 'PLN=X'])
+    again = SpotPrices(feed, cache_file, ttl=900)   # nowy proces – cache z pliku
+    assert again.quotes(['GC=F', 'PLN=X'])['GC=F']['close'] == QUOTES['GC=F']['close']
+    assert len(feed.calls) == 1
+
+    again.quotes(['GC=F', 'SI=F', 'PLN=X'])        # pobierany tylko brakujący ticker
+    assert feed.calls[1] == ['SI=F']
+
+
+def test_stale_cache_used_when_feed_fails(feed, tmp_path, capsys):
+    spot = SpotPrices(feed, str(tmp_path / "spot_cache.json"), ttl=0)
+    spot.quotes(['GC=F', 'PLN=X'])
+    feed.broken = True
+    quotes = spot.quotes(['GC=F', 'PLN=X'])
+    assert len(feed.calls) == 2
+    assert quotes['GC=F']['close'] == QUOTES['GC=F']['close']
+    assert "używam ostatnich znanych" in capsys.readouterr().out
+
+
+def test_conversions_vectorized():
+    usd_oz = np.array([TROY_OUNCE_G, 3110.34768, 2488.278144])
+    usd_pln = np.array([1.0, 4.0, 4.25])
+    expected = np.array([1.0, 400.0, 340.0])   # 2488.278144 = 80 × uncja; 80 × 4,25 = 340
+    np.testing.assert_allclose(usd_oz_to_pln_gram(usd_oz, usd_pln), expected)
+    series = usd_oz_to_pln_gram(pd.Series(usd_oz), pd.Series(usd_pln))
+    np.testing.assert_allclose(series.to_numpy(), expected)
+    np.testing.assert_allclose(pln_gram_to_usd_oz(expected, usd_pln), usd_oz)
+    # Dukat 3,44 g próby 0,986 przy 400 PLN/g: 400 × 3,44 × 0,986 = 1356,736
+    assert melt_value(400.0, 3.44, 0.986) == pytest.approx(1356.736)
+    # 400 × 3,44 × 0,999 = 1374,624; 340 × 31,1 × 0,999 = 10563,426
+    np.testing.assert_allclose(melt_value(pd.Series([400.0, 340.0]), pd.Series([3.44, 31.1]), 0.999),
+                               [1374.624, 10563.426])
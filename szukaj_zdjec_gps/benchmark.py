@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Pomiar wyszukiwania zdjęć w promieniu na syntetycznym indeksie (domyślnie 1 mln punktów).
+Nie dotyka prawdziwego indeksu – baza powstaje w katalogu tymczasowym.
+
+Porównanie:
+  - geodesic dla każdego zdjęcia (dotychczasowa pętla; szacunek z próbki),
+  - NumPy: odległość po kuli dla całej tablicy + geodesic tylko przy granicy
+    (same obliczenia na gotowych tablicach oraz z odczytem wszystkich wierszy z SQLite),
+  - indeks siatki w SQLite (tylko komórki wokół adresu) + to samo filtrowanie.
+Wynik indeksu sprawdzany jest z dokładną geodesic.
+
+Użycie:
+  python benchmark.py --points 1000000 --radius 1.5 10 100
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+from szukaj_zdjec import PhotoIndex, grid_cell, haversine_km, within_radius
+
+TARGET = (53.1325, 23.1688)  # Białystok
+CITIES = [TARGET, (52.2297, 21.0122), (50.0647, 19.9450), (54.3520, 18.6466), (51.1079, 17.0385)]
+
+
+def make_points(n, seed=1):
+    """Współrzędne: 70% wokół kilku miast (jak zdjęcia z domu i wyjazdów), 30% w całej Europie."""
+    rnd = np.random.default_rng(seed)
+    near = int(n * 0.7)
+    centers = np.array(CITIES)[rnd.integers(0, len(CITIES), near)]
+    spread = rnd.choice([0.01, 0.05, 0.3], near)[:, None]
+    clustered = centers + rnd.normal(0, 1, (near, 2)) * spread
+    scattered = np.column_stack([rnd.uniform(35, 70, n - near), rnd.uniform(-10, 40, n - near)])
+    points = np.vstack([clustered, scattered])
+    return points[rnd.permutation(n)]
+
+
+def build_index(db_path, folder, points, chunk=50000):
+    index = PhotoIndex(db_path)
+    rows = []
+    for i, (lat, lon) in enumerate(points.tolist()):
+        path = os.path.join(folder, f"rok{i % 20:02d}", f"IMG_{i:07d}.jpg")
+        rows.append((path, 3_000_000, 0, lat, lon, None, grid_cell(lat, lon)))
+        if len(rows) >= chunk:
+            index._save(rows)
+            rows = []
+    index._save(rows)
+    return index
+
+
+def full_scan(index, folder, lat, lon, radius_km):
+    """Bez siatki: wszystkie zdjęcia folderu z SQLite, potem to samo filtrowanie NumPy."""
+    where, params = index._in_folder(folder)
+    rows = index.conn.execute(f"SELECT path, lat, lon FROM photos WHERE {where} AND lat IS NOT NULL",
+                              params).fetchall()
+    coords = np.array([row[1:] for row in rows], dtype=float).reshape(-1, 2)
+    inside, dist = within_radius(lat, lon, radius_km, coords[:, 0], coords[:, 1])
+    return sorted((rows[i][0], float(dist[i])) for i in np.flatnonzero(inside))
+
+
+def timed(label, fn, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    print(f"  {label:<52} {best * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pomiar wyszukiwania zdjęć w promieniu")
+    parser.add_argument('--points', type=int, default=1_000_000, help='liczba zdjęć w indeksie (domyślnie 1 mln)')
+    parser.add_argument('--radius', type=float, nargs='+', default=[1.5, 10, 100], help='promienie w km')
+    parser.add_argument('--sample', type=int, default=20000, help='próbka do szacunku pętli z geodesic')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "zdjecia")
+        points = make_points(args.points)
+        t0 = time.perf_counter()
+        index = build_index(os.path.join(tmp, "indeks.db"), folder, points)
+        print(f"Indeks: {args.points} punktów, budowa {time.perf_counter() - t0:.1f} s")
+        lats, lons = points[:, 0].copy(), points[:, 1].copy()
+        sample = random.Random(1).sample(range(args.points), min(args.sample, args.points))
+
+        for radius in args.radius:
+            print(f"\nPromień {radius:g} km od {TARGET}:")
+
+            def loop():  # dotychczasowa pętla: geodesic dla każdego zdjęcia
+                return sum(geodesic(TARGET, (lats[i], lons[i])).km <= radius for i in sample)
+            t0 = time.perf_counter()
+            loop()
+            estimate = (time.perf_counter() - t0) * args.points / len(sample)
+            print(f"  {'geodesic dla każdego zdjęcia (szacunek z próbki)':<52} {estimate * 1000:10.1f} ms")
+
+            timed("NumPy na tablicach w pamięci", lambda: within_radius(*TARGET, radius, lats, lons))
+            timed("SQLite (cały folder) + NumPy", lambda: full_scan(index, folder, *TARGET, radius))
+            found = timed("indeks siatki + NumPy + geodesic przy granicy",
+                          lambda: index.search(folder, *TARGET, radius))
+
+            paths, cand_lats, cand_lons = index.candidates(folder, *TARGET, radius)
+            dist = haversine_km(*TARGET, cand_lats, cand_lons)
+            band = np.abs(dist - radius) < radius * 0.006 + 0.001
+            # Kontrola: dokładna geodesic dla wszystkich punktów bliskich okręgu (po kuli do 2% ponad promień)
+            close = np.flatnonzero(haversine_km(*TARGET, lats, lons) <= radius * 1.02 + 0.01)
+            exact = {os.path.join(folder, f"rok{i % 20:02d}", f"IMG_{i:07d}.jpg") for i in close
+                     if geodesic(TARGET, (lats[i], lons[i])).km <= radius}
+            ok = "tak" if exact == {p for p, _ in found} else "NIE"
+            print(f"  znaleziono {len(found)}, kandydaci z siatki {len(paths)}, "
+                  f"geodesic przy granicy {int(band.sum())}, zgodne z geodesic: {ok}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
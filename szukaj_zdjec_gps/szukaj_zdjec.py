@@ -5,39 +5,90 @@ Znajduje zdjęcia, które zostały zrobione w określonym promieniu od podanego
 a następnie przenosi je do nowo utworzonego folderu "wyszukane XX" wewnątrz katalogu 
 źródłowego. 
 
-Wymaga zainstalowania bibliotek: Pillow, geopy
+Wymaga zainstalowania bibliotek: Pillow, geopy, numpy
 
 Konfiguracja:
 - Parametry programu są wczytywane z pliku JSON: szukaj_zdjec.json
 - Plik musi zawierać: folder_zrodlowy, adres, promien
+- Opcjonalnie "skanowanie": tryb ("watki" albo "procesy") i liczba pracowników
+  czytających EXIF równolegle (domyślnie 8 wątków)
+- Opcjonalnie "indeks": plik indeksu SQLite (domyślnie szukaj_zdjec_indeks.db obok
+  programu) i "aktualizuj": false – szukanie tylko w indeksie, bez przeglądania folderu
 - Edytuj szukaj_zdjec.json aby zmienić ustawienia bez modyfikowania kodu
 
 {
   "folder_zrodlowy": "C:/Users/truec/Pictures/Camera Roll",
   "adres": "Produkcyjna 110, Białystok",
-  "promien": 1.5
+  "promien": 1.5,
+  "skanowanie": {"tryb": "watki", "pracownicy": 8},
+  "indeks": {"plik": "szukaj_zdjec_indeks.db", "aktualizuj": true}
 }
 
+Współrzędne zdjęć trafiają do indeksu (ścieżka, rozmiar, czas modyfikacji,
+GPS, data wykonania). Kolejne wyszukiwanie czyta EXIF tylko nowych
+i zmienionych plików, a szuka w indeksie: z komórek siatki 0,1° wokół adresu,
+odległość po kuli (NumPy), a dokładna geodesic tylko przy granicy promienia.
+
 '''
 
 
 import os
 import json
+import math
+import queue
 import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import freeze_support
 from pathlib import Path
+import numpy as np
 from PIL import Image
 from PIL.ExifTags import TAGS, GPSTAGS
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.heic')
+
+# Indeks przestrzenny: siatka komórek 0,1° × 0,1° (w Polsce ok. 11 × 7 km)
+GRID_STEP = 0.1
+GRID_ROWS = 1800
+GRID_COLUMNS = 3600
+EARTH_RADIUS_KM = 6371.0088
+# Odległość po kuli różni się od elipsoidalnej (geodesic) o mniej niż 0,6%
+SPHERE_ERROR = 0.006
+
+
+def get_photo_info(image_path):
+    """(współrzędne GPS lub None, data wykonania lub None) z metadanych zdjęcia."""
+    try:
+        with Image.open(image_path) as img:
+            exif_data = img._getexif()
+    except Exception:
+        return None, None
+    if not exif_data:
+        return None, None
+    return gps_from_exif(exif_data), taken_from_exif(exif_data)
+
+
 def get_gps_coords(image_path):
     """Wyciąga współrzędne GPS z metadanych zdjęcia."""
-    try:
-        img = Image.open(image_path)
-        exif_data = img._getexif()
-        if not exif_data:
-            return None
+    return get_photo_info(image_path)[0]
+
+
+def taken_from_exif(exif_data):
+    """Data wykonania (DateTimeOriginal, a gdy jej brak – DateTime) jako 'RRRR-MM-DD GG:MM:SS'."""
+    value = exif_data.get(36867) or exif_data.get(306)
+    if not isinstance(value, str) or len(value) < 19:
+        return None
+    return value[:10].replace(':', '-') + value[10:19]
 
+
+def gps_from_exif(exif_data):
+    """Współrzędne GPS z odczytanych metadanych EXIF."""
+    try:
         gps_info = {}
         for tag, value in exif_data.items():
             decoded = TAGS.get(tag, tag)
@@ -67,7 +118,276 @@ def get_gps_coords(image_path):
     except Exception:
         return None
 
-def find_and_move_photos(source_dir, address, radius_km):
+
+def iter_photos(source_path, extensions=EXTENSIONS):
+    """
+    Kolejne pliki zdjęć w folderze i podfolderach jako (ścieżka, rozmiar, mtime w ns)
+    – os.scandir, bez osobnego otwierania plików. Kolejność stała: pliki folderu
+    alfabetycznie, potem podfoldery. Foldery "wyszukane XX" (wyniki poprzednich
+    wyszukiwań) są pomijane.
+    """
+    stack = [str(source_path)]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"Nie można odczytać folderu {folder}: {e}")
+            continue
+        subfolders = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith("wyszukane"):
+                    subfolders.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in extensions:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime_ns
+        stack.extend(reversed(subfolders))
+
+
+def read_photo_batch(photos):
+    """(plik, (współrzędne, data wykonania)) dla partii plików – zadanie dla pracownika puli."""
+    return [(photo, get_photo_info(photo[0])) for photo in photos]
+
+
+def scan_photos(photos, workers=8, mode="watki", batch=32):
+    """
+    Równoległy odczyt EXIF: wątek przeglądający foldery podaje partie plików
+    (z iter_photos) przez ograniczoną kolejkę, a pula wątków (lub procesów)
+    czyta metadane. W toku jest najwyżej 2 × pracownicy partii, więc pamięć nie
+    rośnie z wielkością archiwum. Zwraca (plik, (współrzędne, data wykonania))
+    w kolejności przeglądania folderów – niezależnie od tego, który pracownik
+    skończył pierwszy.
+    """
+    feed = queue.Queue(maxsize=4 * workers)
+    end = object()
+
+    def walk():
+        part = []
+        try:
+            for photo in photos:
+                part.append(photo)
+                if len(part) >= batch:
+                    feed.put(part)
+                    part = []
+            if part:
+                feed.put(part)
+        finally:
+            feed.put(end)
+
+    pool_class = ProcessPoolExecutor if mode == "procesy" else ThreadPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        threading.Thread(target=walk, daemon=True).start()
+        pending = deque()
+        walking = True
+        while walking or pending:
+            while walking and len(pending) < 2 * workers:
+                part = feed.get()
+                if part is end:
+                    walking = False
+                else:
+                    pending.append(pool.submit(read_photo_batch, part))
+            if pending:
+                yield from pending.popleft().result()
+
+
+class Progress:
+    """Postęp skanowania w jednej linii: liczba plików, z GPS i przepustowość (plików/s)."""
+
+    def __init__(self, every=1.0):
+        self.every = every
+        self.start = self.last = time.monotonic()
+        self.files = 0
+        self.with_gps = 0
+
+    def update(self, has_gps):
+        self.files += 1
+        self.with_gps += bool(has_gps)
+        now = time.monotonic()
+        if now - self.last >= self.every:
+            self.last = now
+            self.show(now)
+
+    def show(self, now=None, final=False):
+        elapsed = max((now or time.monotonic()) - self.start, 1e-9)
+        print(f"\rPrzeskanowano: {self.files} plików | z GPS: {self.with_gps} | "
+              f"{self.files / elapsed:.0f} plików/s", end="\n" if final else "", flush=True)
+
+
+def grid_cell(lat, lon):
+    """Numer komórki siatki (wiersz × GRID_COLUMNS + kolumna) dla współrzędnych."""
+    row = min(int((lat + 90) / GRID_STEP), GRID_ROWS - 1)
+    col = min(int((lon + 180) / GRID_STEP), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + col
+
+
+def grid_ranges(lat, lon, radius_km):
+    """
+    Zakresy numerów komórek (od, do) pokrywające okrąg o promieniu radius_km:
+    po jednym na wiersz siatki (dwa, gdy okrąg przecina południk 180°),
+    sąsiednie zakresy połączone. Z zapasem na spłaszczenie Ziemi.
+    """
+    delta = radius_km / EARTH_RADIUS_KM * (1 + 2 * SPHERE_ERROR)
+    lat_lo = max(lat - math.degrees(delta), -90.0)
+    lat_hi = min(lat + math.degrees(delta), 90.0)
+    cos_lat = math.cos(math.radians(lat))
+    if lat_lo <= -90 or lat_hi >= 90 or math.sin(delta) >= cos_lat:
+        lon_spans = [(-180.0, 180.0)]  # okrąg obejmuje biegun
+    else:
+        # Zasięg długości geograficznej czaszy kulistej
+        dlon = math.degrees(math.asin(math.sin(delta) / cos_lat))
+        lo, hi = lon - dlon, lon + dlon
+        if lo < -180:
+            lon_spans = [(-180.0, hi), (lo + 360, 180.0)]
+        elif hi > 180:
+            lon_spans = [(-180.0, hi - 360), (lo, 180.0)]
+        else:
+            lon_spans = [(lo, hi)]
+
+    ranges = []
+    for row in range(grid_cell(lat_lo, 0) // GRID_COLUMNS, grid_cell(lat_hi, 0) // GRID_COLUMNS + 1):
+        for lo, hi in lon_spans:
+            first = row * GRID_COLUMNS + grid_cell(0, lo) % GRID_COLUMNS
+            last = row * GRID_COLUMNS + grid_cell(0, hi) % GRID_COLUMNS
+            if ranges and ranges[-1][1] + 1 >= first:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+            else:
+                ranges.append((first, last))
+    return ranges
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Odległości po kuli od punktu (lat, lon) do tablic współrzędnych – wektorowo."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def within_radius(lat, lon, radius_km, lats, lons):
+    """
+    (maska zdjęć w promieniu, odległości w km) dla tablic współrzędnych.
+    Odległość po kuli rozstrzyga punkty wyraźnie wewnątrz i na zewnątrz;
+    dokładna geodesic liczona jest tylko w pasie błędu wokół granicy.
+    """
+    dist = haversine_km(lat, lon, lats, lons)
+    band = radius_km * SPHERE_ERROR + 0.001
+    inside = dist <= radius_km - band
+    for i in np.flatnonzero(~inside & (dist < radius_km + band)):
+        dist[i] = geodesic((lat, lon), (lats[i], lons[i])).km
+        inside[i] = dist[i] <= radius_km
+    return inside, dist
+
+
+class PhotoIndex:
+    """
+    Indeks zdjęć w SQLite: ścieżka → (rozmiar, mtime, lat, lon, data wykonania).
+    Aktualizacja czyta EXIF tylko nowych i zmienionych plików (inny rozmiar lub
+    czas modyfikacji), a usunięte pliki znikają z indeksu. Ścieżki są pełne,
+    więc jeden plik indeksu może obsługiwać kilka folderów źródłowych.
+    Zdjęcia z GPS mają numer komórki siatki (cell) – zapytanie o promień czyta
+    z dysku tylko komórki wokół adresu (indeks pokrywający cell, lat, lon, path).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS photos ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime INTEGER NOT NULL,"
+            " lat REAL, lon REAL, taken TEXT, cell INTEGER)")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(photos)")}
+        if "cell" not in columns:
+            # Indeks sprzed siatki – komórki liczone z zapisanych współrzędnych, bez czytania EXIF
+            self.conn.execute("ALTER TABLE photos ADD COLUMN cell INTEGER")
+            rows = self.conn.execute("SELECT path, lat, lon FROM photos WHERE lat IS NOT NULL").fetchall()
+            self.conn.executemany("UPDATE photos SET cell = ? WHERE path = ?",
+                                  ((grid_cell(lat, lon), path) for path, lat, lon in rows))
+        self.conn.execute("CREATE INDEX IF NOT EXISTS photos_cell ON photos (cell, lat, lon, path)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _in_folder(self, folder):
+        """Warunek SQL 'plik w folderze (i podfolderach)' – zakres klucza, bez skanowania tabeli."""
+        prefix = os.path.join(str(folder), "")
+        return "path >= ? AND path < ?", (prefix, prefix + "\U0010ffff")
+
+    def count(self, folder):
+        where, params = self._in_folder(folder)
+        return self.conn.execute(f"SELECT COUNT(*) FROM photos WHERE {where}", params).fetchone()[0]
+
+    def update(self, folder, workers=8, mode="watki", chunk=1000):
+        """Doczytuje nowe i zmienione pliki folderu; zwraca (odczytane, bez zmian, usunięte)."""
+        where, params = self._in_folder(folder)
+        known = {path: (size, mtime) for path, size, mtime in
+                 self.conn.execute(f"SELECT path, size, mtime FROM photos WHERE {where}", params)}
+        seen = set()
+        unchanged = 0
+
+        def changed():
+            nonlocal unchanged
+            for path, size, mtime in iter_photos(folder):
+                seen.add(path)
+                if known.get(path) == (size, mtime):
+                    unchanged += 1
+                else:
+                    yield path, size, mtime
+
+        progress = Progress()
+        rows = []
+        for (path, size, mtime), (coords, taken) in scan_photos(changed(), workers, mode):
+            progress.update(coords)
+            lat, lon = coords or (None, None)
+            cell = grid_cell(lat, lon) if coords else None
+            rows.append((path, size, mtime, lat, lon, taken, cell))
+            # Zapis partiami – przerwane skanowanie nie traci już odczytanych plików
+            if len(rows) >= chunk:
+                self._save(rows)
+                rows = []
+        self._save(rows)
+        progress.show(final=True)
+
+        removed = [path for path in known if path not in seen]
+        self.remove(removed)
+        return progress.files, unchanged, len(removed)
+
+    def _save(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO photos (path, size, mtime, lat, lon, taken, cell)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def remove(self, paths):
+        with self.conn:
+            self.conn.executemany("DELETE FROM photos WHERE path = ?", ((p,) for p in paths))
+
+    def candidates(self, folder, lat, lon, radius_km):
+        """(ścieżki, lats, lons) zdjęć folderu z komórek siatki pokrywających okrąg."""
+        where, params = self._in_folder(folder)
+        rows = []
+        for first, last in grid_ranges(lat, lon, radius_km):
+            rows += self.conn.execute(
+                f"SELECT path, lat, lon FROM photos INDEXED BY photos_cell"
+                f" WHERE cell BETWEEN ? AND ? AND {where}", (first, last, *params)).fetchall()
+        paths = [row[0] for row in rows]
+        coords = np.array([row[1:] for row in rows], dtype=float).reshape(-1, 2)
+        return paths, coords[:, 0], coords[:, 1]
+
+    def search(self, folder, lat, lon, radius_km):
+        """(ścieżka, odległość w km) zdjęć folderu w promieniu od punktu, w kolejności ścieżek."""
+        paths, lats, lons = self.candidates(folder, lat, lon, radius_km)
+        inside, dist = within_radius(lat, lon, radius_km, lats, lons)
+        return sorted((paths[i], float(dist[i])) for i in np.flatnonzero(inside))
+
+
+def find_and_move_photos(source_dir, address, radius_km, scan_options=None, index_options=None):
     # 1. Lokalizacja adresu
     geolocator = Nominatim(user_agent="photo_mover_geo")
     location = geolocator.geocode(address)
@@ -77,7 +397,7 @@ def find_and_move_photos(source_dir, address, radius_km):
         return
 
     target_coords = (location.latitude, location.longitude)
-    source_path = Path(source_dir)
+    source_path = Path(os.path.abspath(source_dir))
 
     # 2. Przygotowanie folderu docelowego wewnątrz katalogu źródłowego
     counter = 1
@@ -91,20 +411,24 @@ def find_and_move_photos(source_dir, address, radius_km):
     print(f"Szukanie zdjęć w promieniu {radius_km}km od: {location.address}")
     
     found_files = []
-    extensions = ('.jpg', '.jpeg', '.png', '.heic')
-    
+    scan_options = scan_options or {}
+    index_options = index_options or {}
+    mode = scan_options.get("tryb", "watki")
+    workers = int(scan_options.get("pracownicy", 8))
+    index_path = os.path.join(program_dir(), index_options.get("plik", "szukaj_zdjec_indeks.db"))
+    index = PhotoIndex(index_path)
+
+    # Indeks: EXIF czytany tylko dla nowych i zmienionych plików
+    if index_options.get("aktualizuj", True) or index.count(source_path) == 0:
+        print(f"Aktualizacja indeksu ({workers} {'procesów' if mode == 'procesy' else 'wątków'}): {index_path}")
+        read, unchanged, removed = index.update(source_path, workers, mode)
+        print(f"Indeks: {read} nowych lub zmienionych, {unchanged} bez zmian, {removed} usuniętych")
+    else:
+        print(f"Szukanie tylko w indeksie (bez aktualizacji): {index_path}")
+
     # Najpierw zbieramy listę, żeby nie przeszukiwać folderu, do którego przenosimy
-    for file_path in source_path.rglob('*'):
-        # Pomijamy pliki, które już są w folderach "wyszukane"
-        if "wyszukane" in file_path.parts:
-            continue
-            
-        if file_path.suffix.lower() in extensions:
-            coords = get_gps_coords(file_path)
-            if coords:
-                distance = geodesic(target_coords, coords).km
-                if distance <= radius_km:
-                    found_files.append((file_path, distance))
+    for path, distance in index.search(source_path, *target_coords, radius_km):
+        found_files.append((Path(path), distance))
 
     if found_files:
         target_folder.mkdir(parents=True, exist_ok=True)
@@ -114,6 +438,7 @@ def find_and_move_photos(source_dir, address, radius_km):
             try:
                 # Przenoszenie pliku
                 shutil.move(str(file_path), str(target_folder / file_path.name))
+                index.remove([str(file_path)])
                 print(f"Przeniesiono [{dist:.2f} km]: {file_path.name}")
             except Exception as e:
                 print(f"Błąd przy przenoszeniu {file_path.name}: {e}")
@@ -122,19 +447,21 @@ def find_and_move_photos(source_dir, address, radius_km):
         print(f"Sukces! Przeniesiono {len(found_files)} zdjęć do {target_folder}")
     else:
         print("Nie znaleziono żadnych zdjęć spełniających kryteria.")
+    index.close()
 
 # --- KONFIGURACJA ---
-def load_config(config_file="szukaj_zdjec.json"):
-    """Wczytuje konfigurację z pliku JSON."""
+def program_dir():
+    """Katalog programu – konfiguracja i indeks leżą obok skryptu lub exe."""
     # Obsługa PyInstallera - szukaj w tym samym katalogu co exe
     if getattr(os.sys, 'frozen', False):
         # Program jest uruchomiony jako exe
-        script_dir = os.path.dirname(os.sys.executable)
-    else:
-        # Program jest uruchomiony jako skrypt Python
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    config_path = os.path.join(script_dir, config_file)
+        return os.path.dirname(os.sys.executable)
+    # Program jest uruchomiony jako skrypt Python
+    return os.path.dirname(os.path.abspath(__file__))
+
+def load_config(config_file="szukaj_zdjec.json"):
+    """Wczytuje konfigurację z pliku JSON."""
+    config_path = os.path.join(program_dir(), config_file)
     
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
@@ -148,10 +475,13 @@ def load_config(config_file="szukaj_zdjec.json"):
         return None
 
 if __name__ == "__main__":
+    freeze_support()  # pula procesów w wersji exe (PyInstaller)
     config = load_config()
     if config:
         find_and_move_photos(
             config.get("folder_zrodlowy"),
             config.get("adres"),
-            config.get("promien")
+            config.get("promien"),
+            config.get("skanowanie"),
+            config.get("indeks")
         )
\ No newline at end of file
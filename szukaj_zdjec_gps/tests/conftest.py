@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# szukaj_zdjec.py to skrypt, nie pakiet – testy importują go z katalogu programu
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Wyszukiwanie w promieniu z indeksu siatki porównane z geodesic dla każdego zdjęcia."""
+
+import os
+import random
+
+import pytest
+from geopy.distance import geodesic
+
+import szukaj_zdjec
+from szukaj_zdjec import PhotoIndex, grid_cell, grid_ranges
+
+CENTERS = [
+    (53.1325, 23.1688),     # Białystok
+    (89.95, 10.0),          # przy biegunie północnym
+    (-89.9, -120.0),        # przy biegunie południowym
+    (-16.5, 179.97),        # Fidżi, przy południku 180°
+    (0.0, -179.99),
+    (64.5, -179.95),        # Czukotka – okrąg przecina południk 180° daleko od równika
+]
+RADII = [0.5, 1.5, 10, 100, 400]
+
+
+def photo(folder, i):
+    return os.path.join(folder, f"rok{i % 7}", f"IMG_{i:05d}.jpg")
+
+
+def make_points(seed=1):
+    """Punkty skupione wokół centrów, rozrzucone po świecie i leżące tuż przy granicy promieni."""
+    rnd = random.Random(seed)
+    points = []
+    for lat, lon in CENTERS:
+        for _ in range(150):
+            spread = rnd.choice([0.01, 0.1, 1.0, 4.0])
+            points.append((max(-90.0, min(90.0, lat + rnd.gauss(0, spread))),
+                           (lon + rnd.gauss(0, spread) + 180) % 360 - 180))
+        for radius in RADII:
+            for rel in (1 - 1e-6, 1 + 1e-6, 1 - 3e-3, 1 + 3e-3):
+                p = geodesic(kilometers=radius * rel).destination((lat, lon), rnd.uniform(0, 360))
+                points.append((p.latitude, p.longitude))
+    points += [(rnd.uniform(-90, 90), rnd.uniform(-180, 180)) for _ in range(300)]
+    return points
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("indeks")
+    folder = str(tmp / "zdjecia")
+    points = make_points()
+    idx = PhotoIndex(str(tmp / "indeks.db"))
+    idx._save([(photo(folder, i), 1000, 0, lat, lon, None, grid_cell(lat, lon))
+               for i, (lat, lon) in enumerate(points)])
+    # Zdjęcie z sąsiedniego folderu o wspólnym początku nazwy nie należy do wyników
+    idx._save([(os.path.join(folder + "2", "IMG.jpg"), 1, 0, *CENTERS[0], None, grid_cell(*CENTERS[0]))])
+    yield idx, folder, points
+    idx.close()
+
+
+@pytest.mark.parametrize("center", CENTERS)
+@pytest.mark.parametrize("radius", RADII)
+def test_search_matches_geodesic(index, center, radius):
+    idx, folder, points = index
+    found = idx.search(folder, *center, radius)
+    exact = {photo(folder, i): geodesic(center, p).km for i, p in enumerate(points)}
+    assert {path for path, _ in found} == {path for path, km in exact.items() if km <= radius}
+    assert [path for path, _ in found] == sorted(path for path, _ in found)
+    for path, km in found:
+        assert km == pytest.approx(exact[path], rel=0.006, abs=0.001)
+
+
+def test_grid_ranges_are_sorted_and_disjoint():
+    for lat, lon in CENTERS:
+        for radius in RADII:
+            ranges = grid_ranges(lat, lon, radius)
+            assert all(first <= last for first, last in ranges)
+            assert all(a[1] + 1 < b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_update_reads_only_new_and_changed_files(tmp_path, monkeypatch):
+    folder = tmp_path / "zdjecia"
+    (folder / "2023").mkdir(parents=True)
+    (folder / "wyszukane 01").mkdir()
+    for name in ("a.jpg", "b.JPG", "2023/c.jpeg", "wyszukane 01/a.jpg", "opis.txt"):
+        (folder / name).write_bytes(b"x")
+    read = []
+
+    def fake_info(path):
+        read.append(os.path.relpath(path, folder))
+        return (53.13, 23.17), "2023-05-01 12:00:00"
+
+    monkeypatch.setattr(szukaj_zdjec, "get_photo_info", fake_info)
+    idx = PhotoIndex(str(tmp_path / "indeks.db"))
+    assert idx.update(str(folder), workers=2) == (3, 0, 0)
+    assert sorted(read) == sorted(["a.jpg", "b.JPG", os.path.join("2023", "c.jpeg")])
+
+    read.clear()
+    (folder / "a.jpg").write_bytes(b"inny rozmiar")
+    (folder / "b.JPG").unlink()
+    assert idx.update(str(folder), workers=2) == (1, 1, 1)
+    assert read == ["a.jpg"]
+    assert idx.count(str(folder)) == 2
+    assert [os.path.basename(p) for p, _ in idx.search(str(folder), 53.13, 23.17, 0.1)] == ["c.jpeg", "a.jpg"]
+    idx.close()